@@ -0,0 +1,59 @@
+# coding: utf-8
+
+# 比较逐行调用 decode_bytes 与使用 StreamDecoder 解码 pip 输出的吞吐量
+# 用法：python benchmark/bench_decode.py [行数]
+
+import os
+import sys
+import time
+
+# 适应某些编辑器、IDE 的模块查找路径问题
+sys.path = [os.path.dirname(sys.path[0])] + sys.path
+
+from fastpip.com.common import StreamDecoder, decode_bytes
+
+SAMPLE_LINES = (
+    "Collecting requests\n",
+    "  Downloading requests-2.31.0-py3-none-any.whl (62 kB)\n",
+    "Requirement already satisfied: idna<4,>=2.5 in c:\\python\\lib\\site-packages\n",
+    "Building wheel for pyyaml (pyproject.toml): started\n",
+    "  正在编译 _yaml.c，请稍候……\n",
+    "Successfully installed requests-2.31.0\n",
+)
+
+
+def make_lines(count, encoding):
+    lines = list()
+    for i in range(count):
+        line = SAMPLE_LINES[i % len(SAMPLE_LINES)]
+        lines.append(line.encode(encoding, "replace"))
+    return lines
+
+
+def bench(name, lines, decode):
+    total = sum(len(b) for b in lines)
+    start = time.perf_counter()
+    for line_bytes in lines:
+        decode(line_bytes)
+    elapsed = time.perf_counter() - start
+    print(
+        "{:<28}{:>10.0f} 行/秒{:>10.2f} MB/秒".format(
+            name, len(lines) / elapsed, total / elapsed / 1048576
+        )
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    # UTF-8：设置 PYTHONIOENCODING 后 pip 的输出
+    # GBK：非 Python 程序(如编译器)按中文控制台代码页的输出
+    for encoding in ("utf-8", "gbk"):
+        lines = make_lines(count, encoding)
+        print("{} 行 {} 编码的输出：".format(count, encoding))
+        bench("  decode_bytes(逐行)", lines, decode_bytes)
+        decoder = StreamDecoder("bench-{}".format(encoding))
+        bench("  StreamDecoder", lines, decoder.decode)
+
+
+if __name__ == "__main__":
+    main()
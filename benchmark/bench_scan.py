@@ -0,0 +1,217 @@
+# coding: utf-8
+
+# 比较旧的 os.listdir + os.path.isfile/isdir 扫描方式与 PackageMapScanner(os.scandir)扫描
+# 合成的 site-packages 目录时的系统调用次数及耗时
+# 用法：python benchmark/bench_scan.py [目录项数]
+
+import builtins
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+# 适应某些编辑器、IDE 的模块查找路径问题
+sys.path = [os.path.dirname(sys.path[0])] + sys.path
+
+from fastpip.utils.pkgmap import PackageMapScanner, build_mapping
+
+_module_pattern = re.compile(r"^([A-Z0-9_]+).*(?<!_d)\.py[cdw]?$", re.I)
+_info_pkgname_pattern = re.compile(r"^Name: ([A-Za-z0-9_\-\.]+)$")
+
+
+def make_site_packages(root, entries):
+    """每个分发包产生 5 个目录项：包目录、dist-info 目录、模块文件、扩展模块文件及 .pyi 文件。"""
+    host = os.path.join(root, "site-packages")
+    os.makedirs(host)
+    for i in range(entries // 5):
+        name = "pkg{}".format(i)
+        os.makedirs(os.path.join(host, name))
+        with open(os.path.join(host, name, "__init__.py"), "wt") as f:
+            f.write("")
+        info_dir = os.path.join(host, "{}-1.0.dist-info".format(name))
+        os.makedirs(info_dir)
+        with open(os.path.join(info_dir, "METADATA"), "wt") as f:
+            f.write("Metadata-Version: 2.1\nName: {}\nVersion: 1.0\n".format(name))
+        with open(os.path.join(info_dir, "top_level.txt"), "wt") as f:
+            f.write("{}\nmod{}\n".format(name, i))
+        for filename in ("mod{}.py", "_ext{}.cpython-311.so", "stub{}.pyi"):
+            with open(os.path.join(host, filename.format(i)), "wt") as f:
+                f.write("")
+    with open(os.path.join(host, "distutils-precedence.pth"), "wt") as f:
+        f.write("import os\n")
+    return host
+
+
+def legacy_scan(host):
+    """按旧实现的文件系统访问方式扫描单个目录(三遍遍历，每遍都对目录项调用 isfile/isdir)。"""
+    if not os.path.isdir(host):
+        return
+    names = os.listdir(host)
+    for fdname in names:
+        fdpath = os.path.join(host, fdname)
+        if os.path.isfile(fdpath) and fdname.lower().endswith(".pth"):
+            with open(fdpath, "rt", encoding="utf-8") as f:
+                f.readlines()
+    pkgsmods = dict()
+    for fdname in names:
+        fdpath = os.path.join(host, fdname)
+        if os.path.isdir(fdpath):
+            pkgsmods[fdname] = fdpath
+        elif os.path.isfile(fdpath) and fdname.lower().endswith(
+            (".py", ".pyc", ".pyd", "pyw")
+        ):
+            matched = _module_pattern.match(fdname)
+            if matched:
+                pkgsmods[matched.group(1)] = fdpath
+    for fdname in names:
+        dir_fullpath = os.path.join(host, fdname)
+        if not os.path.isdir(dir_fullpath):
+            continue
+        if fdname.endswith(".dist-info"):
+            info_file = "METADATA"
+        elif fdname.endswith(".egg-info"):
+            info_file = "PKG-INFO"
+        else:
+            continue
+        info_fullpath = os.path.join(dir_fullpath, info_file)
+        if not os.path.exists(info_fullpath):
+            continue
+        with open(info_fullpath, "rt", encoding="utf-8") as f:
+            for line in f.readlines()[1:]:
+                if _info_pkgname_pattern.match(line):
+                    break
+        toplevel_txt = os.path.join(dir_fullpath, "top_level.txt")
+        if os.path.exists(toplevel_txt):
+            with open(toplevel_txt, "rt", encoding="utf-8") as f:
+                f.readlines()
+
+
+class _CountingEntry:
+    """包装 os.DirEntry，统计其中可能产生系统调用的操作(POSIX 上 stat 及符号链接的类型判断)。"""
+
+    def __init__(self, entry, counts):
+        self.__entry = entry
+        self.__counts = counts
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_dir(self):
+        if self.__entry.is_symlink():
+            self.__counts["stat"] += 1
+        return self.__entry.is_dir()
+
+    def is_file(self):
+        if self.__entry.is_symlink():
+            self.__counts["stat"] += 1
+        return self.__entry.is_file()
+
+    def stat(self):
+        if os.name != "nt":
+            self.__counts["stat"] += 1
+        return self.__entry.stat()
+
+
+class _CountingScandir:
+    def __init__(self, iterator, counts):
+        self.__iterator = iterator
+        self.__counts = counts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.__iterator.close()
+
+    def __iter__(self):
+        for entry in self.__iterator:
+            yield _CountingEntry(entry, self.__counts)
+
+
+def counted(func, *args):
+    """执行 func 并统计 stat、listdir/scandir 及 open 调用次数。"""
+    counts = {"stat": 0, "list": 0, "open": 0}
+    originals = os.stat, os.listdir, os.scandir, builtins.open
+
+    def stat(*a, **k):
+        counts["stat"] += 1
+        return originals[0](*a, **k)
+
+    def listdir(*a, **k):
+        counts["list"] += 1
+        return originals[1](*a, **k)
+
+    def scandir(*a, **k):
+        counts["list"] += 1
+        return _CountingScandir(originals[2](*a, **k), counts)
+
+    def open_(*a, **k):
+        counts["open"] += 1
+        return originals[3](*a, **k)
+
+    os.stat, os.listdir, os.scandir, builtins.open = stat, listdir, scandir, open_
+    try:
+        func(*args)
+    finally:
+        os.stat, os.listdir, os.scandir, builtins.open = originals
+    return counts
+
+
+def timed(func, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name, counts, elapsed):
+    print(
+        "{:<30}{:>8} stat{:>6} 列目录{:>7} open{:>10.2f} ms".format(
+            name, counts["stat"], counts["list"], counts["open"], elapsed * 1000
+        )
+    )
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    root = tempfile.mkdtemp(prefix="fastpip-bench-")
+    try:
+        host = make_site_packages(root, entries)
+        # 同一目录的另一种写法，新的扫描器按 inode 识别后只扫描一次
+        sys_paths = [host, os.path.join(root, ".", "site-packages")]
+        print("合成的 site-packages 共 {} 个目录项：".format(len(os.listdir(host))))
+
+        def legacy():
+            for each_host in sys_paths:
+                legacy_scan(each_host)
+
+        def full_scan():
+            scanner = PackageMapScanner()
+            scanner.scan(sys_paths, False)
+
+        warm_scanner = PackageMapScanner()
+        warm_scanner.scan(sys_paths)
+
+        def incremental_scan():
+            warm_scanner.scan(sys_paths)
+
+        def build():
+            build_mapping(warm_scanner.hosts, warm_scanner.scans, ())
+
+        report("  listdir + isfile/isdir", counted(legacy), timed(legacy))
+        report("  PackageMapScanner(完整)", counted(full_scan), timed(full_scan))
+        report(
+            "  PackageMapScanner(增量)",
+            counted(incremental_scan),
+            timed(incremental_scan),
+        )
+        report("  build_mapping(生成映射表)", counted(build), timed(build))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# coding: utf-8
+
+# 比较串行扫描与不同线程数的并行扫描在页面缓存命中(热)及未命中(冷)时的耗时
+# 用法：python benchmark/bench_scan_parallel.py [--dir 目录] [--entries 目录项数] [--latency 毫秒]
+#
+# 冷缓存：Linux 上以 root 身份运行时每次扫描前写入 /proc/sys/vm/drop_caches 清空页面缓存，
+# 其他情况无法清空页面缓存，可以用 --dir 指定网络驱动器上的目录，或用 --latency 为每次文件系统调用增加延迟以模拟网络驱动器。
+
+import argparse
+import builtins
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# 适应某些编辑器、IDE 的模块查找路径问题
+sys.path = [os.path.dirname(sys.path[0])] + sys.path
+
+from bench_scan import make_site_packages
+from fastpip.utils.pkgmap import PackageMapScanner
+
+WORKER_COUNTS = (None, 2, 4, 8, 16)
+
+
+def drop_caches():
+    """清空页面缓存，成功返回 True。"""
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", "wt") as f:
+            f.write("3\n")
+    except Exception:
+        return False
+    return True
+
+
+class Latency:
+    """在 open、os.stat、os.scandir 调用前等待固定的时间，模拟高延迟的文件系统。"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.originals = builtins.open, os.stat, os.scandir
+
+    def wrap(self, func):
+        def wrapper(*args, **kwargs):
+            time.sleep(self.seconds)
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    def __enter__(self):
+        if self.seconds:
+            builtins.open, os.stat, os.scandir = map(self.wrap, self.originals)
+        return self
+
+    def __exit__(self, *exc_info):
+        builtins.open, os.stat, os.scandir = self.originals
+
+
+def bench(host, workers, cold, latency, repeat=3):
+    """返回多次扫描中最短的耗时，冷缓存时每次扫描前清空页面缓存，无法清空时返回 None。"""
+    best = float("inf")
+    for _ in range(repeat):
+        if cold and not drop_caches():
+            return None
+        with Latency(latency):
+            start = time.perf_counter()
+            PackageMapScanner().scan([host], False, workers)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dir", help="要扫描的现有目录，默认生成合成的 site-packages")
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--latency", type=float, default=0.0, help="毫秒")
+    args = parser.parse_args()
+    root = None
+    if args.dir:
+        host = args.dir
+    else:
+        root = tempfile.mkdtemp(prefix="fastpip-bench-")
+        host = make_site_packages(root, args.entries)
+    try:
+        serial = PackageMapScanner()
+        serial.scan([host])
+        print("{}：{} 个目录项".format(host, len(serial.scans[serial.hosts[0]].kinds)))
+        for workers in WORKER_COUNTS:
+            parallel = PackageMapScanner()
+            parallel.scan([host], workers=workers)
+            assert parallel.dump() == serial.dump(), "并行扫描结果与串行扫描不同"
+        for cold in (False, True):
+            print("冷缓存：" if cold else "热缓存：")
+            for workers in WORKER_COUNTS:
+                elapsed = bench(host, workers, cold, args.latency / 1000)
+                if elapsed is None:
+                    print("  无法清空页面缓存(需要 Linux 及 root 权限)，跳过")
+                    break
+                print(
+                    "  {:<12}{:>10.2f} ms".format(
+                        "串行" if workers is None else "{} 线程".format(workers),
+                        elapsed * 1000,
+                    )
+                )
+    finally:
+        if root is not None:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -23,17 +23,29 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE."""
 
 __all__ = [
+    "AsyncCommandStream",
+    "AsyncPyEnv",
     "AUTHOR",
     "all_py_paths",
     "Command",
+    "CommandStream",
     "cur_py_path",
     "decode_bytes",
+    "EnvFleet",
     "execute_commands",
+    "FleetResult",
+    "InterpreterCatalog",
+    "iter_py_paths",
     "LICENSE",
     "NAME",
     "PipInformation",
+    "ProgressEvent",
+    "ProgressParser",
     "PyEnv",
+    "PyWorker",
     "parse_package_names",
+    "stream_commands",
+    "SyncPlan",
     "VERNUM",
     "VERSION",
     "WEBSITE",
@@ -43,11 +55,19 @@ __all__ = [
 from .__version__ import *
 from .com.common import decode_bytes
 from .core.fastpip import (
+    CommandStream,
     PipInformation,
     PyEnv,
+    SyncPlan,
     execute_commands,
     index_urls,
     parse_package_names,
+    stream_commands,
 )
+from .core.aio import AsyncCommandStream, AsyncPyEnv
+from .core.catalog import InterpreterCatalog
+from .core.fleet import EnvFleet, FleetResult
+from .core.progress import ProgressEvent, ProgressParser
+from .core.worker import PyWorker
 from .utils.cmdutil import Command
-from .utils.findpath import all_py_paths, cur_py_path
+from .utils.findpath import all_py_paths, cur_py_path, iter_py_paths
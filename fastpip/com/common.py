@@ -1,21 +1,28 @@
 # coding: utf-8
 
+import codecs
+import os
+import subprocess
 from enum import Enum
 from locale import getpreferredencoding
 from os import path
 from sys import getdefaultencoding
+from typing import Dict, Optional, Tuple
 
 from chardet import detect
 
 __all__ = [
+    "CHILD_ENCODING",
     "CmdRead",
     "CONDA_ENVS",
     "DEFAULT_REQNAME",
     "decode_bytes",
     "EMPTY_STR",
+    "HIDDEN_STARTUPINFO",
     "LIB_DIR_NAME",
     "M_CONDA_EXE",
     "PKG_SEPDOT",
+    "PROBE_CODE",
     "PYTHON_SCR",
     "PYTHON_EXE",
     "PIP_INIT",
@@ -23,6 +30,8 @@ __all__ = [
     "PYENV_SEP_STR",
     "P_CONDA_EXE",
     "SITEPKG_NAME",
+    "stat_fingerprint",
+    "StreamDecoder",
     "UNKNOWN_LOCATION",
     "VENV_CFG",
 ]
@@ -35,16 +44,29 @@ SITEPKG_NAME: str = "site-packages"  # 第三方包的安装位置文件夹名
 DEFAULT_REQNAME: str = "requirements.txt"  # 导出环境已安装的包信息时的默认文件名
 PKG_SEPDOT: str = "."  # 导入语句所使用的导入路径分隔符
 VENV_CFG: str = "pyvenv.cfg"  # venv 创建的虚拟环境的配置文件
-PYTHON_SCR: str = "Scripts"  # WIN 平台上 Python 的 Scripts 目录
-PYTHON_EXE: str = "python.exe"  # WIN 平台上 Python 的解释器名称
+if os.name == "nt":
+    PYTHON_SCR: str = "Scripts"  # WIN 平台上 Python 的 Scripts 目录
+    PYTHON_EXE: str = "python.exe"  # WIN 平台上 Python 的解释器名称
+    PIP_EXE: str = "pip.exe"  # pip 模块的可执行文件名称
+else:
+    PYTHON_SCR: str = "bin"  # 其他平台上虚拟环境的可执行文件目录
+    PYTHON_EXE: str = "python"  # 其他平台上 Python 的解释器名称
+    PIP_EXE: str = "pip"  # pip 模块的可执行文件名称
 PIP_INIT: str = path.join("pip", "__init__.py")  # pip 目录及 init 文件名
-PIP_EXE: str = "pip.exe"  # pip 模块的可执行文件名称
 EMPTY_STR: str = ""  # 空字符串
 UNKNOWN_LOCATION: str = "unknown location"  # Python 环境位置未知时的显示名
 PYENV_SEP_STR: str = "@"  # PyEnv 类实例的字符串形式中 Python 版本号与位置之间的分隔符
 CONDA_ENVS: str = "envs"  # Anaconda 的虚拟环境目录名
 M_CONDA_EXE: str = "conda.exe"  # conda 的可执行文件名
 P_CONDA_EXE: str = "_conda.exe"  # conda 的可执行文件名
+CHILD_ENCODING: str = "utf-8"  # 通过 PYTHONIOENCODING 强制子进程使用的输出编码
+
+# 隐藏子进程控制台窗口的 STARTUPINFO，只在 Windows 上创建，其他系统上 Popen 不接受 startupinfo 参数
+HIDDEN_STARTUPINFO = None
+if os.name == "nt":
+    HIDDEN_STARTUPINFO = subprocess.STARTUPINFO()
+    HIDDEN_STARTUPINFO.dwFlags = subprocess.STARTF_USESHOWWINDOW
+    HIDDEN_STARTUPINFO.wShowWindow = subprocess.SW_HIDE
 
 
 def decode_bytes(__bytes: bytes):
@@ -58,7 +80,7 @@ def decode_bytes(__bytes: bytes):
         return __bytes.decode(__lpc)
     except UnicodeDecodeError as exc:
         string = f"{string}\t{exc.reason}\n"
-    encoding = detect(__bytes)
+    encoding = detect(__bytes)["encoding"]
     if encoding is None:
         return string
     try:
@@ -68,24 +90,172 @@ def decode_bytes(__bytes: bytes):
     return string
 
 
+def _detect_encoding(__bytes: bytes) -> str:
+    """### 确定无法按 UTF-8 解码的输出所用的编码：先尝试本地首选编码，失败后再使用 chardet 检测。"""
+    try:
+        __bytes.decode(__lpc)
+        return __lpc
+    except UnicodeDecodeError:
+        pass
+    encoding = detect(__bytes)["encoding"]
+    try:
+        return codecs.lookup(encoding).name
+    except (LookupError, TypeError):
+        return __lpc
+
+
+class StreamDecoder:
+    """
+    ### 子进程输出的增量解码器。
+
+    Command.environment 通过 PYTHONIOENCODING 强制子进程中的 Python 以 UTF-8 输出，所以优先以增量方式按 UTF-8 解码，
+
+    被分割在两段数据之间的多字节字符也能正确解码；只有出现无法按 UTF-8 解码的数据(例如编译器等非 Python 程序按控制台代码页输出)时，
+
+    才确定备用编码并按 key(通常是解释器路径)缓存，同一个解释器最多只检测一次，不再逐行调用 chardet。
+    """
+
+    # {key: 备用编码}，所有实例共享
+    __fallbacks: Dict[str, str] = dict()
+
+    def __init__(self, key: str = EMPTY_STR):
+        """
+        ```
+        :param key: str, 缓存备用编码所用的键，通常是解释器路径。
+        ```
+        """
+        self.__key = key
+        self.__pending = b""
+
+    def decode(self, data: bytes, final: bool = False) -> str:
+        """
+        ### 解码一段数据，末尾不完整的多字节字符会被保留到下一次调用。
+
+        ```
+        :param data: bytes, 子进程的一段输出。
+
+        :param final: bool, 是否为最后一段数据。
+
+        :return: str, 解码后的字符串，无法解码的字节以替换字符表示。
+        ```
+        """
+        if self.__pending:
+            data, self.__pending = self.__pending + data, b""
+        try:
+            return data.decode(CHILD_ENCODING)
+        except UnicodeDecodeError as exc:
+            # 末尾是被截断的多字节字符(最多 3 个字节)，留待与下一段数据合并
+            if (
+                not final
+                and exc.end == len(data)
+                and len(data) - exc.start < 4
+                and exc.reason == "unexpected end of data"
+            ):
+                self.__pending = data[exc.start :]
+                return data[: exc.start].decode(CHILD_ENCODING)
+        encoding = self.__fallbacks.get(self.__key)
+        if encoding is None:
+            encoding = self.__fallbacks[self.__key] = _detect_encoding(data)
+        return data.decode(encoding, "replace")
+
+    @classmethod
+    def fallback_encoding(cls, key: str) -> Optional[str]:
+        """### 获取 key 对应的已缓存的备用编码，尚未检测过则返回 None。"""
+        return cls.__fallbacks.get(key)
+
+
+def stat_fingerprint(
+    *paths: str,
+) -> Tuple[Tuple[str, Optional[int], Optional[int]], ...]:
+    """
+    ### 获取若干文件或目录的状态指纹，用于判断其是否发生变化。
+
+    每个路径对应一个 (路径, 大小, 修改时间纳秒) 元组，路径不存在或无法访问时大小与修改时间为 None。
+    """
+    fingerprint = list()
+    for _path in paths:
+        try:
+            stat = os.stat(_path)
+        except Exception:
+            fingerprint.append((_path, None, None))
+            continue
+        fingerprint.append((_path, stat.st_size, stat.st_mtime_ns))
+    return tuple(fingerprint)
+
+
+# 目标环境探测脚本，单次启动解释器即可获取 PyEnv 所需的全部环境信息并以 JSON 格式输出
+# 脚本需兼容较旧的 Python 3 版本，所以不使用 f-string 等新语法
+PROBE_CODE = """
+import json, os, platform, site, struct, sys, sysconfig
+
+def _fmt_version(info):
+    version = "%d.%d.%d" % tuple(info[:3])
+    if info[3] != "final":
+        version += info[3][0] + str(info[4])
+    return version
+
+def _probe():
+    impl = getattr(sys, "implementation", None)
+    info = {
+        "version": "%d.%d.%d" % tuple(sys.version_info[:3]),
+        "sys_version": sys.version,
+        "bits": struct.calcsize("P") * 8,
+        "executable": sys.executable,
+        "prefix": sys.prefix,
+        "base_prefix": getattr(sys, "base_prefix", sys.prefix),
+        "sys_path": sys.path[1:],
+        "builtins": list(sys.builtin_module_names),
+        "stdlib_names": sorted(getattr(sys, "stdlib_module_names", ())),
+        "stdlib_dirs": [],
+        "sites": [],
+        "user_site": "",
+        "platform": sysconfig.get_platform(),
+        "soabi": sysconfig.get_config_var("SOABI") or "",
+        "cache_tag": getattr(impl, "cache_tag", "") or "",
+        "markers": {
+            "implementation_name": getattr(impl, "name", "cpython"),
+            "implementation_version": _fmt_version(impl.version) if impl else "0",
+            "os_name": os.name,
+            "platform_machine": platform.machine(),
+            "platform_python_implementation": platform.python_implementation(),
+            "platform_release": platform.release(),
+            "platform_system": platform.system(),
+            "platform_version": platform.version(),
+            "python_full_version": platform.python_version(),
+            "python_version": ".".join(platform.python_version_tuple()[:2]),
+            "sys_platform": sys.platform,
+        },
+        "pip_version": "",
+        "pip_path": "",
+    }
+    try:
+        paths = sysconfig.get_paths()
+        dirs = [paths["stdlib"], paths["platstdlib"]]
+        dirs.append(os.path.join(info["base_prefix"], "DLLs"))
+        info["stdlib_dirs"] = sorted(set(d for d in dirs if os.path.isdir(d)))
+    except Exception:
+        pass
+    try:
+        info["sites"] = site.getsitepackages()
+    except Exception:
+        pass
+    try:
+        info["user_site"] = site.getusersitepackages()
+    except Exception:
+        pass
+    try:
+        import pip
+        info["pip_version"] = pip.__version__
+        info["pip_path"] = os.path.dirname(pip.__file__)
+    except Exception:
+        pass
+    return info
+"""
+
+
 class CmdRead(Enum):
-    # 读取目标 Python 解释器的版本信息
-    PYVERS = (
-        "-c",
-        "import sys;print(sys.version)",
-    )
-    # 读取 sys.path 和 builtin_module_names 信息
-    SYSINFO = (
-        "-c",
-        "import sys;print(sys.path[1:]);print(sys.builtin_module_names)",
-    )
-    # 读取目标 Python 环境的 site-packaes 路径
-    SITES = (
-        "-c",
-        "import site;print(site.getsitepackages())",
-    )
-    # 读取目标 Python 环境的用户 site-packaes 路径
-    USERSITE = (
+    # 一次性读取目标 Python 环境的版本、位数、sys.path、内置模块名、site 目录、平台标签及 pip 版本
+    PROBE = (
         "-c",
-        "import site;print(site.getusersitepackages())",
+        PROBE_CODE + "print(json.dumps(_probe()))",
     )
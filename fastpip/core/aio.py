@@ -0,0 +1,398 @@
+# coding: utf-8
+
+import asyncio
+import functools
+import os
+import time
+from copy import deepcopy
+from typing import *
+
+from ..com.common import *
+from ..utils.cmdutil import Command
+from .fastpip import PipInformation, PyEnv
+from .progress import ProgressEvent, ProgressParser
+
+__all__ = ["AsyncCommandStream", "AsyncPyEnv"]
+
+# 单行输出的长度上限，asyncio 默认的 64KiB 对于某些构建日志偏小
+_LINE_LIMIT = 1 << 20
+
+
+def _check_event_loop():
+    """### Windows 上只有 ProactorEventLoop 支持子进程，Python 3.7 默认的 SelectorEventLoop 不支持。"""
+    if os.name != "nt":
+        return
+    loop = asyncio.get_event_loop()
+    if not isinstance(loop, getattr(asyncio, "ProactorEventLoop", ())):
+        raise RuntimeError(
+            "当前事件循环不支持子进程，请使用 asyncio.ProactorEventLoop "
+            "(Python 3.7 中可通过 asyncio.set_event_loop_policy("
+            "asyncio.WindowsProactorEventLoopPolicy()) 设置)。"
+        )
+
+
+class AsyncCommandStream:
+    """
+    ### 基于 asyncio 子进程的命令输出流，使用 async for 逐行获取命令输出。
+
+    迭代结束后可通过 returncode 属性获取退出状态码，超时后子进程会被结束且 timed_out 属性为 True。
+
+    迭代过程中所在任务被取消时子进程同样会被结束。如果提前退出迭代，请调用 close 方法或使用 async with 语句以结束子进程。
+
+    Windows 上当前事件循环不是 ProactorEventLoop 时，开始迭代即抛出 RuntimeError 异常。
+    """
+
+    def __init__(
+        self,
+        cmds: Command,
+        timeout: Union[int, float, None] = None,
+        *,
+        dest: Optional[str] = None,
+    ):
+        """
+        ```
+        :param cmds: Command, 要执行的命令。
+
+        :param timeout: int or float or None, 命令执行的超时时长，单位为秒，None 表示无限制。
+
+        :param dest: str or None, 下载命令的保存目录，见 dest 属性。
+        ```
+        """
+        self.__cmds = cmds
+        self.__timeout = timeout
+        self.__process: Optional[asyncio.subprocess.Process] = None
+        self.__returncode: Optional[int] = None
+        self.__timed_out = False
+        self.__dest = dest
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def __aiter__(self):
+        return self.__lines()
+
+    async def events(self) -> AsyncIterator[ProgressEvent]:
+        """### 迭代命令输出并将其解析为 ProgressEvent，详见 CommandStream.events 方法。"""
+        parser = ProgressParser()
+        async for decoded_line in self:
+            for event in parser.feed(decoded_line):
+                yield event
+        success = not self.__timed_out and self.__returncode == 0
+        for event in parser.finish(success):
+            yield event
+
+    @property
+    def dest(self) -> Optional[str]:
+        """### 下载命令的保存目录(未指定 dest 参数时为自动生成的目录)，其他命令为 None。"""
+        return self.__dest
+
+    @property
+    def returncode(self) -> Optional[int]:
+        """### 命令的退出状态码，命令尚未结束时为 None。"""
+        return self.__returncode
+
+    @property
+    def timed_out(self) -> bool:
+        """### 命令是否因超时被结束。"""
+        return self.__timed_out
+
+    async def __lines(self):
+        if self.__process is not None:
+            raise RuntimeError("命令输出流只能迭代一次。")
+        _check_event_loop()
+        cmds = self.__cmds
+        self.__process = process = await asyncio.create_subprocess_exec(
+            *cmds,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            startupinfo=HIDDEN_STARTUPINFO,
+            cwd=os.path.dirname(cmds.executable),
+            env=cmds.environment(),
+            limit=_LINE_LIMIT,
+        )
+        decoder = StreamDecoder(cmds.executable)
+        deadline = None
+        if self.__timeout is not None:
+            deadline = time.monotonic() + self.__timeout
+        try:
+            while True:
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError
+                line_bytes = await asyncio.wait_for(
+                    process.stdout.readline(), remaining
+                )
+                if not line_bytes:
+                    rest = decoder.decode(b"", True)
+                    if rest:
+                        yield rest
+                    break
+                decoded_line = decoder.decode(line_bytes)
+                if decoded_line:
+                    yield decoded_line.replace("\r\n", "\n")
+            self.__returncode = await process.wait()
+        except asyncio.TimeoutError:
+            self.__timed_out = True
+        finally:
+            await self.close()
+
+    async def close(self):
+        """### 结束仍在运行的子进程。"""
+        process = self.__process
+        if process is None or process.returncode is not None:
+            return
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        self.__returncode = await process.wait()
+
+
+class AsyncPyEnv:
+    """
+    ### PyEnv 类的 asyncio 版本。
+
+    提供 install、uninstall、download、pkgs_info、pkg_names、outdated、freeze 及环境探测相关方法的协程版本，
+
+    参数及其校验规则与 PyEnv 类的同名方法一致，便于在一个事件循环中同时操作多个 Python 环境。
+
+    由于子进程由事件循环管理，注册到 PyEnv 类的回调函数不会被调用，请使用 stream_install 等方法逐行获取输出。
+
+    子进程需要事件循环支持：Windows 上须使用 ProactorEventLoop(Python 3.8 起为默认值)，
+
+    Python 3.7 默认的 SelectorEventLoop 不支持子进程，此时执行命令将抛出 RuntimeError 异常。
+    """
+
+    def __init__(self, path=None):
+        """
+        ### AsyncPyEnv 类初始化方法。
+
+        ```
+        :param path: str or None or PyEnv, Python 环境目录路径或已有的 PyEnv 实例，路径参数的含义与 PyEnv 类相同。
+        ```
+        """
+        self.__env = path if isinstance(path, PyEnv) else PyEnv(path)
+
+    def __str__(self):
+        return "Async{}".format(self.__env)
+
+    @property
+    def env(self) -> PyEnv:
+        """### 对应的同步 PyEnv 实例。"""
+        return self.__env
+
+    @staticmethod
+    async def __in_executor(func, *args, **kwargs):
+        """### 在默认线程池中执行会读取大量文件的同步函数，避免阻塞事件循环。"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(func, *args, **kwargs)
+        )
+
+    @staticmethod
+    def stream(cmds: Command, timeout: Union[int, float, None] = None):
+        """### 以异步输出流的方式执行命令，详见 AsyncCommandStream 类。"""
+        return AsyncCommandStream(cmds, timeout)
+
+    async def execute(
+        self,
+        cmds: Command,
+        output=False,
+        timeout: Union[int, float, None] = None,
+        progress: Optional[Callable[[ProgressEvent], Any]] = None,
+    ) -> Tuple[str, int]:
+        """
+        ### 执行命令，返回输出字符串和退出状态码，超时则退出状态码为 1。
+
+        与同步版本不同，output 参数为 True 时 timeout 参数同样生效；progress 回调函数在事件循环所在线程中被调用。
+        """
+        strings = list()
+        parser = ProgressParser() if progress is not None else None
+        async with self.stream(cmds, timeout) as stream:
+            async for line in stream:
+                strings.append(line)
+                if output:
+                    print(line, end="")
+                if parser is not None:
+                    for event in parser.feed(line):
+                        progress(event)
+        return_code = 1 if stream.timed_out else stream.returncode
+        if parser is not None:
+            for event in parser.finish(not return_code):
+                progress(event)
+        return "".join(strings), return_code
+
+    async def probe(self, fresh=False) -> Dict[str, Any]:
+        """### PyEnv.probe 方法的协程版本。"""
+        return deepcopy(await self.__probe(fresh))
+
+    async def __probe(self, fresh=False) -> Dict[str, Any]:
+        """### 缓存失效时异步启动探测脚本，之后同步方法即可直接使用缓存而不会阻塞事件循环。"""
+        interpreter = self.__env.interpreter
+        if not interpreter:
+            return dict()
+        info = self.__env._cached_probe_info(fresh)
+        if info is not None:
+            return info
+        result, retcode = await self.execute(
+            Command(interpreter, *CmdRead.PROBE.value), False, None
+        )
+        if retcode or not result:
+            return dict()
+        return self.__env._store_probe(interpreter, result)
+
+    async def py_info(self) -> str:
+        """### PyEnv.py_info 方法的协程版本。"""
+        await self.__probe()
+        return self.__env.py_info()
+
+    async def pip_info(self) -> Optional[PipInformation]:
+        """### PyEnv.pip_info 方法的协程版本。"""
+        await self.__probe()
+        return self.__env.pip_info()
+
+    async def site_packages_home(self) -> str:
+        """### PyEnv.site_packages_home 方法的协程版本。"""
+        await self.__probe()
+        return self.__env.site_packages_home()
+
+    async def user_site_packages_home(self) -> str:
+        """### PyEnv.user_site_packages_home 方法的协程版本。"""
+        await self.__probe()
+        return self.__env.user_site_packages_home()
+
+    async def pkgs_info(self, *, output=False, timeout=None, fast=False):
+        """### PyEnv.pkgs_info 方法的协程版本，output 参数为 True 时 timeout 参数同样生效。"""
+        await self.__probe()
+        if not self.__env.pip_ready:
+            return []
+        PyEnv._check_timeout_num(timeout)
+        if fast:
+            # 读取全部元数据文件的耗时与包的数量成正比，不应阻塞事件循环
+            return await self.__in_executor(self.__env.pkgs_info, fast=True)
+        result, retcode = await self.execute(
+            self.__env._list_command(), output, timeout
+        )
+        if retcode or not result:
+            return []
+        return PyEnv._parse_pkgs_info(result)
+
+    async def pkg_names(self, *, output=False, timeout=None, fast=False):
+        """### PyEnv.pkg_names 方法的协程版本，output 参数为 True 时 timeout 参数同样生效。"""
+        pkgs = await self.pkgs_info(output=output, timeout=timeout, fast=fast)
+        return [n for n, _ in pkgs]
+
+    async def outdated(self, *, output=False, timeout=60):
+        """### PyEnv.outdated 方法的协程版本，output 参数为 True 时 timeout 参数同样生效。"""
+        await self.__probe()
+        if not self.__env.pip_ready:
+            return []
+        PyEnv._check_timeout_num(timeout)
+        cmds = self.__env._outdated_command()
+        result, retcode = await self.execute(cmds, output, timeout)
+        if retcode or not result:
+            return []
+        return PyEnv._parse_outdated(result)
+
+    async def stream_install(self, *names, **kwargs) -> Optional[AsyncCommandStream]:
+        """
+        ### 校验参数后返回安装命令的异步输出流，pip 不可用或未提供包名时返回 None。
+
+        参数与 install 方法相同，但 output 参数无效。
+        """
+        await self.__probe()
+        cmds = self.__env._install_command(*names, **kwargs)
+        if cmds is None:
+            return None
+        return self.stream(cmds, kwargs.get("timeout", None))
+
+    async def install(self, *names, **kwargs):
+        """### PyEnv.install 方法的协程版本，output 参数为 True 时 timeout 参数同样生效。"""
+        progress = PyEnv._progress_callback(kwargs)
+        await self.__probe()
+        cmds = self.__env._install_command(*names, **kwargs)
+        if cmds is None:
+            return tuple()
+        pending = await self.__in_executor(
+            self.__env._requirements_to_install, names, kwargs
+        )
+        if not pending:
+            return names, True
+        if pending != names:
+            cmds = self.__env._install_command(*pending, **kwargs)
+        output, timeout = kwargs.get("output", False), kwargs.get("timeout", None)
+        succeeded = not (await self.execute(cmds, output, timeout, progress))[1]
+        self.__env._packages_changed()
+        return names, succeeded
+
+    async def stream_uninstall(self, *names, **kwargs) -> Optional[AsyncCommandStream]:
+        """
+        ### 校验参数后返回卸载命令的异步输出流，pip 不可用或未提供包名时返回 None。
+
+        参数与 uninstall 方法相同，但 output 参数无效。
+        """
+        await self.__probe()
+        cmds = self.__env._uninstall_command(*names, **kwargs)
+        if cmds is None:
+            return None
+        return self.stream(cmds, kwargs.get("timeout", None))
+
+    async def uninstall(self, *names, **kwargs):
+        """### PyEnv.uninstall 方法的协程版本，output 参数为 True 时 timeout 参数同样生效。"""
+        await self.__probe()
+        cmds = self.__env._uninstall_command(*names, **kwargs)
+        if cmds is None:
+            return tuple()
+        output, timeout = kwargs.get("output", False), kwargs.get("timeout", None)
+        succeeded = not (await self.execute(cmds, output, timeout))[1]
+        self.__env._packages_changed()
+        return names, succeeded
+
+    async def stream_download(self, *names, **kwargs) -> Optional[AsyncCommandStream]:
+        """
+        ### 校验参数后返回下载命令的异步输出流，pip 不可用或未提供包名时返回 None。
+
+        参数与 download 方法相同，但 output 参数无效，实际使用的保存目录可通过输出流的 dest 属性获取。
+        """
+        await self.__probe()
+        cmds_dest = self.__env._download_command(*names, **kwargs)
+        if cmds_dest is None:
+            return None
+        cmds, dest = cmds_dest
+        return AsyncCommandStream(cmds, kwargs.get("timeout", None), dest=dest)
+
+    async def download(self, *names, **kwargs):
+        """### PyEnv.download 方法的协程版本，output 参数为 True 时 timeout 参数同样生效。"""
+        progress = PyEnv._progress_callback(kwargs)
+        await self.__probe()
+        cmds_dest = self.__env._download_command(*names, **kwargs)
+        if cmds_dest is None:
+            return tuple()
+        cmds, dest = cmds_dest
+        output, timeout = kwargs.get("output", False), kwargs.get("timeout", None)
+        succeeded = not (await self.execute(cmds, output, timeout, progress))[1]
+        return (succeeded, dest) if succeeded else (succeeded, EMPTY_STR)
+
+    async def freeze(
+        self,
+        dir_path: str,
+        file_name: str = None,
+        no_path: bool = False,
+        user: bool = False,
+        all_pkg: bool = False,
+    ):
+        """### PyEnv.freeze 方法的协程版本。"""
+        await self.__probe()
+        cmds_path = self.__env._freeze_command(dir_path, file_name, user, all_pkg)
+        if cmds_path is None:
+            return False
+        command, file_fullpath = cmds_path
+        string, result = await self.execute(command, False, None)
+        if result:
+            return False
+        return self.__env._save_freezed(string, file_fullpath, no_path)
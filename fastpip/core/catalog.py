@@ -0,0 +1,312 @@
+# coding: utf-8
+
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import *
+
+from ..com.common import *
+from ..utils.diskcache import default_cache_dir
+from ..utils.findpath import crawl_roots, discovery_tasks, path_key
+from .fastpip import PyEnv
+
+__all__ = ["InterpreterCatalog"]
+
+# 目录文件格式版本
+_FORMAT = 1
+# 默认目录文件名，位于 default_cache_dir 函数返回的目录中
+_CATALOG_NAME = "interpreters.json"
+# 环境类型
+_KIND_CONDA = "conda"
+_KIND_VENV = "venv"
+_KIND_SYSTEM = "system"
+
+
+def _env_kind(env_path: str) -> str:
+    """### 判断环境类型：conda(含有 conda-meta 目录或 _conda.exe)、venv(含有 pyvenv.cfg)或 system。"""
+    root = env_path
+    if os.path.basename(root).lower() in ("bin", PYTHON_SCR.lower()):
+        root = os.path.dirname(root)
+    if os.path.isdir(os.path.join(root, "conda-meta")) or os.path.isfile(
+        os.path.join(root, P_CONDA_EXE)
+    ):
+        return _KIND_CONDA
+    if os.path.isfile(os.path.join(root, VENV_CFG)):
+        return _KIND_VENV
+    return _KIND_SYSTEM
+
+
+def _fingerprint_of(entry: Dict[str, Any]):
+    return tuple(tuple(i) for i in entry["fingerprint"])
+
+
+class InterpreterCatalog:
+    """
+    ### 本机 Python 解释器目录，保存到磁盘供之后的进程使用。
+
+    每个条目记录环境目录路径(path)、解释器路径(interpreter)、Python 版本(version)、位数(bits)、
+
+    pip 版本(pip_version)、环境类型(kind，'conda'、'venv' 或 'system')及解释器和 pip 的状态指纹(fingerprint)。
+
+    刷新时各探测位置(见 findpath.iter_py_paths 函数)只有在上次探测时列出过的目录的修改时间发生变化时才重新探测，
+
+    已有条目只有在状态指纹变化时才重新启动解释器读取信息，所以没有变化时刷新只需若干次 stat 调用。
+
+    读取信息使用 PyEnv.probe 方法，如果启用了 PyEnv 的磁盘缓存(见 PyEnv.enable_disk_cache 方法)，
+
+    之后为这些环境创建的 PyEnv 实例也无需再次启动解释器。
+    """
+
+    def __init__(
+        self,
+        catalog_file: Optional[str] = None,
+        *,
+        timeout: Union[int, float, None] = 5.0,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        ### InterpreterCatalog 类初始化方法，初始化时不读取目录文件。
+
+        ```
+        :param catalog_file: str or None, 目录文件路径，None 表示使用 default_cache_dir 函数返回的目录中的 interpreters.json 文件。
+
+        :param timeout: int or float or None, 每个探测位置的超时秒数，超时的位置沿用上次的结果，None 表示不限时。
+
+        :param max_workers: int or None, 同时读取解释器信息的最大线程数，None 表示由 concurrent.futures 决定。
+        ```
+
+        `catalog_file 既不是 str 也不是 None 则抛出 TypeError 异常；`
+
+        `max_workers 不是 None 或正整数则抛出 ValueError 异常。`
+        """
+        if catalog_file is None:
+            catalog_file = os.path.join(default_cache_dir(), _CATALOG_NAME)
+        if not isinstance(catalog_file, str):
+            raise TypeError("参数 catalog_file 值应为 None 或字符串。")
+        if max_workers is not None and (
+            not isinstance(max_workers, int) or max_workers < 1
+        ):
+            raise ValueError("参数 max_workers 的值应为 None 或正整数。")
+        self.__catalog_file = os.path.abspath(catalog_file)
+        self.__timeout = timeout
+        self.__max_workers = max_workers
+        self.__lock = threading.RLock()
+        self.__loaded = False
+        # {探测位置的键: {"root": 目录, "level": 搜索深度, "dirs": {列出的目录: 修改时间}, "found": [环境目录]}}
+        self.__roots: Dict[str, Dict[str, Any]] = dict()
+        # {环境目录的键: 条目}，按探测顺序排列
+        self.__entries: Dict[str, Dict[str, Any]] = dict()
+        self.__stats = {"crawled": 0, "reused": 0, "probed": 0}
+        # 最近一次读取或写入的目录文件内容，内容没有变化时不重复写入
+        self.__saved = EMPTY_STR
+
+    def __str__(self):
+        return "InterpreterCatalog({})".format(self.__catalog_file)
+
+    __repr__ = __str__
+
+    @property
+    def catalog_file(self) -> str:
+        """### 目录文件路径。"""
+        return self.__catalog_file
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """### 上次刷新时重新探测的位置数(crawled)、沿用的条目数(reused)及重新读取信息的环境数(probed)。"""
+        return self.__stats.copy()
+
+    def __load(self):
+        self.__loaded = True
+        try:
+            with open(self.__catalog_file, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("format") != _FORMAT:
+                return
+            roots, entries = data["roots"], data["entries"]
+            entries = {path_key(e["path"]): e for e in entries}
+        except Exception:
+            return
+        self.__roots, self.__entries = roots, entries
+        self.__saved = self.__serialize()
+
+    def __serialize(self) -> str:
+        data = {
+            "format": _FORMAT,
+            "roots": self.__roots,
+            "entries": list(self.__entries.values()),
+        }
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    def save(self) -> bool:
+        """### 以原子替换的方式写入目录文件，内容与目录文件相同时不写入，返回是否写入成功。"""
+        with self.__lock:
+            text = self.__serialize()
+            if text == self.__saved:
+                return True
+            self.__saved = text
+        directory = os.path.dirname(self.__catalog_file)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(".tmp", "fastpip-", dir=directory)
+        except Exception:
+            return False
+        try:
+            with open(fd, "wt", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(temp_path, self.__catalog_file)
+        except Exception:
+            try:
+                os.remove(temp_path)
+            except Exception:
+                pass
+            self.__saved = EMPTY_STR
+            return False
+        return True
+
+    def clear(self):
+        """### 清空内存中的目录并删除目录文件。"""
+        with self.__lock:
+            self.__roots, self.__entries = dict(), dict()
+            self.__loaded = True
+            self.__saved = EMPTY_STR
+            try:
+                os.remove(self.__catalog_file)
+            except Exception:
+                pass
+
+    @staticmethod
+    def __unchanged(dirs: Dict[str, Optional[int]]) -> bool:
+        """### 上次探测时列出的各目录的修改时间(或不存在的状态)是否都未变化。"""
+        for dir_path, mtime in dirs.items():
+            try:
+                current = os.stat(dir_path).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime:
+                return False
+        return True
+
+    @staticmethod
+    def __probe(path: str) -> Optional[Dict[str, Any]]:
+        """### 通过 PyEnv.probe 方法读取环境信息并生成条目，不是有效的环境时返回 None。"""
+        env = PyEnv(path)
+        interpreter = env.interpreter
+        if not interpreter:
+            return None
+        info = env.probe()
+        if not info:
+            return None
+        watched = [interpreter]
+        if info.get("pip_path"):
+            watched.append(os.path.join(info["pip_path"], "__init__.py"))
+        else:
+            # 尚未安装 pip 时监视其将被安装到的位置，之后安装了 pip 的环境会被重新读取信息
+            watched.extend(
+                os.path.join(site, "pip", "__init__.py") for site in info["sites"]
+            )
+        return {
+            "path": path,
+            "interpreter": interpreter,
+            "version": info.get("version", EMPTY_STR),
+            "bits": info.get("bits", 0),
+            "pip_version": info.get("pip_version", EMPTY_STR),
+            "kind": _env_kind(env.env_path),
+            "fingerprint": stat_fingerprint(*watched),
+        }
+
+    def __crawl(self, full: bool) -> List[str]:
+        """### 重新探测发生变化的位置，返回按探测顺序排列的全部环境目录路径(不重复)。"""
+        roots: Dict[str, Tuple[str, str]] = dict()
+        for task in discovery_tasks():
+            for root, level in task:
+                roots.setdefault("{}|{}".format(level, path_key(root)), (root, level))
+        stale = [
+            key
+            for key, record in ((k, self.__roots.get(k)) for k in roots)
+            if full or record is None or not self.__unchanged(record["dirs"])
+        ]
+        crawled = crawl_roots([roots[k] for k in stale], self.__timeout)
+        for key, result in zip(stale, crawled):
+            # 超时的位置不更新记录，下次刷新时再次探测
+            if result is None:
+                continue
+            root, level = roots[key]
+            found, visited = result
+            self.__roots[key] = {
+                "root": root,
+                "level": level,
+                "dirs": visited,
+                "found": found,
+            }
+        self.__stats["crawled"] = len(stale)
+        # 不再需要探测的位置(如 PATH 中被移除的目录)的记录被丢弃
+        self.__roots = {k: self.__roots[k] for k in roots if k in self.__roots}
+        paths: Dict[str, str] = dict()
+        for record in self.__roots.values():
+            for path in record["found"]:
+                paths.setdefault(path_key(path), path)
+        return list(paths.values())
+
+    def refresh(self, full=False) -> List[Dict[str, Any]]:
+        """
+        ### 刷新目录并写入目录文件，返回全部条目。
+
+        ```
+        :param full: bool, 是否忽略已记录的目录修改时间及状态指纹，重新探测所有位置并读取所有环境的信息。
+
+        :return: list[dict[str, Any]], 条目列表(副本)，按 PATH 中的目录在前、常用安装位置在后的顺序排列。
+        ```
+        """
+        with self.__lock:
+            if not self.__loaded:
+                self.__load()
+            paths = self.__crawl(full)
+            entries: Dict[str, Dict[str, Any]] = dict()
+            to_probe: List[str] = list()
+            for path in paths:
+                key = path_key(path)
+                entry = self.__entries.get(key)
+                if entry is None or full:
+                    to_probe.append(path)
+                    continue
+                fingerprint = _fingerprint_of(entry)
+                if fingerprint != stat_fingerprint(*(f[0] for f in fingerprint)):
+                    to_probe.append(path)
+                    continue
+                entries[key] = entry
+            self.__stats["reused"] = len(entries)
+            self.__stats["probed"] = len(to_probe)
+            if to_probe:
+                with ThreadPoolExecutor(self.__max_workers) as executor:
+                    for path, entry in zip(
+                        to_probe, executor.map(self.__probe, to_probe)
+                    ):
+                        if entry is not None:
+                            entries[path_key(path)] = entry
+            self.__entries = {
+                path_key(p): entries[path_key(p)]
+                for p in paths
+                if path_key(p) in entries
+            }
+            self.save()
+            return self.entries()
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """### 返回目录中的全部条目(副本)而不刷新，尚未读取目录文件时先读取。"""
+        with self.__lock:
+            if not self.__loaded:
+                self.__load()
+            return json.loads(json.dumps(list(self.__entries.values())))
+
+    def paths(self, refresh=True) -> List[str]:
+        """
+        ### 返回目录中全部环境的目录路径，可以直接用于创建 PyEnv 或 EnvFleet 实例。
+
+        ```
+        :param refresh: bool, 是否先刷新目录。
+        ```
+        """
+        entries = self.refresh() if refresh else self.entries()
+        return [e["path"] for e in entries]
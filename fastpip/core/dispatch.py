@@ -0,0 +1,210 @@
+# coding: utf-8
+
+import threading
+import time
+from collections import OrderedDict, deque
+from queue import Empty, Queue
+from random import randint
+from typing import *
+
+__all__ = ["CallbackDispatcher", "CallbackRegistry"]
+
+# 待分发的输出批次队列的容量，队列满时读取线程将输出暂存在本地批次中而不会阻塞
+_QUEUE_SIZE = 256
+# 队列满时本地批次最多暂存的行数，超出时丢弃最早的行并在批次开头以一行提示说明丢弃的行数
+_PENDING_LIMIT = 4096
+
+
+def _check_max_rate(max_rate):
+    """
+    ### 检查每秒最大分发次数参数。
+
+    `max_rate 既不是 None 也不是数字则抛出 TypeError 异常，不是正数则抛出 ValueError 异常。`
+    """
+    if max_rate is None:
+        return
+    if isinstance(max_rate, bool) or not isinstance(max_rate, (int, float)):
+        raise TypeError("参数 max_rate 值应为 None、整数或浮点数。")
+    if max_rate <= 0:
+        raise ValueError("参数 max_rate 的值应为正数。")
+
+
+class CallbackRegistry:
+    """
+    ### 线程安全的回调函数注册表。
+
+    每个回调函数对应一个标识符及每秒最大分发次数，分发时使用 snapshot 方法取得的副本，不受其他线程同时增删的影响。
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        # {标识符: (回调函数, 每秒最大分发次数)}
+        self.__callbacks: Dict[str, Tuple[Callable, Any]] = OrderedDict()
+
+    def __bool__(self):
+        return bool(self.__callbacks)
+
+    def __len__(self):
+        return len(self.__callbacks)
+
+    def add(self, callback: Callable[[str], Any], max_rate=None) -> Optional[str]:
+        """
+        ### 添加回调函数，返回其标识符，callback 不可调用则返回 None。
+
+        `max_rate 参数无效则抛出 TypeError 或 ValueError 异常。`
+        """
+        if not isinstance(callback, Callable):
+            return None
+        _check_max_rate(max_rate)
+        with self.__lock:
+            while True:
+                handle = str(randint(0x10000000, 0xFFFFFFFF))
+                if handle not in self.__callbacks:
+                    break
+            self.__callbacks[handle] = (callback, max_rate)
+        return handle
+
+    def remove(self, handle: str) -> bool:
+        """### 移除标识符为 handle 的回调函数，成功返回 True，标识符不存在返回 False。"""
+        with self.__lock:
+            return self.__callbacks.pop(handle, None) is not None
+
+    def clear(self):
+        """### 移除全部回调函数。"""
+        with self.__lock:
+            self.__callbacks.clear()
+
+    def snapshot(self) -> List[Tuple[Callable[[str], Any], Optional[float]]]:
+        """### 按注册顺序返回 (回调函数, 每秒最大分发次数) 列表的副本。"""
+        with self.__lock:
+            return list(self.__callbacks.values())
+
+
+class _Subscriber:
+    """### 分发线程中单个回调函数的状态。"""
+
+    def __init__(self, callback, max_rate):
+        self.callback = callback
+        self.interval = 1 / max_rate if max_rate else 0
+        self.buffer: List[str] = list()
+        self.last_delivery = 0.0
+
+    def due_time(self) -> Optional[float]:
+        if not self.buffer:
+            return None
+        return self.last_delivery + self.interval
+
+    def deliver(self, now: float):
+        string = "\n".join(self.buffer)
+        self.buffer.clear()
+        self.last_delivery = now
+        self.callback(string)
+
+
+class CallbackDispatcher:
+    """
+    ### 在专门的线程中向回调函数分发命令输出。
+
+    读取命令输出的线程只需调用 put 方法，无论回调函数执行得多慢都不会阻塞，所以 pip 的输出管道总能及时被读取。
+
+    输出以批次为单位放入有界队列，队列已满时读取线程把输出暂存在本地批次中，待队列有空位时一并放入。
+
+    本地批次最多暂存 4096 行，回调函数长时间阻塞导致超出时丢弃最早的行，并在该批次开头插入一行 "[已丢弃 N 行输出]" 提示。
+
+    未设置每秒最大分发次数的回调函数逐行接收输出；设置了的回调函数接收以换行符连接的多行输出，
+
+    且两次调用的间隔不小于 1/max_rate 秒，适用于刷新频率有限的界面。
+
+    回调函数抛出的首个异常会在 close 方法中重新抛出，出错的回调函数之后不再被调用。
+    """
+
+    def __init__(self, callbacks: Iterable[Tuple[Callable[[str], Any], Any]]):
+        """
+        ```
+        :param callbacks: Iterable[tuple], (回调函数, 每秒最大分发次数或 None) 列表，通常是 CallbackRegistry.snapshot 方法的返回值。
+        ```
+        """
+        self.__subscribers = [_Subscriber(c, r) for c, r in callbacks]
+        self.__batches: Queue = Queue(_QUEUE_SIZE)
+        self.__pending: Deque[str] = deque(maxlen=_PENDING_LIMIT)
+        self.__dropped = 0
+        self.__error: Optional[BaseException] = None
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.close(exc_type is None)
+
+    def __take_pending(self) -> List[str]:
+        """### 取出本地批次，有行被丢弃时在开头插入提示行。"""
+        batch = list(self.__pending)
+        if self.__dropped:
+            batch.insert(0, "[已丢弃 {} 行输出]".format(self.__dropped))
+            self.__dropped = 0
+        self.__pending.clear()
+        return batch
+
+    def put(self, line: str):
+        """### 添加一行待分发的输出，此方法不会阻塞。"""
+        if len(self.__pending) == _PENDING_LIMIT:
+            self.__dropped += 1
+        self.__pending.append(line)
+        # 只有读取线程放入批次，队列未满时 put_nowait 必定成功
+        if not self.__batches.full():
+            self.__batches.put_nowait(self.__take_pending())
+
+    def close(self, reraise=True):
+        """
+        ### 分发剩余的输出并等待分发线程结束。
+
+        ```
+        :param reraise: bool, 是否重新抛出回调函数执行时抛出的首个异常。
+        ```
+        """
+        if not self.__thread.is_alive():
+            return
+        if self.__pending:
+            self.__batches.put(self.__take_pending())
+        self.__batches.put(None)
+        self.__thread.join()
+        if reraise and self.__error is not None:
+            raise self.__error
+
+    def __call(self, subscriber: _Subscriber, func, *args):
+        try:
+            func(*args)
+        except BaseException as exc:
+            if self.__error is None:
+                self.__error = exc
+            self.__subscribers.remove(subscriber)
+
+    def __run(self):
+        finished = False
+        while not finished:
+            due_times = [s.due_time() for s in self.__subscribers if s.interval]
+            due_times = [t for t in due_times if t is not None]
+            timeout = None
+            if due_times:
+                timeout = max(min(due_times) - time.monotonic(), 0)
+            try:
+                batch = self.__batches.get(timeout=timeout)
+            except Empty:
+                batch = list()
+            if batch is None:
+                finished, batch = True, list()
+            for subscriber in list(self.__subscribers):
+                if subscriber.interval:
+                    subscriber.buffer.extend(batch)
+                    continue
+                for line in batch:
+                    self.__call(subscriber, subscriber.callback, line)
+                    if subscriber not in self.__subscribers:
+                        break
+            now = time.monotonic()
+            for subscriber in list(self.__subscribers):
+                due_time = subscriber.due_time()
+                if due_time is not None and (finished or now >= due_time):
+                    self.__call(subscriber, subscriber.deliver, now)
@@ -24,28 +24,60 @@
 # SOFTWARE.
 ################################################################################
 
+import hashlib
+import json
 import os
 import re
 import shutil
+import tempfile
+import threading
 import time
-from collections import OrderedDict
+from contextlib import ExitStack
 from copy import deepcopy
+from queue import Empty, Queue
 from random import randint
 from subprocess import *
+from types import MappingProxyType
 from typing import *
 
-if os.name != "nt":
-    raise Exception("此模块不支持 Windows 以外的操作系统")
-
 from ..__version__ import VERSION
 from ..com.common import *  # 一些常用量
 from ..utils.cmdutil import Command
+from ..utils.diskcache import DiskCache
+from ..utils.distinfo import (
+    canonical_name,
+    installed_distributions,
+    installed_metadata,
+)
 from ..utils.findpath import cur_py_path
+from ..utils.imports import ImportCache, collect_imports, local_module_names
+from ..utils.pkgmap import (
+    PackageMapScanner,
+    build_import_index,
+    build_name_index,
+    resolve_distribution,
+)
+from ..utils.requirements import (
+    dependency_closure,
+    needs_requirements_file,
+    normalize_requirement_line,
+    packaging_available,
+    parse_requirement,
+    read_requirements,
+    requirement_name,
+    requirement_satisfied,
+)
+from ..utils.watcher import HostWatcher
+from .dispatch import CallbackDispatcher, CallbackRegistry
+from .progress import ProgressEvent, ProgressParser
+from .worker import PyWorker
 
 _INIT_WK_DIR = os.getcwd()
-_STARTUP = STARTUPINFO()
-_STARTUP.dwFlags = STARTF_USESHOWWINDOW
-_STARTUP.wShowWindow = SW_HIDE
+_STARTUP = HIDDEN_STARTUPINFO
+# pip 可执行文件名，Windows 上如 pip.exe、pip3.10.exe，其他系统上如 pip、pip3.10
+_PIP_EXE_PATTERN = re.compile(r"^pip.*\.exe$" if os.name == "nt" else r"^pip[\d.]*$")
+# pip/__init__.py 中的版本号定义
+_PIP_VERSION_PATTERN = re.compile(r"""^__version__\s*=\s*["']([^"']+)["']""", re.M)
 _clean_pkgname = re.compile(r"[^<>=,!]+")
 
 # 预设的 PYPI 官方源及国内镜像源：
@@ -76,6 +108,10 @@ _PIPCMDS = {
     "GETINDEX": (*_PREFIX, "config", "list"),
     "DOWNLOAD": (*_PREFIX, "download"),
 }
+# sync 方法总是保留的包
+_SYNC_PRESERVED = ("pip", "setuptools", "wheel")
+# 开始支持 --progress-bar raw 的 pip 版本
+_RAW_PROGRESS_PIP = (24, 1)
 
 
 class PipInformation:
@@ -106,13 +142,260 @@ class PipInformation:
         return self.__pipver
 
 
+class SyncPlan:
+    """
+    ### PyEnv.sync 方法生成的同步计划及其执行结果。
+
+    计划中的需求按一次 pip install 安装、多余的包按一次 pip uninstall 卸载。
+    """
+
+    def __init__(
+        self,
+        to_install: Tuple[str, ...],
+        to_uninstall: Tuple[str, ...],
+        satisfied: Tuple[str, ...],
+        dry_run: bool,
+    ):
+        self.__to_install = to_install
+        self.__to_uninstall = to_uninstall
+        self.__satisfied = satisfied
+        self.__dry_run = dry_run
+        self.__install_ok: Optional[bool] = None
+        self.__uninstall_ok: Optional[bool] = None
+
+    def __str__(self):
+        return "SyncPlan(install={}, uninstall={}, satisfied={}, dry_run={})".format(
+            list(self.__to_install),
+            list(self.__to_uninstall),
+            len(self.__satisfied),
+            self.__dry_run,
+        )
+
+    __repr__ = __str__
+
+    @property
+    def to_install(self) -> Tuple[str, ...]:
+        """### 需要交给 pip 安装的需求(未满足或无法在进程内判断的需求)。"""
+        return self.__to_install
+
+    @property
+    def to_uninstall(self) -> Tuple[str, ...]:
+        """### 需要卸载的多余的包名，只有 remove_extraneous 为 True 时才可能不为空。"""
+        return self.__to_uninstall
+
+    @property
+    def satisfied(self) -> Tuple[str, ...]:
+        """### 已被满足(或环境标记不成立)的需求。"""
+        return self.__satisfied
+
+    @property
+    def dry_run(self) -> bool:
+        """### 是否只生成计划而不执行。"""
+        return self.__dry_run
+
+    @property
+    def changed(self) -> bool:
+        """### 计划中是否有需要安装或卸载的包。"""
+        return bool(self.__to_install or self.__to_uninstall)
+
+    @property
+    def install_ok(self) -> Optional[bool]:
+        """### 安装命令是否成功，没有执行安装命令时为 None。"""
+        return self.__install_ok
+
+    @property
+    def uninstall_ok(self) -> Optional[bool]:
+        """### 卸载命令是否成功，没有执行卸载命令时为 None。"""
+        return self.__uninstall_ok
+
+    @property
+    def success(self) -> Optional[bool]:
+        """### 执行的命令是否全部成功，只生成计划时为 None。"""
+        if self.__dry_run:
+            return None
+        return self.__install_ok is not False and self.__uninstall_ok is not False
+
+    def describe(self) -> str:
+        """
+        ### 以 pip 命令的形式描述计划，没有需要执行的命令时返回空字符串。
+
+        需求中有带 --hash 等选项的行或可编辑安装时，所有需求通过临时 requirements 文件交给 pip，此时以缩进的行列出文件内容。
+        """
+        lines = list()
+        if any(needs_requirements_file(r) for r in self.__to_install):
+            lines.append("pip install -r <requirements>")
+            lines.extend("    " + r for r in self.__to_install)
+        elif self.__to_install:
+            quoted = ('"{}"'.format(r) if " " in r else r for r in self.__to_install)
+            lines.append("pip install " + " ".join(quoted))
+        if self.__to_uninstall:
+            lines.append("pip uninstall -y " + " ".join(self.__to_uninstall))
+        return "\n".join(lines)
+
+    def _set_results(self, install_ok: Optional[bool], uninstall_ok: Optional[bool]):
+        self.__install_ok, self.__uninstall_ok = install_ok, uninstall_ok
+
+
+def _popen(cmds: Command) -> Popen:
+    """### 以隐藏窗口的方式启动命令，标准错误合并到标准输出。"""
+    return Popen(
+        cmds,
+        stdout=PIPE,
+        stderr=STDOUT,
+        startupinfo=_STARTUP,
+        cwd=os.path.dirname(cmds.executable),
+        env=cmds.environment(),
+    )
+
+
+def _communicate(cmds: Command, timeout) -> Tuple[str, int]:
+    """### 执行命令并一次性读取全部输出，超时则结束进程并返回空字符串和状态码 1。"""
+    process = _popen(cmds)
+    try:
+        out_bytes, _ = process.communicate(None, timeout)
+        return_code = process.returncode
+        out_strings = StreamDecoder(cmds.executable).decode(out_bytes, True)
+    except:
+        process.kill()
+        process.communicate()
+        return_code = 1
+        out_strings = EMPTY_STR
+    return out_strings.replace("\r\n", "\n"), return_code
+
+
+class CommandStream:
+    """
+    ### 命令输出流，迭代时逐行产出已解码的命令输出，不在内存中保留完整输出。
+
+    由后台线程读取子进程输出，所以即使子进程退出时还有未读取的输出也不会丢失，且在逐行输出时同样遵守超时限制。
+
+    迭代结束后可通过 returncode 属性获取退出状态码；超时后子进程会被结束，timed_out 属性为 True。
+
+    如果提前退出迭代，请调用 close 方法或使用 with 语句以结束子进程。
+    """
+
+    def __init__(
+        self,
+        cmds: Command,
+        timeout: Union[int, float, None] = None,
+        *,
+        dest: Optional[str] = None,
+    ):
+        """
+        ### CommandStream 类初始化方法，初始化时即启动子进程。
+
+        ```
+        :param cmds: Command, 要执行的命令，详见 Command 类的文档。
+
+        :param timeout: int or float or None, 命令执行的超时时长，单位为秒，None 表示无限制。
+
+        :param dest: str or None, 下载命令的保存目录，见 dest 属性。
+        ```
+        """
+        self.__deadline = None
+        if timeout is not None:
+            self.__deadline = time.monotonic() + timeout
+        self.__timed_out = False
+        self.__dest = dest
+        self.__returncode: Optional[int] = None
+        self.__lines: Queue = Queue()
+        self.__decoder = StreamDecoder(cmds.executable)
+        self.__process = _popen(cmds)
+        threading.Thread(
+            target=self.__pump,
+            args=(self.__process.stdout, self.__lines),
+            daemon=True,
+        ).start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def __pump(stdout, lines: Queue):
+        """### 读取子进程输出直到管道关闭，最后放入 None 作为结束标记。"""
+        for line_bytes in iter(stdout.readline, b""):
+            lines.put(line_bytes)
+        lines.put(None)
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            remaining = None
+            if self.__deadline is not None:
+                remaining = max(self.__deadline - time.monotonic(), 0)
+            try:
+                line_bytes = self.__lines.get(timeout=remaining)
+            except Empty:
+                self.__timed_out = True
+                self.close()
+                return
+            if line_bytes is None:
+                self.__returncode = self.__process.wait()
+                rest = self.__decoder.decode(b"", True)
+                if rest:
+                    yield rest
+                return
+            decoded_line = self.__decoder.decode(line_bytes)
+            if decoded_line:
+                yield decoded_line.replace("\r\n", "\n")
+
+    def events(self) -> Iterator[ProgressEvent]:
+        """
+        ### 迭代命令输出并将其解析为 ProgressEvent，适用于 pip 安装及下载命令，详见 ProgressParser 类。
+
+        与直接迭代输出流一样只能迭代一次，最后一个事件为 DONE 或 FAILED 事件。
+        """
+        parser = ProgressParser()
+        for decoded_line in self:
+            yield from parser.feed(decoded_line)
+        yield from parser.finish(not self.__timed_out and self.__returncode == 0)
+
+    @property
+    def dest(self) -> Optional[str]:
+        """### 下载命令的保存目录(未指定 dest 参数时为自动生成的目录)，其他命令为 None。"""
+        return self.__dest
+
+    @property
+    def returncode(self) -> Optional[int]:
+        """### 命令的退出状态码，输出流尚未迭代完毕时为 None。"""
+        return self.__returncode
+
+    @property
+    def timed_out(self) -> bool:
+        """### 命令是否因超时被结束。"""
+        return self.__timed_out
+
+    def close(self):
+        """### 结束仍在运行的子进程。"""
+        if self.__process.poll() is None:
+            self.__process.kill()
+        self.__returncode = self.__process.wait()
+
+
+def stream_commands(
+    cmds: Command, timeout: Union[int, float, None] = None
+) -> CommandStream:
+    """
+    ### 执行命令并返回其输出流，用于逐行处理命令输出，详见 CommandStream 类。
+
+    ```python
+    :param cmds: Command, 要执行的命令，详见 Command 类的文档
+    :param timeout: Union[int, float, None], 执行命令的超时时长，单位：秒
+    :return: CommandStream, 可迭代的命令输出流
+    ```
+    """
+    return CommandStream(cmds, timeout)
+
+
 def execute_commands(
     cmds: Command, output: bool, timeout: Union[int, float, None]
 ) -> Tuple[str, int]:
     """
     ### 执行命令，打印命令输出，返回输出字符串和结束状态码。
 
-    请注意，如果 output 参数值为 True，则 timeout 参数不生效。
+    超时则结束命令，退出状态码为 1。
 
     ```python
     :param cmds: Command, 要执行的命令，详见 Command 类的文档
@@ -121,36 +404,14 @@ def execute_commands(
     :return: Tuple[str, int], 命令执行时输出的全部字符串和退出状态码
     ```
     """
-    env = cmds.environment()
-    cwd = os.path.dirname(cmds.executable)
-    process = Popen(
-        cmds,
-        stdout=PIPE,
-        stderr=STDOUT,
-        startupinfo=_STARTUP,
-        cwd=cwd,
-        env=env,
-    )
-    if output:
-        strings = list()
-        while process.poll() is None:
-            line_bytes = process.stdout.readline()
-            decoded_line = decode_bytes(line_bytes)
-            if decoded_line:
-                strings.append(decoded_line)
-                if output:
-                    print(decoded_line, end="")
-        out_strings = "".join(strings)
-        return_code = process.returncode
-    else:
-        try:
-            out_bytes, _ = process.communicate(None, timeout)
-            return_code = process.returncode
-            out_strings = decode_bytes(out_bytes)
-        except:
-            return_code = 1
-            out_strings = EMPTY_STR
-    return out_strings.replace("\r\n", "\n"), return_code
+    if not output:
+        return _communicate(cmds, timeout)
+    strings = list()
+    with CommandStream(cmds, timeout) as stream:
+        for decoded_line in stream:
+            strings.append(decoded_line)
+            print(decoded_line, end="")
+    return "".join(strings), 1 if stream.timed_out else stream.returncode
 
 
 def parse_package_names(names):
@@ -177,7 +438,7 @@ class PyEnv:
     只有一个例外：使用 set_global_index 方法设置本机 pip 全局镜像源地址，产生全局作用。
     """
 
-    __CLS_CALLBACK_DICT = OrderedDict()
+    __CLS_CALLBACKS = CallbackRegistry()
     _cache_refresh_maximum_interval = 3
     _HOME = os.path.join(
         os.getenv("HOMEDRIVE", EMPTY_STR), os.getenv("HOMEPATH", EMPTY_STR)
@@ -185,46 +446,45 @@ class PyEnv:
     USER_DOWNLOADS = os.path.join(_HOME or _INIT_WK_DIR, "Downloads")
     FILE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     __string_pyinfo = "Python {} :: {} bit"
-    __sitepkg_pattern = re.compile(r"\[.*\]", re.S)
-    __pyinfo_pattern = re.compile(r"(\d+\.\d+\.\d+)\+? [(|].+(32|64) bit \(.+\)")
-    __info_pkgname_pattern = re.compile(r"^Name: ([A-Za-z0-9_\-\.]+)$")
-    __canonical_imp_pattern = re.compile(r"^[A-Za-z_]?[A-Za-z0-9_]+")
-    __full_canonical_imp_pattern = re.compile(r"^[A-Za-z_]?[A-Za-z0-9_]+$")
-    __module_pattern = re.compile(r"^([A-Z0-9_]+).*(?<!_d)\.py[cdw]?$", re.I)
-
-    def __execute(self, cmds: Command, output, timeout):
-        env = cmds.environment()
-        cwd = os.path.dirname(cmds.executable)
-        process = Popen(
-            cmds,
-            stdout=PIPE,
-            stderr=STDOUT,
-            startupinfo=_STARTUP,
-            cwd=cwd,
-            env=env,
-        )
-        if not output and not self.__CLS_CALLBACK_DICT:
-            try:
-                out_bytes, _ = process.communicate(None, timeout)
-                return_code = process.returncode
-                out_strings = decode_bytes(out_bytes)
-            except:
-                return_code = 1
-                out_strings = EMPTY_STR
-        else:
-            strings = list()
-            while process.poll() is None:
-                line_bytes = process.stdout.readline()
-                decoded_line = decode_bytes(line_bytes)
-                if decoded_line:
-                    strings.append(decoded_line)
-                    if output:
-                        print(decoded_line, end="")
-                    for callback in self.__CLS_CALLBACK_DICT.values():
-                        callback(decoded_line.rstrip(os.linesep))
-            out_strings = "".join(strings)
-            return_code = process.returncode
-        return out_strings.replace("\r\n", "\n"), return_code
+    # 是否增量刷新包名与导入名映射表：只重新扫描发生变化的 sys.path 目录及元数据目录
+    _incremental_refresh = True
+    # 刷新映射表时扫描 sys.path 各目录所用的线程数，None 表示串行扫描，详见 PackageMapScanner.scan 方法
+    _scan_workers: Optional[int] = None
+    # 可选的磁盘缓存，在多个进程及 PyEnv 实例间共享环境探测结果及映射表，详见 enable_disk_cache 方法
+    _disk_cache: Optional[DiskCache] = None
+    # 尚未生成映射表时，单个包的查询(query_for_import 等)是否只读取该包的元数据而不生成完整映射表
+    _lazy_resolution = True
+    # 源码文件导入名缓存，{缓存文件路径(未启用磁盘缓存时为源码目录): ImportCache}，详见 resolve_imports 方法
+    __IMPORT_CACHES: Dict[str, ImportCache] = dict()
+    __IMPORT_CACHES_LOCK = threading.Lock()
+
+    def __execute(self, cmds: Command, output, timeout, progress=None):
+        callbacks = self.__CLS_CALLBACKS.snapshot() + self.__callbacks.snapshot()
+        if not output and not callbacks and progress is None:
+            return _communicate(cmds, timeout)
+        strings = list()
+        with ExitStack() as stack:
+            stream = stack.enter_context(CommandStream(cmds, timeout))
+            dispatcher = parser = reporter = None
+            if callbacks:
+                dispatcher = stack.enter_context(CallbackDispatcher(callbacks))
+            if progress is not None:
+                parser = ProgressParser()
+                reporter = stack.enter_context(CallbackDispatcher([(progress, None)]))
+            for decoded_line in stream:
+                strings.append(decoded_line)
+                if output:
+                    print(decoded_line, end="")
+                if dispatcher is not None:
+                    dispatcher.put(decoded_line.rstrip(os.linesep))
+                if parser is not None:
+                    for event in parser.feed(decoded_line):
+                        reporter.put(event)
+            return_code = 1 if stream.timed_out else stream.returncode
+            if parser is not None:
+                for event in parser.finish(not return_code):
+                    reporter.put(event)
+        return "".join(strings), return_code
 
     def __init__(self, path=None):
         """
@@ -240,11 +500,45 @@ class PyEnv:
         """
         self.__time_last_activity = time.time()
         self.__cached_packages_imps: Dict[str, Dict[str, str]] = dict()
-        self.__cached_python_info = EMPTY_STR
+        # 映射表的只读视图，映射表被替换时整体替换，可以安全地在多个调用者及线程间共享
+        self.__mapping_snapshot = MappingProxyType(dict())
+        # sys.path 各目录的扫描结果，用于增量刷新映射表
+        self.__scanner = PackageMapScanner()
+        self.__mapping_builtins: Tuple[str, ...] = tuple()
+        # 导入名到包名的反向索引及其大小写不敏感版本，与映射表同时生成
+        self.__import_index: Dict[str, List[str]] = dict()
+        self.__import_index_folded: Dict[str, List[str]] = dict()
+        # 按 PEP 503 规范化的包名到映射表中包名的索引
+        self.__name_index: Dict[str, str] = dict()
+        # 尚未生成映射表时单独解析的包，{(包名或规范化的包名, 是否大小写敏感): {导入名: 路径}}
+        self.__lazy_imps: Dict[Tuple[str, bool], Dict[str, str]] = dict()
+        # (解释器指纹, pip 指纹, 探测结果)，pip 指纹由 sys.path 各目录下 pip/__init__.py 的状态组成
+        self.__cached_probe: Tuple[tuple, tuple, Dict[str, Any]] = (
+            tuple(),
+            tuple(),
+            dict(),
+        )
         # 解释器是否在 Scripts 目录的标识
         self.__pyexe_is_in_scripts = False
+        # 环境有效性缓存，包含解释器路径、pip 位置及判断缓存是否失效的文件状态指纹
+        self.__validity: Dict[str, Any] = dict()
+        self.__validity_hits = 0
+        self.__validity_misses = 0
+        # 可选的常驻子解释器，用于只读查询
+        self.__worker: Optional[PyWorker] = None
+        # sys.path 各目录的监视器，启用后映射表只在目录发生变化时刷新，详见 start_watching 方法
+        self.__watcher: Optional[HostWatcher] = None
+        # 只作用于本实例的回调函数
+        self.__callbacks = CallbackRegistry()
         self.__designated_path = self.__init_path(path)
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop_worker()
+        self.stop_watching()
+
     @staticmethod
     def __init_path(_path):
         """
@@ -261,23 +555,21 @@ class PyEnv:
         raise TypeError("路径参数类型错误。")
 
     @classmethod
-    def register(cls, output_callback: Callable[[str], Any]):
+    def register(cls, output_callback: Callable[[str], Any], max_rate=None):
         """
-        ### 向 PyEnv 类注册回调函数，可多次调用以注册不同函数。
+        ### 向 PyEnv 类注册回调函数，可多次调用以注册不同函数，所有 PyEnv 实例执行命令时都会调用它。
+
+        回调函数在专门的分发线程中被调用，执行缓慢也不会阻塞命令输出的读取。
 
         ```
         :param output_callback: Callable, 回调函数，此函数必须可以接受一个字符串参数。
+        :param max_rate: int or float or None, 每秒最多调用回调函数的次数，None 表示不限制且逐行调用；设置后期间的多行输出以换行符连接后一次性传入。
         :return: str or None, 如果注册成功，此方法返回回调函数在 PyEnv 类中的标识符，用于 deregister 方法，注册失败返回 None。
         ```
+
+        `max_rate 参数既不是 None 也不是数字则抛出 TypeError 异常，不是正数则抛出 ValueError 异常。`
         """
-        if not isinstance(output_callback, Callable):
-            return None
-        while True:
-            handle = str(randint(0x10000000, 0xFFFFFFFF))
-            if handle not in cls.__CLS_CALLBACK_DICT:
-                break
-        cls.__CLS_CALLBACK_DICT[handle] = output_callback
-        return handle
+        return cls.__CLS_CALLBACKS.add(output_callback, max_rate)
 
     @classmethod
     def deregister(cls, handle: str):
@@ -289,18 +581,68 @@ class PyEnv:
         :return: bool, 反注册成功返回 True，失败返回 False。
         ```
         """
-        if handle in cls.__CLS_CALLBACK_DICT:
-            del cls.__CLS_CALLBACK_DICT[handle]
-            return True
-        else:
-            return False
+        return cls.__CLS_CALLBACKS.remove(handle)
+
+    @classmethod
+    def enable_disk_cache(cls, cache_dir: Optional[str] = None) -> DiskCache:
+        """
+        ### 为所有 PyEnv 实例启用磁盘缓存。
+
+        启用后，环境探测结果、sys.path 各目录的扫描结果及包名与导入名映射表会保存到缓存目录，
+
+        新的进程或 PyEnv 实例可以直接使用它们而无需重新启动解释器或完整扫描；使用前会以解释器、site 目录及各 sys.path 目录的修改时间校验缓存，
+
+        校验不通过时只重新扫描发生变化的部分并更新缓存。缓存文件以原子替换的方式写入，可供多个进程同时使用。
+
+        ```
+        :param cache_dir: str or None, 缓存目录路径，None 表示使用默认的用户缓存目录。
+
+        :return: DiskCache, 磁盘缓存对象。
+        ```
+
+        `cache_dir 既不是 str 也不是 None 则抛出 TypeError 异常。`
+        """
+        cls._disk_cache = DiskCache(cache_dir)
+        return cls._disk_cache
+
+    @classmethod
+    def disable_disk_cache(cls):
+        """
+        ### 停用磁盘缓存，已写入的缓存文件不会被删除。
+        """
+        cls._disk_cache = None
 
     @classmethod
     def clear_registered(cls):
         """
         ### 清空所有已注册到 PyEnv 类的回调函数
         """
-        cls.__CLS_CALLBACK_DICT.clear()
+        cls.__CLS_CALLBACKS.clear()
+
+    def subscribe(self, output_callback: Callable[[str], Any], max_rate=None):
+        """
+        ### 向本实例注册回调函数，只有本实例执行命令时才会调用它，参数及返回值与 register 方法相同。
+
+        本实例执行命令时，先调用注册到 PyEnv 类的回调函数，再调用注册到本实例的回调函数。
+        """
+        return self.__callbacks.add(output_callback, max_rate)
+
+    def unsubscribe(self, handle: str):
+        """
+        ### 反注册已经使用 subscribe 注册到本实例的回调函数。
+
+        ```
+        :param handle: str, subscribe 方法的返回值。
+        :return: bool, 反注册成功返回 True，失败返回 False。
+        ```
+        """
+        return self.__callbacks.remove(handle)
+
+    def clear_subscribed(self):
+        """
+        ### 清空所有已注册到本实例的回调函数
+        """
+        self.__callbacks.clear()
 
     @property
     def path(self):
@@ -323,7 +665,13 @@ class PyEnv:
             self.__designated_path = _path
         else:
             self.__designated_path = os.path.normpath(_path)
-        self.__cached_python_info = EMPTY_STR
+        self.__cached_probe = (tuple(), tuple(), dict())
+        self.__validity = dict()
+        self.__set_mapping(dict(), tuple())
+        self.__scanner.clear()
+        self.stop_worker()
+        if self.__watcher is not None:
+            self.__watcher.set_paths(tuple())
 
     def __check(self, _path):
         """### 检查参数 path 在当前是否是一个有效的 Python 目录路径。"""
@@ -351,6 +699,76 @@ class PyEnv:
                 return os.path.normpath(parent)  # 如是则返回 Scripts 上级
         return os.path.normpath(_path)  # 如非则断定是常规目录结构的 Python 环境
 
+    def __validate(self) -> Dict[str, Any]:
+        """
+        ### 获取环境有效性缓存，缓存失效时重新检查环境。
+
+        缓存记录了 __check 方法所检查的全部文件(以及已定位的 pip/__init__.py)的状态指纹，
+        只有这些文件的存在与否、大小或修改时间发生变化时才重新检查，否则只需几次 stat 调用。
+        """
+        abs_path = os.path.abspath(self.__designated_path)
+        cache = self.__validity
+        if (
+            cache
+            and cache["path"] == abs_path
+            and stat_fingerprint(*cache["watched"]) == cache["fingerprint"]
+        ):
+            self.__validity_hits += 1
+            return cache
+        self.__validity_misses += 1
+        env_path = self.__check(self.__designated_path)
+        if not env_path:
+            interpreter = EMPTY_STR
+        elif self.__pyexe_is_in_scripts:
+            interpreter = os.path.join(env_path, PYTHON_SCR, PYTHON_EXE)
+        else:
+            interpreter = os.path.join(env_path, PYTHON_EXE)
+        watched = [
+            os.path.join(abs_path, PYTHON_EXE),
+            os.path.join(abs_path, VENV_CFG),
+            os.path.join(abs_path, PYTHON_SCR, PYTHON_EXE),
+            os.path.join(os.path.dirname(abs_path), VENV_CFG),
+        ]
+        cache = {
+            "path": abs_path,
+            "env_path": env_path,
+            "interpreter": interpreter,
+            "pip_init": None,  # None 代表尚未定位 pip，空字符串代表 pip 未安装
+            "watched": watched,
+            "fingerprint": stat_fingerprint(*watched),
+        }
+        self.__validity = cache
+        return cache
+
+    def __locate_pip(self, cache: Dict[str, Any]):
+        """### 根据探测到的 site 目录定位 pip/__init__.py，并将其纳入有效性缓存的指纹。"""
+        info = self.__probe()
+        if not info:
+            return
+        candidates = [
+            os.path.join(d, PIP_INIT)
+            for d in (self.__site_home(info), info["user_site"])
+            if d
+        ]
+        cache["pip_init"] = EMPTY_STR
+        for pip_init in candidates:
+            if os.path.isfile(pip_init):
+                cache["pip_init"] = pip_init
+                break
+        cache["watched"].extend(candidates)
+        cache["fingerprint"] = stat_fingerprint(*cache["watched"])
+
+    @property
+    def validity_stats(self) -> Dict[str, int]:
+        """
+        ### 环境有效性缓存的命中统计。
+
+        ```
+        :return: dict, {'hits': 命中次数, 'misses': 未命中(重新检查环境)次数}
+        ```
+        """
+        return {"hits": self.__validity_hits, "misses": self.__validity_misses}
+
     @property
     def env_path(self):
         """
@@ -358,12 +776,12 @@ class PyEnv:
 
         当 PyEnv 实例所指的 Python 环境无效(例如环境被卸载)时该属性值是空字符串，当环境恢复有效后，该属性值是该实例所指 Python 环境的路径(字符串)。
         """
-        return self.__check(self.__designated_path)
+        return self.__validate()["env_path"]
 
     @property
     def env_is_valid(self):
         """### 返回代表环境是否有效的布尔值"""
-        return bool(self.__check(self.__designated_path))
+        return bool(self.__validate()["env_path"])
 
     @property
     def interpreter(self):
@@ -372,12 +790,7 @@ class PyEnv:
 
         PyEnv 实例所指 Python 环境无效(例如环境被卸载)时值是空字符串。
         """
-        env_path = self.env_path
-        if not env_path:
-            return EMPTY_STR
-        if self.__pyexe_is_in_scripts:
-            return os.path.join(env_path, PYTHON_SCR, PYTHON_EXE)
-        return os.path.join(env_path, PYTHON_EXE)
+        return self.__validate()["interpreter"]
 
     def __str__(self):
         location = self.env_path or UNKNOWN_LOCATION
@@ -392,11 +805,12 @@ class PyEnv:
 
         作用和结果与 pip_ready 属性完全一致。
         """
-        if not self.env_is_valid:
+        cache = self.__validate()
+        if not cache["env_path"]:
             return False
-        return os.path.isfile(
-            os.path.join(self.site_packages_home(), PIP_INIT)
-        ) or os.path.isfile(os.path.join(self.user_site_packages_home(), PIP_INIT))
+        if cache["pip_init"] is None:
+            self.__locate_pip(cache)
+        return bool(cache["pip_init"])
 
     @property
     def pip_ready(self):
@@ -410,7 +824,7 @@ class PyEnv:
         return self.pip_is_ready
 
     @staticmethod
-    def __check_timeout_num(timeout):
+    def _check_timeout_num(timeout):
         if isinstance(timeout, (int, float)):
             if timeout < 1:
                 raise ValueError("超时参数 timeout 的值不能小于1。")
@@ -438,24 +852,255 @@ class PyEnv:
                     continue
         return True
 
+    @staticmethod
+    def __pip_fingerprint(info: Dict[str, Any]):
+        """### 生成探测结果中 pip 信息的指纹：sys.path 各目录下 pip/__init__.py 的路径、大小、修改时间。"""
+        sys_path = info.get("sys_path", list())
+        return stat_fingerprint(*(os.path.join(d, PIP_INIT) for d in sys_path if d))
+
+    @staticmethod
+    def __revalidate_pip(info: Dict[str, Any], pip_fingerprint: tuple) -> bool:
+        """
+        ### 检查探测结果中的 pip 版本及路径是否仍然有效，失效时根据 pip/__init__.py 就地更新。
+
+        安装或卸载 pip 只需读取 pip/__init__.py 即可更新，不必重新启动解释器。
+
+        无法读取 pip 版本时返回 False，调用者应重新启动解释器探测。
+        """
+        version = pip_path = EMPTY_STR
+        for pip_init, size, _ in pip_fingerprint:
+            if size is None:
+                continue
+            try:
+                with open(pip_init, "rt", encoding="utf-8") as init_file:
+                    match = _PIP_VERSION_PATTERN.search(init_file.read())
+            except Exception:
+                return False
+            if not match:
+                return False
+            version, pip_path = match.group(1), os.path.dirname(pip_init)
+            break
+        info["pip_version"], info["pip_path"] = version, pip_path
+        return True
+
+    def __probe(self, fresh=False) -> Dict[str, Any]:
+        """
+        ### 启动一次目标解释器，读取并缓存该环境的全部基本信息。
+
+        缓存以解释器的路径、大小、修改时间为键，只要解释器未变化就不会再次启动解释器，
+
+        安装包不会使缓存失效；pip 版本及路径另以 pip/__init__.py 的状态校验，变化时只读取该文件更新。
+
+        返回的是缓存本身，调用者不得修改。
+        """
+        interpreter = self.interpreter
+        if not interpreter:
+            return dict()
+        info = self._cached_probe_info(fresh)
+        if info is not None:
+            return info
+        if not fresh:
+            info = self.__load_disk_probe(interpreter)
+            if info is not None:
+                return info
+        if self.__worker is not None:
+            try:
+                return self._store_probe(interpreter, self.__worker.request("probe"))
+            except Exception:
+                pass
+        # 探测脚本的输出不是 pip 的输出，不应传递给已注册的回调函数
+        result, retcode = _communicate(Command(interpreter, *CmdRead.PROBE.value), None)
+        if retcode or not result:
+            return dict()
+        return self._store_probe(interpreter, result)
+
+    def __load_disk_probe(self, interpreter: str) -> Optional[Dict[str, Any]]:
+        """### 从磁盘缓存读取探测结果，指纹与当前状态一致时存入实例缓存并返回，否则返回 None。"""
+        if self._disk_cache is None:
+            return None
+        entry = self._disk_cache.load(interpreter).get("probe")
+        try:
+            info = entry["info"]
+            fingerprint = tuple(tuple(i) for i in entry["fingerprint"])
+            pip_fingerprint = tuple(tuple(i) for i in entry["pip_fingerprint"])
+        except Exception:
+            return None
+        if not info or fingerprint != stat_fingerprint(interpreter):
+            return None
+        self.__cached_probe = (fingerprint, pip_fingerprint, info)
+        return self._cached_probe_info()
+
+    def _cached_probe_info(self, fresh=False) -> Optional[Dict[str, Any]]:
+        """### 返回仍然有效的缓存探测结果，缓存无效或 fresh 为 True 时返回 None。"""
+        fingerprint, pip_fingerprint, info = self.__cached_probe
+        if fresh or not info:
+            return None
+        if fingerprint != stat_fingerprint(self.interpreter):
+            return None
+        current = self.__pip_fingerprint(info)
+        if current != pip_fingerprint:
+            if not self.__revalidate_pip(info, current):
+                return None
+            self.__save_probe(self.interpreter, fingerprint, current, info)
+        return info
+
+    def _store_probe(
+        self, interpreter: str, result: Union[str, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """### 解析探测脚本的输出(或常驻子解释器返回的字典)并缓存，解析失败返回空字典。"""
+        if isinstance(result, str):
+            try:
+                # 目标环境的 sitecustomize 等可能有额外输出，JSON 数据总在最后一行
+                result = json.loads(result.strip().splitlines()[-1])
+            except Exception:
+                return dict()
+        if not isinstance(result, dict):
+            return dict()
+        fingerprint = stat_fingerprint(interpreter)
+        self.__save_probe(
+            interpreter, fingerprint, self.__pip_fingerprint(result), result
+        )
+        return result
+
+    def __save_probe(
+        self, interpreter: str, fingerprint: tuple, pip_fingerprint: tuple, info
+    ):
+        """### 将探测结果及其指纹存入实例缓存及磁盘缓存。"""
+        self.__cached_probe = (fingerprint, pip_fingerprint, info)
+        if self._disk_cache is not None:
+            self._disk_cache.update(
+                interpreter,
+                probe={
+                    "fingerprint": fingerprint,
+                    "pip_fingerprint": pip_fingerprint,
+                    "info": info,
+                },
+            )
+
+    def probe(self, fresh=False) -> Dict[str, Any]:
+        """
+        ### 获取当前环境的基本信息字典。
+
+        字典包含 Python 版本(version)、位数(bits)、sys.path(sys_path)、内置模块名(builtins)、标准库模块名(stdlib_names，Python 3.10 及以上版本)、标准库目录(stdlib_dirs)、site 目录(sites)、用户 site 目录(user_site)、平台标签(platform、soabi、cache_tag)、PEP 508 环境标记(markers)及 pip 版本(pip_version)等信息。
+
+        结果在实例内缓存，只有解释器发生变化时才会重新启动解释器读取，安装包后 sys.path 等信息可能需要以 fresh=True 重新读取。
+
+        ```
+        :param fresh: bool, 是否忽略缓存重新读取，默认 False。
+
+        :return: dict, 环境信息字典，环境无效或读取失败时返回空字典。
+        ```
+        """
+        return deepcopy(self.__probe(fresh))
+
+    def start_worker(self, idle_timeout: Union[int, float, None] = 60) -> PyWorker:
+        """
+        ### 为该环境启用常驻子解释器，之后的只读查询(probe、py_info、query_metadata 等)都通过它完成。
+
+        子解释器在首次查询时启动，空闲超过 idle_timeout 秒后自动退出，解释器或 site 目录发生变化时自动重启。
+
+        也可以将 PyEnv 实例作为上下文管理器使用，退出上下文时自动调用 stop_worker 方法。
+
+        ```
+        :param idle_timeout: int or float or None, 空闲多少秒后关闭子解释器，None 表示不自动关闭，默认 60。
+
+        :return: PyWorker, 常驻子解释器对象。
+        ```
+
+        `环境无效则抛出 ValueError 异常。`
+        """
+        interpreter = self.interpreter
+        if not interpreter:
+            raise ValueError("Python 环境无效，无法启动常驻子解释器。")
+        if self.__worker is not None and self.__worker.interpreter == interpreter:
+            return self.__worker
+        self.stop_worker()
+        self.__worker = PyWorker(
+            interpreter,
+            idle_timeout=idle_timeout,
+            startupinfo=_STARTUP,
+        )
+        return self.__worker
+
+    def stop_worker(self):
+        """### 关闭并停用常驻子解释器，之后的只读查询恢复为每次启动新的解释器。"""
+        worker, self.__worker = self.__worker, None
+        if worker is not None:
+            worker.close()
+
+    def start_watching(self, interval: Union[int, float] = 1.0) -> HostWatcher:
+        """
+        ### 监视该环境的 sys.path 各目录，之后包名与导入名映射表只在目录发生变化时刷新，不再受缓存寿命(3s)限制。
+
+        Linux 上使用 inotify，安装、卸载等变化发生后的首次查询即可得到新的结果；其他系统每隔 interval 秒检查各目录的修改时间，
+
+        详见 HostWatcher 类。目录发生变化时只进行增量扫描(见 PackageMapScanner 类)。
+
+        也可以将 PyEnv 实例作为上下文管理器使用，退出上下文时自动调用 stop_watching 方法。
+
+        ```
+        :param interval: int or float, 轮询方式下检查目录修改时间的间隔秒数，默认 1。
+
+        :return: HostWatcher, 监视器对象。
+        ```
+
+        `环境无效则抛出 ValueError 异常，interval 无效则抛出 TypeError 或 ValueError 异常。`
+        """
+        if not self.env_path:
+            raise ValueError("Python 环境无效，无法监视 sys.path 目录。")
+        if self.__watcher is not None:
+            return self.__watcher
+        self.__watcher = HostWatcher(interval)
+        # 刷新后开始监视各目录，监视开始前发生的变化由下次查询时的增量扫描发现
+        self.__refresh_package_importable_mapping()
+        return self.__watcher
+
+    def stop_watching(self):
+        """### 停止监视 sys.path 各目录，映射表恢复为按缓存寿命(3s)刷新。"""
+        watcher, self.__watcher = self.__watcher, None
+        if watcher is not None:
+            watcher.close()
+
+    def query_metadata(self, name: str) -> Dict[str, Any]:
+        """
+        ### 通过目标环境的 importlib.metadata 查询已安装包的元数据。
+
+        已启用常驻子解释器(start_worker)时使用它查询，否则临时启动一个子解释器查询后关闭。
+
+        目标环境的 Python 版本低于 3.8 时没有 importlib.metadata，总是返回空字典。
+
+        ```
+        :param name: str, 包名。
+
+        :return: dict, 包含 name、version、summary、requires、location 的字典，未安装或查询失败返回空字典。
+        ```
+
+        `包名非 str 则抛出 TypeError 异常。`
+        """
+        if not isinstance(name, str):
+            raise TypeError("参数 1 数据类型错误，数据类型应为 str")
+        interpreter = self.interpreter
+        if not interpreter:
+            return dict()
+        if self.__worker is not None:
+            worker = self.__worker
+        else:
+            worker = PyWorker(interpreter, idle_timeout=None, startupinfo=_STARTUP)
+        try:
+            return worker.request("metadata", name) or dict()
+        except Exception:
+            return dict()
+        finally:
+            if worker is not self.__worker:
+                worker.close()
+
     def py_info(self):
         """### 获取当前环境 Python 版本信息。"""
         self.cleanup_old_scripts()
-        if self.__cached_python_info:
-            return self.__cached_python_info
-        if not self.env_path:
-            return self.__string_pyinfo.format("0.0.0", "?")
-        result, retcode = self.__execute(
-            Command(self.interpreter, *CmdRead.PYVERS.value), False, None
-        )
-        if retcode or not result:
-            return self.__string_pyinfo.format("0.0.0", "?")
-        # '3.7.14+ (heads/3.7:xxx...) [MSC v.1900 32 bit (Intel)]' etc.
-        m_obj = self.__pyinfo_pattern.search(result)
-        if not m_obj:
+        info = self.__probe()
+        if not info:
             return self.__string_pyinfo.format("0.0.0", "?")
-        self.__cached_python_info = self.__string_pyinfo.format(*m_obj.groups())
-        return self.__cached_python_info
+        return self.__string_pyinfo.format(info["version"], info["bits"])
 
     def pip_path(self):
         """
@@ -480,7 +1125,7 @@ class PyEnv:
         for dir_or_file in dirs_and_files:
             if not os.path.isfile(os.path.join(dir_pip_exists, dir_or_file)):
                 continue
-            match_obj = re.match(r"^pip.*\.exe$", dir_or_file)
+            match_obj = _PIP_EXE_PATTERN.match(dir_or_file)
             if not match_obj:
                 continue
             return os.path.join(dir_pip_exists, match_obj.group())
@@ -502,21 +1147,14 @@ class PyEnv:
         """
         if not self.pip_ready:
             return
-        result, retcode = self.__execute(
-            Command(self.interpreter, *_PIPCMDS["INFO"]), False, None
-        )
-        if retcode or not result:
-            return
-        match_obj = re.match("pip (.+) from (.+) \(python (.+)\)", result.strip())
-        if not match_obj:
-            return
-        res = match_obj.groups()
-        if not (len(res) == 3):
+        info = self.__probe()
+        if not info or not info["pip_version"]:
             return
-        return PipInformation(*res)
+        pyver = ".".join(info["version"].split(".")[:2])
+        return PipInformation(info["pip_version"], info["pip_path"], pyver)
 
     @staticmethod
-    def __cleanup_info(string):
+    def _parse_pkgs_info(string):
         """清理 pip 包名列表命令的无关输出。"""
         preprocessed = re.search(
             r"Package\s+Version\s*\n[-\s]+\n(.+)",
@@ -527,17 +1165,24 @@ class PyEnv:
             return []
         return re.findall(r"^(\S+)\s+(\S+)\s*$", preprocessed.group(1), re.M)
 
-    def pkgs_info(self, *, output=False, timeout=None):
+    def __fast_pkgs_info(self) -> Optional[List[Tuple[str, str]]]:
+        """### 不启动 pip，直接读取 sys.path 中的元数据获取已安装包列表，失败时返回 None。"""
+        info = self.__probe()
+        if not info:
+            return None
+        return installed_distributions(info["sys_path"])
+
+    def pkgs_info(self, *, output=False, timeout=None, fast=False):
         """
         ### 获取该 Python 目录下已安装的包列表，列表包含(包名, 版本)元组，没有获取到则返回空列表。
 
-        请注意，如果 output 参数值为 True，则 timeout 参数不生效。
-
         ```
         :param output: bool, 在终端上显示命令输出，默认 False。
 
         :param timeout: int or float, 命令执行超时时长，单位为秒，可设置为 None 表示无限制，默认 None。
 
+        :param fast: bool, 是否直接读取 site 目录中的 METADATA/PKG-INFO 获取包列表而不启动 pip，速度快得多，读取失败时仍使用 pip list 命令，此时 output 和 timeout 参数才生效。默认 False。
+
         :return: lsit[tuple[str, str]] or list[], 包含(第三方包名, 版本)元组的列表或空列表。
         ```
 
@@ -547,25 +1192,27 @@ class PyEnv:
         """
         if not self.pip_ready:
             return []
-        self.__check_timeout_num(timeout)
-        result, retcode = self.__execute(
-            Command(self.interpreter, *_PIPCMDS["LIST"]), output, timeout
-        )
+        self._check_timeout_num(timeout)
+        if fast:
+            pkgs = self.__fast_pkgs_info()
+            if pkgs is not None:
+                return pkgs
+        result, retcode = self.__execute(self._list_command(), output, timeout)
         if retcode or not result:
             return []
-        return self.__cleanup_info(result)
+        return self._parse_pkgs_info(result)
 
-    def pkg_names(self, *, output=False, timeout=None):
+    def pkg_names(self, *, output=False, timeout=None, fast=False):
         """
         ### 获取该 Python 目录下已安装的包名列表，没有获取到包名列表则返回空列表。
 
-        请注意，如果 output 参数值为 True，则 timeout 参数不生效。
-
         ```
         :param output: bool, 在终端上显示命令输出，默认 False。
 
         :param timeout: int or float, 命令执行超时时长，单位为秒，可设置为 None 表示无限制，默认 None。
 
+        :param fast: bool, 是否直接读取 site 目录中的元数据获取包名而不启动 pip，详见 pkgs_info 方法，默认 False。
+
         :return: list[str...] or lsit[], 包含包名的列表或空列表。
         ```
 
@@ -575,13 +1222,15 @@ class PyEnv:
         """
         if not self.pip_ready:
             return []
-        self.__check_timeout_num(timeout)
-        result, retcode = self.__execute(
-            Command(self.interpreter, *_PIPCMDS["LIST"]), output, timeout
-        )
+        self._check_timeout_num(timeout)
+        if fast:
+            pkgs = self.__fast_pkgs_info()
+            if pkgs is not None:
+                return [n for n, _ in pkgs]
+        result, retcode = self.__execute(self._list_command(), output, timeout)
         if retcode or not result:
             return []
-        return [n for n, _ in self.__cleanup_info(result)]
+        return [n for n, _ in self._parse_pkgs_info(result)]
 
     def outdated(self, *, output=False, timeout=60):
         """
@@ -591,8 +1240,6 @@ class PyEnv:
 
         检查更新时，耗时多少与环境中已安装的包数量有关，也与 PyPi 镜像地址的连通流畅度有关，请耐心等待。
 
-        请注意，如果 output 参数值为 True，则 timeout 参数不生效。
-
         ```
         :param output: bool, 在终端上显示命令输出，默认 False。
 
@@ -607,13 +1254,24 @@ class PyEnv:
         """
         if not self.pip_ready:
             return []
-        self.__check_timeout_num(timeout)
-        outdated_pkgs_info = []
-        result, retcode = self.__execute(
-            Command(self.interpreter, *_PIPCMDS["OUTDATED"]), output, timeout
-        )
+        self._check_timeout_num(timeout)
+        result, retcode = self.__execute(self._outdated_command(), output, timeout)
         if retcode or not result:
-            return outdated_pkgs_info
+            return []
+        return self._parse_outdated(result)
+
+    def _list_command(self) -> Command:
+        """### 生成 pip list 命令，供 pkgs_info 方法及其协程版本使用。"""
+        return Command(self.interpreter, *_PIPCMDS["LIST"])
+
+    def _outdated_command(self) -> Command:
+        """### 生成 pip list --outdated 命令，供 outdated 方法及其协程版本使用。"""
+        return Command(self.interpreter, *_PIPCMDS["OUTDATED"])
+
+    @staticmethod
+    def _parse_outdated(result: str) -> List[Tuple[str, str, str, str]]:
+        """### 解析 pip list --outdated 命令的输出。"""
+        outdated_pkgs_info = []
         result = result.strip().split("\n")
         pat_1 = r"^(\S+)\s+(\S+)\s+(\S+)\s+(sdist|wheel)$"
         pat_2 = r"^(\S+) \((\S+)\) - Latest: (\S+) \[(sdist|wheel)\]$"
@@ -632,8 +1290,6 @@ class PyEnv:
         """
         ### 升级 pip。
 
-        请注意，如果 output 参数值为 True，则 timeout 参数不生效。
-
         ```
         :param index_url: str, 镜像源地址，可为空字符串，默认使用系统内设置的全局镜像源。
 
@@ -650,7 +1306,7 @@ class PyEnv:
         """
         if not self.pip_ready:
             return False
-        self.__check_timeout_num(timeout)
+        self._check_timeout_num(timeout)
         cmds = Command(self.interpreter, *_PIPCMDS["PIPUP"])
         if index_url:
             cmds.extend(("-i", index_url))
@@ -706,8 +1362,6 @@ class PyEnv:
 
         所以如果不能保证 names 中所有的包都能被安装，那最好每次只传入一个包名，循环调用 install 方法安装所有的包。
 
-        请注意，如果 output 参数值为 True，则 timeout 参数不生效。
-
         ```
         :param names: str, 第三方包名(可变数量参数)。
 
@@ -731,6 +1385,12 @@ class PyEnv:
 
         :param target: str, 安装的目标目录，指定此参数以将包安装到此参数指定的位置，默认 None。
 
+        :param progress: Callable or None, 进度回调函数，接受一个 ProgressEvent 参数，在专门的分发线程中被调用，默认 None。
+        pip 24.1 及以上版本会以 --progress-bar raw 模式运行以获取实时下载进度。
+
+        :param skip_satisfied: bool, 是否先在进程内检查各需求是否已被满足(见 _requirements_to_install 方法)，只把未满足的需求交给 pip，
+        全部已满足时不启动 pip 直接返回成功，默认 False。upgrade、force_reinstall 或 target 参数生效时此参数无效。
+
         :return: tuple[tuple[str...], bool], 返回((包名...), 退出状态)元组。但包名 names 中只要有一个包不可安装，则所有传入的包名都不会被安装，且退出状态为 False。
         ```
 
@@ -742,10 +1402,63 @@ class PyEnv:
 
         `timeout 参数数据类型不是 int 或 float 或 None 则抛出 TypeError 异常；`
 
-        `target 参数不是 str 类型或不是 None 则抛出 ValueError 异常`
+        `target 参数不是 str 类型或不是 None 则抛出 ValueError 异常；`
+
+        `progress 参数不是可调用对象或 None 则抛出 TypeError 异常。`
         """
-        if not self.pip_ready or not names:
+        progress = self._progress_callback(kwargs)
+        # 先以全部需求生成命令以校验参数，pip 不可用时同样不会跳过已满足的需求直接返回成功
+        cmds = self._install_command(*names, **kwargs)
+        if cmds is None:
             return tuple()
+        pending = self._requirements_to_install(names, kwargs)
+        if not pending:
+            return names, True
+        if pending != names:
+            cmds = self._install_command(*pending, **kwargs)
+        output, timeout = kwargs.get("output", False), kwargs.get("timeout", None)
+        succeeded = not self.__execute(cmds, output, timeout, progress)[1]
+        self._packages_changed()
+        return names, succeeded
+
+    def _requirements_to_install(self, names, kwargs) -> Tuple[str, ...]:
+        """
+        ### skip_satisfied 参数为 True 时去掉 names 中已被满足的需求，返回仍需交给 pip 的需求。
+
+        需求按 PEP 508 解析(使用 packaging，未安装时使用 pip 自带的副本)，环境标记按目标环境的探测结果求值，
+
+        版本与 sys.path 中的元数据比较，不启动子进程；无法解析或无法在进程内判断的需求(如本地路径、URL、带 extras 的需求)仍交给 pip。
+        """
+        if (
+            not kwargs.get("skip_satisfied", False)
+            or kwargs.get("upgrade", False)
+            or kwargs.get("force_reinstall", False)
+            or kwargs.get("target", None) is not None
+        ):
+            return names
+        if not all(isinstance(s, str) for s in names):
+            raise TypeError("包名参数的数据类型应为字符串。")
+        info = self.__probe()
+        if not info or not packaging_available():
+            return names
+        installed = {
+            canonical_name(name): version
+            for name, version in installed_distributions(info["sys_path"])
+        }
+        environment = info.get("markers", dict())
+        pending = list()
+        for name in names:
+            requirement = parse_requirement(name)
+            if requirement is None or not requirement_satisfied(
+                requirement, installed, environment
+            ):
+                pending.append(name)
+        return tuple(pending)
+
+    def _install_command(self, *names, **kwargs) -> Optional[Command]:
+        """### 校验 install 方法的参数并生成安装命令，pip 不可用或未提供包名时返回 None。"""
+        if not self.pip_ready or not names:
+            return None
         (
             install_pre,
             index_url,
@@ -773,11 +1486,12 @@ class PyEnv:
             raise TypeError("包名参数的数据类型应为字符串。")
         if not isinstance(index_url, str):
             raise TypeError("镜像源地址参数数据类型应为字符串。")
-        self.__check_timeout_num(timeout)
+        self._check_timeout_num(timeout)
         if upgrade_strategy not in (None, "eager", "needed"):
             raise ValueError("strategy 参数可选值为 'eager'、'needed' 或 None。")
         if not isinstance(target, (str, type(None))):
             raise ValueError(f"target 参数类型应为 str 或 None")
+        self.__check_progress(kwargs.get("progress", None))
         cmds = Command(self.interpreter, *_PIPCMDS["INSTALL"], *names)
         if install_pre:
             cmds.append("--pre")
@@ -799,14 +1513,67 @@ class PyEnv:
             cmds.append("--no-compile")
         if target is not None:
             cmds.extend(("-t", target))
-        return names, not self.__execute(cmds, output, timeout)[1]
+        self.__add_progress_option(cmds, kwargs)
+        return cmds
+
+    @staticmethod
+    def _progress_callback(kwargs) -> Optional[Callable[[ProgressEvent], Any]]:
+        """
+        ### 从 install、download 方法的关键字参数中取出进度回调函数。
+
+        bool 值只适用于 stream_install、stream_download 方法(由调用者通过输出流的 events 方法读取进度)，
+
+        这两个方法之外没有读取 --progress-bar raw 输出的地方，所以不接受 bool 值。
+
+        `progress 参数不是可调用对象或 None 则抛出 TypeError 异常。`
+        """
+        progress = kwargs.get("progress", None)
+        if not (progress is None or callable(progress)):
+            raise TypeError(
+                "progress 参数值应为可调用对象或 None，bool 值只适用于 stream_install、stream_download 方法。"
+            )
+        return progress
+
+    @staticmethod
+    def __check_progress(progress):
+        """
+        ### 检查 progress 参数。
+
+        `progress 参数不是可调用对象、bool 或 None 则抛出 TypeError 异常。`
+        """
+        if not (progress is None or isinstance(progress, bool) or callable(progress)):
+            raise TypeError("progress 参数值应为可调用对象、bool 或 None。")
+
+    def __add_progress_option(self, cmds: Command, kwargs):
+        """### 需要进度事件且 pip 支持时为命令添加 --progress-bar raw 选项。"""
+        if not kwargs.get("progress", None):
+            return
+        pip_version = self.__probe().get("pip_version", EMPTY_STR)
+        numbers = tuple(int(n) for n in re.findall(r"\d+", pip_version)[:2])
+        if numbers >= _RAW_PROGRESS_PIP:
+            cmds.extend(("--progress-bar", "raw"))
+
+    def stream_install(self, *names, **kwargs) -> Optional[CommandStream]:
+        """
+        ### 校验参数后以输出流的方式执行安装命令，用于逐行处理 pip 的输出，详见 CommandStream 类。
+
+        参数与 install 方法相同，但 output 参数无效，且不会调用已注册的回调函数及进度回调函数。
+
+        progress 参数为 True 时，在 pip 支持的情况下以 --progress-bar raw 模式运行，以便通过输出流的 events 方法获取实时下载进度。
+
+        ```
+        :return: CommandStream or None, 安装命令的输出流，pip 不可用或未提供包名时返回 None。
+        ```
+        """
+        cmds = self._install_command(*names, **kwargs)
+        if cmds is None:
+            return None
+        return CommandStream(cmds, kwargs.get("timeout", None))
 
     def uninstall(self, *names, **kwargs):
         """
         ### 卸载 Python 第三方包。
 
-        请注意，如果 output 参数值为 True，则 timeout 参数不生效。
-
         ```
         param names: str, 不定长参数。要卸载的包名，可以传入多个包名，此参数必选。
 
@@ -824,15 +1591,183 @@ class PyEnv:
 
         `timeout 参数数据类型不是 int 或 float 或 None 则抛出 TypeError 异常。`
         """
-        if not self.pip_ready or not names:
+        cmds = self._uninstall_command(*names, **kwargs)
+        if cmds is None:
             return tuple()
-        output = kwargs.get("output", False)
+        output, timeout = kwargs.get("output", False), kwargs.get("timeout", None)
+        succeeded = not self.__execute(cmds, output, timeout)[1]
+        self._packages_changed()
+        return names, succeeded
+
+    def _packages_changed(self):
+        """
+        ### 安装或卸载命令执行后调用(无论成功与否，失败的命令也可能改变了环境)。
+
+        将监视器标记为"已变化"并丢弃单包查询的缓存，使随后的查询不必等待下一次轮询就能得到新的映射表。
+        """
+        if self.__watcher is not None:
+            self.__watcher.mark_dirty()
+        self.__lazy_imps.clear()
+
+    def _uninstall_command(self, *names, **kwargs) -> Optional[Command]:
+        """### 校验 uninstall 方法的参数并生成卸载命令，pip 不可用或未提供包名时返回 None。"""
+        if not self.pip_ready or not names:
+            return None
         timeout = kwargs.get("timeout", None)
         if not all(isinstance(s, str) for s in names):
             raise TypeError("包名参数的数据类型应为字符串。")
-        self.__check_timeout_num(timeout)
-        cmds = Command(self.interpreter, *_PIPCMDS["UNINSTALL"], *names)
-        return names, not self.__execute(cmds, output, timeout)[1]
+        self._check_timeout_num(timeout)
+        return Command(self.interpreter, *_PIPCMDS["UNINSTALL"], *names)
+
+    def stream_uninstall(self, *names, **kwargs) -> Optional[CommandStream]:
+        """
+        ### 校验参数后以输出流的方式执行卸载命令，详见 stream_install 方法。
+
+        ```
+        :return: CommandStream or None, 卸载命令的输出流，pip 不可用或未提供包名时返回 None。
+        ```
+        """
+        cmds = self._uninstall_command(*names, **kwargs)
+        if cmds is None:
+            return None
+        return CommandStream(cmds, kwargs.get("timeout", None))
+
+    def sync(
+        self,
+        requirements: Union[str, Iterable[str]],
+        *,
+        remove_extraneous=False,
+        dry_run=False,
+        **kwargs,
+    ) -> Optional[SyncPlan]:
+        """
+        ### 使环境与需求列表一致：只安装未满足的需求，可选地卸载需求及其依赖以外的包。
+
+        需求是否满足在进程内判断(见 install 方法的 skip_satisfied 参数)，所有未满足的需求以一次 pip install 安装，
+
+        多余的包以一次 pip uninstall 卸载，环境中只有少数包不一致时只需启动一次 pip。
+
+        多余的包是指 site 目录中既不是需求、也不是需求(按已安装包的 Requires-Dist 递归展开)的依赖的包，
+
+        pip、setuptools、wheel 及它们的依赖总是被保留；安装完成后会重新计算多余的包，以免卸载新需求刚刚引入的依赖。
+
+        本地路径、URL 及可编辑安装('-e')的需求总是交给 pip，卸载多余的包时它们必须能确定包名(PEP 508 的 '包名 @ URL' 形式或带有 '#egg=包名' 片段)；
+
+        带有 --hash 等单个需求的选项的行(如 pip-compile 生成的文件)或可编辑安装存在时，需要安装的需求通过临时 requirements 文件交给 pip。
+
+        ```
+        :param requirements: str or Iterable[str], requirements 文件路径(详见 read_requirements 函数)或需求字符串列表，列表中的相对路径相对于当前工作目录。
+
+        :param remove_extraneous: bool, 是否卸载多余的包，默认 False。
+
+        :param dry_run: bool, 是否只生成计划而不执行，默认 False。
+
+        :param kwargs: 其他关键字参数(如 index_url、output、timeout)传递给 install 方法，其中 output 和 timeout 同样传递给 uninstall 方法。
+
+        :return: SyncPlan or None, 同步计划及执行结果，环境无效、pip 不可用或 packaging 不可用时返回 None。安装失败时不再卸载多余的包。
+        ```
+
+        `requirements 既不是 str 也不是字符串序列则抛出 TypeError 异常；requirements 文件无法读取则抛出 OSError 异常；`
+
+        `需求中有 -r、-e 以外的 pip 选项(例如 -i、-c)，或 remove_extraneous 为 True 而有无法确定包名的需求则抛出 ValueError 异常。`
+        """
+        if isinstance(requirements, str):
+            lines = read_requirements(requirements)
+        else:
+            lines = list(requirements)
+            if not all(isinstance(s, str) for s in lines):
+                raise TypeError("需求列表中的数据类型应为字符串。")
+            lines = [
+                normalize_requirement_line(s, os.getcwd()) for s in lines if s.strip()
+            ]
+        if not self.pip_ready or not packaging_available():
+            return None
+        info = self.__probe()
+        if not info:
+            return None
+        metadata = installed_metadata(info["sys_path"])
+        installed = {k: v[1]["Version"][0] for k, v in metadata.items()}
+        environment = info.get("markers", dict())
+        to_install, satisfied, kept, unnamed = list(), list(), list(), list()
+        for line in lines:
+            requirement = parse_requirement(line)
+            if requirement is None:
+                # 本地路径、URL 及可编辑安装总是交给 pip，能确定包名时同样保留其依赖
+                name = requirement_name(line)
+                if name is None:
+                    unnamed.append(line)
+                else:
+                    kept.append(parse_requirement(name))
+                to_install.append(line)
+                continue
+            kept.append(requirement)
+            if requirement_satisfied(requirement, installed, environment, metadata):
+                satisfied.append(line)
+            else:
+                to_install.append(line)
+        if remove_extraneous and unnamed:
+            raise ValueError(
+                "无法确定以下需求的包名，不能同时卸载多余的包(可改用 '包名 @ URL' 形式或添加 '#egg=包名' 片段)：{}".format(
+                    "、".join(unnamed)
+                )
+            )
+        to_uninstall = list()
+        if remove_extraneous:
+            to_uninstall = self.__extraneous(info, metadata, kept)
+        plan = SyncPlan(
+            tuple(to_install), tuple(to_uninstall), tuple(satisfied), dry_run
+        )
+        if dry_run or not plan.changed:
+            return plan
+        install_ok = uninstall_ok = None
+        if to_install:
+            kwargs.pop("skip_satisfied", None)
+            install_ok = self.__sync_install(to_install, kwargs)
+        if to_uninstall and install_ok is not False:
+            if install_ok:
+                # 新安装的包可能依赖原本多余的包
+                metadata = installed_metadata(info["sys_path"])
+                remaining = set(self.__extraneous(info, metadata, kept))
+                to_uninstall = [n for n in to_uninstall if n in remaining]
+            if to_uninstall:
+                result = self.uninstall(
+                    *to_uninstall,
+                    output=kwargs.get("output", False),
+                    timeout=kwargs.get("timeout", None),
+                )
+                uninstall_ok = bool(result) and result[1]
+        plan._set_results(install_ok, uninstall_ok)
+        return plan
+
+    def __sync_install(self, lines: List[str], kwargs) -> bool:
+        """### 以一次 pip install 安装需求，有只能写在 requirements 文件中的行时通过临时文件交给 pip。"""
+        if not any(needs_requirements_file(r) for r in lines):
+            result = self.install(*lines, **kwargs)
+            return bool(result) and result[1]
+        fd, temp_path = tempfile.mkstemp(".txt", "fastpip-requirements-")
+        try:
+            with open(fd, "wt", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            result = self.install("-r", temp_path, **kwargs)
+            return bool(result) and result[1]
+        finally:
+            try:
+                os.remove(temp_path)
+            except Exception:
+                pass
+
+    @staticmethod
+    def __extraneous(info, metadata, requirements) -> List[str]:
+        """### 返回 site 目录中不在需求及其依赖(以及 pip、setuptools、wheel 及其依赖)中的包名列表。"""
+        environment = info.get("markers", dict())
+        kept = [parse_requirement(n) for n in _SYNC_PRESERVED] + list(requirements)
+        closure = dependency_closure(kept, metadata, environment)
+        sites = set(os.path.normcase(os.path.normpath(p)) for p in info["sites"])
+        return [
+            headers["Name"][0]
+            for key, (host, headers) in metadata.items()
+            if key not in closure and os.path.normcase(os.path.normpath(host)) in sites
+        ]
 
     def download(self, *names, **kwargs):
         """
@@ -840,8 +1775,6 @@ class PyEnv:
 
         提示：当使用 python_version、platform、abis 或 implementation 参数约束平台和解释器时，必须设置 no_deps 参数值为 True，不能设置 only_binary 参数，不能设置 no_binary 参数。
 
-        请注意，如果 output 参数值为 True，则 timeout 参数不生效。
-
         ```
         :param names: str, 不定长参数。包名，可同时传入多个包名，此参数必选。
 
@@ -873,11 +1806,30 @@ class PyEnv:
 
         :param timeout: int or float, 关键字参数，任务超时时长限制，单位为秒，可设为 None 表示无限制，默认 None。
 
+        :param progress: Callable or None, 关键字参数，进度回调函数，接受一个 ProgressEvent 参数，详见 install 方法，默认 None。
+
         :return: tuple(bool, str), 返回(是否下载成功, 文件保存路径)元组。如果下载失败(False)，则返回的元组中，文件保存路径为空字符串。
         ```
+
+        `progress 参数不是可调用对象或 None 则抛出 TypeError 异常。`
         """
-        if not self.pip_ready or not names:
+        progress = self._progress_callback(kwargs)
+        cmds_dest = self._download_command(*names, **kwargs)
+        if cmds_dest is None:
             return tuple()
+        cmds, dest = cmds_dest
+        output, timeout = kwargs.get("output", False), kwargs.get("timeout", None)
+        retcode = not self.__execute(cmds, output, timeout, progress)[1]
+        return (retcode, dest) if retcode else (retcode, EMPTY_STR)
+
+    def _download_command(self, *names, **kwargs) -> Optional[Tuple[Command, str]]:
+        """
+        ### 校验 download 方法的参数、准备保存目录并生成下载命令。
+
+        返回(命令, 保存目录)元组，pip 不可用或未提供包名时返回 None。
+        """
+        if not self.pip_ready or not names:
+            return None
         (
             no_deps,
             no_binary,
@@ -945,7 +1897,8 @@ class PyEnv:
             raise TypeError("参数 abi 值应为一个包含字符串的元组或列表。")
         if not isinstance(index_url, (str, NoneType)):
             raise TypeError("参数 index_url 值类型应为 'str' 或值为 'None'。")
-        self.__check_timeout_num(timeout)
+        self._check_timeout_num(timeout)
+        self.__check_progress(kwargs.get("progress", None))
         while True:
             download_dir_hash = os.path.join(
                 self.USER_DOWNLOADS,
@@ -997,223 +1950,149 @@ class PyEnv:
                 cmds.extend(("--abi", abi))
         if index_url:
             cmds.extend(("--index-url", index_url))
-        retcode = not self.__execute(cmds, output, timeout)[1]
-        return (retcode, dest) if retcode else (retcode, EMPTY_STR)
+        self.__add_progress_option(cmds, kwargs)
+        return cmds, dest
+
+    def stream_download(self, *names, **kwargs) -> Optional[CommandStream]:
+        """
+        ### 校验参数后以输出流的方式执行下载命令，详见 stream_install 方法。
+
+        保存目录的确定规则与 download 方法相同，实际使用的保存目录可通过输出流的 dest 属性获取。
+
+        ```
+        :return: CommandStream or None, 下载命令的输出流，pip 不可用或未提供包名时返回 None。
+        ```
+        """
+        cmds_dest = self._download_command(*names, **kwargs)
+        if cmds_dest is None:
+            return None
+        cmds, dest = cmds_dest
+        return CommandStream(cmds, kwargs.get("timeout", None), dest=dest)
 
     def __read_sysinfo(self) -> Tuple[List[str], Tuple[str]]:
         """读取目标环境的 sys.path 和 sys.builtin_module_names 属性。"""
         self.cleanup_old_scripts()
-        result, retcode = self.__execute(
-            Command(self.interpreter, *CmdRead.SYSINFO.value), False, None
-        )
-        if retcode or not result:
-            return [], ()
-        try:
-            paths, builtins = result.strip().split("\n")
-            return eval(paths.strip()), eval(builtins.strip())
-        except Exception:
+        info = self.__probe()
+        if not info:
             return [], ()
-
-    @staticmethod
-    def __prefixs_from_pth(fullpath: str) -> set:
-        package_paths_relative_site = set()
-        if not os.path.isfile(fullpath):
-            return package_paths_relative_site
-        try:
-            with open(fullpath, "rt", encoding="utf-8") as f:
-                for line in f:
-                    if line.startswith(("#", "import ", "import\t")):
-                        continue
-                    line = os.path.normcase(line.rstrip())
-                    if line:
-                        package_paths_relative_site.add(line)
-        except Exception:
-            pass
-        return package_paths_relative_site
+        return info["sys_path"], tuple(info["builtins"])
 
     def __refresh_package_importable_mapping(self) -> Dict[str, Dict[str, str]]:
         """
         ### 获取本环境下包名与导入名的映射表并在 PyEnv 实例内缓存。
 
+        _incremental_refresh 为 True 时只重新扫描新增、删除或发生变化的目录及元数据目录，
+
+        扫描结果没有变化时沿用已缓存的映射表，详见 PackageMapScanner 类。
+
         ```
-        :return: dict[str: set[str...]...]
+        :return: dict[str: dict[str: str]...]
         ```
         """
-        self.__cached_packages_imps.clear()
         if not self.env_path:
-            return dict()
+            self.__set_mapping(dict(), tuple())
+            self.__scanner.clear()
+            return self.__cached_packages_imps
         hosts_in_sys_paths, builtin_imps = self.__read_sysinfo()
-        for name in builtin_imps:
-            self.__cached_packages_imps[name] = {name: EMPTY_STR}
-        hosts_files_dirs: Dict[str, Set[str]] = dict()
-        # {pth_host: (owner_host, owner_pkg)}
-        attributed_hosts: Dict[str, Tuple[str, str]] = dict()
-        for pkgs_host in hosts_in_sys_paths:
-            if not os.path.isdir(pkgs_host):
-                continue
-            try:
-                filedir_names_inhost = os.listdir(pkgs_host)
-            except Exception:
-                continue
-            pkgs_host = os.path.normcase(pkgs_host)
-            if pkgs_host not in hosts_files_dirs:
-                hosts_files_dirs[pkgs_host] = set()
-            hosts_files_dirs[pkgs_host].update(filedir_names_inhost)
-            for fdname in filedir_names_inhost:
-                fdpath = os.path.join(pkgs_host, fdname)
-                if os.path.isfile(fdpath) and fdname.lower().endswith(".pth"):
-                    each_pth_prefs = self.__prefixs_from_pth(fdpath)
-                    if not each_pth_prefs:
-                        continue
-                    pthname_matched = self.__canonical_imp_pattern.match(fdname)
-                    if not pthname_matched:
-                        continue
-                    owner_pkg = pthname_matched.group()
-                    for suffix in each_pth_prefs:
-                        suffix = os.path.normcase(suffix)
-                        pth_host = os.path.join(pkgs_host, suffix)
-                        attributed_hosts[pth_host] = (pkgs_host, owner_pkg)
-        # {pkgs_host: {impname: (fullpath, filename)}}
-        pkgsmods_perhost: Dict[str, Dict[str, Tuple[str, str]]] = dict()
-        for pkgs_host, fdnames_inhost in hosts_files_dirs.items():
-            if pkgs_host in attributed_hosts:
-                main_host = attributed_hosts[pkgs_host][0]
-            else:
-                main_host = pkgs_host
-            if main_host not in pkgsmods_perhost:
-                pkgsmods_perhost[main_host] = dict()
-            for fdname in fdnames_inhost:
-                fdpath = os.path.join(pkgs_host, fdname)
-                if os.path.isdir(fdpath):
-                    if self.__full_canonical_imp_pattern.match(fdname):
-                        pkgsmods_perhost[main_host][fdname] = (fdpath, fdname)
-                elif os.path.isfile(fdpath) and fdname.lower().endswith(
-                    (".py", ".pyc", ".pyd", "pyw")
-                ):
-                    module_matched = self.__module_pattern.match(fdname)
-                    if not module_matched:
-                        continue
-                    module_name = module_matched.group(1)
-                    pkgsmods_perhost[main_host][module_name] = (fdpath, fdname)
-        proced_fdnames: Dict[str, Set[str]] = dict()
-        for pkgs_host, fdnames_inhost in hosts_files_dirs.items():
-            if pkgs_host in attributed_hosts:
-                main_host = attributed_hosts[pkgs_host][0]
-            else:
-                main_host = pkgs_host
-            pkgsmods_thishost = pkgsmods_perhost.get(main_host, dict())
-            each_host_proced = proced_fdnames.setdefault(main_host, set())
-            for fdname in fdnames_inhost:
-                dir_fullpath = os.path.join(pkgs_host, fdname)
-                if not os.path.isdir(dir_fullpath):
-                    continue
-                if fdname.endswith(".dist-info"):
-                    info_file = "METADATA"
-                elif fdname.endswith(".egg-info"):
-                    info_file = "PKG-INFO"
-                else:
-                    continue
-                each_host_proced.add(fdname)
-                info_fullpath = os.path.join(dir_fullpath, info_file)
-                if not os.path.exists(info_fullpath):
-                    continue
-                try:
-                    with open(info_fullpath, "rt", encoding="utf-8") as f:
-                        metadata_lines = f.readlines()
-                except Exception:
-                    continue
-                name_pkginfo_matched = EMPTY_STR
-                for line in metadata_lines[1:]:
-                    name_pkginfo_matched = self.__info_pkgname_pattern.match(line)
-                    if name_pkginfo_matched:
-                        break
-                if not name_pkginfo_matched:
-                    continue
-                pkg_importables: Dict[str, str] = dict()
-                realname = name_pkginfo_matched.group(1)
-                if PKG_SEPDOT in realname:
-                    imppath = os.path.join(
-                        pkgs_host, realname.replace(".", os.path.sep)
-                    )
-                    pkg_importables[realname] = imppath
-                toplevel_txt = os.path.join(dir_fullpath, "top_level.txt")
-                if not os.path.exists(toplevel_txt):
-                    impname_matched = self.__canonical_imp_pattern.match(
-                        realname.replace("-", "_")
-                    )
-                    if not impname_matched:
-                        continue
-                    impname = impname_matched.group()
-                    if impname not in pkgsmods_thishost:
-                        continue
-                    pkgimppath = pkgsmods_thishost[impname]
-                    if realname not in self.__cached_packages_imps:
-                        self.__cached_packages_imps[realname] = dict()
-                    self.__cached_packages_imps[realname][impname] = pkgimppath[0]
-                    each_host_proced.add(pkgimppath[1])
-                    continue
-                try:
-                    with open(toplevel_txt, "rt", encoding="utf-8") as tt:
-                        toplevel_txt_lines = tt.readlines()
-                    for line in toplevel_txt_lines:
-                        prefix, suffix = os.path.split(line.rstrip())
-                        toplevel_imp_matched = self.__canonical_imp_pattern.match(
-                            suffix
-                        )
-                        if not toplevel_imp_matched:
-                            continue
-                        impname_in_toplevel = toplevel_imp_matched.group()
-                        if impname_in_toplevel not in pkgsmods_thishost:
-                            continue
-                        pkgimppath = pkgsmods_thishost[impname_in_toplevel]
-                        pkg_importables[impname_in_toplevel] = pkgimppath[0]
-                        each_host_proced.add(pkgimppath[1])
-                except Exception:
-                    pass
-                if realname not in self.__cached_packages_imps:
-                    self.__cached_packages_imps[realname] = dict()
-                self.__cached_packages_imps[realname].update(pkg_importables)
-        for pkgs_host, fdnames_inhost in hosts_files_dirs.items():
-            if pkgs_host in attributed_hosts:
-                main_host, pkgname = attributed_hosts[pkgs_host]
-            else:
-                main_host, pkgname = pkgs_host, None
-            pkgsmods_thishost = pkgsmods_perhost.get(main_host, dict())
-            each_host_proced = proced_fdnames.setdefault(main_host, set())
-            for fdname in fdnames_inhost:
-                if fdname in each_host_proced:
-                    continue
-                fdpath = os.path.normcase(os.path.join(pkgs_host, fdname))
-                if fdpath in attributed_hosts:
-                    temp_host, temp_pkgname = attributed_hosts[fdpath]
-                    temp_pkgsmods = pkgsmods_perhost.get(temp_host, dict())
-                else:
-                    temp_pkgname = pkgname
-                    temp_pkgsmods = pkgsmods_thishost
-                flag_fdname_canonical = False
-                for canon_name, pathfile in temp_pkgsmods.items():
-                    if fdname == pathfile[1]:
-                        flag_fdname_canonical = True
-                        break
-                if not flag_fdname_canonical:
-                    continue
-                final_pkgname = temp_pkgname if temp_pkgname else canon_name
-                if final_pkgname not in self.__cached_packages_imps:
-                    self.__cached_packages_imps[final_pkgname] = dict()
-                self.__cached_packages_imps[final_pkgname][canon_name] = pathfile[0]
+        if not self.__scanner.hosts and self._disk_cache is not None:
+            self.__load_disk_mapping()
+        changed = self.__scanner.scan(
+            hosts_in_sys_paths, self._incremental_refresh, self._scan_workers
+        )
+        if self.__watcher is not None:
+            self.__watcher.set_paths(self.__scanner.hosts)
+        if (
+            changed
+            or builtin_imps != self.__mapping_builtins
+            or not self.__cached_packages_imps
+        ):
+            self.__set_mapping(self.__scanner.build(builtin_imps), builtin_imps)
+            if self._disk_cache is not None:
+                self._disk_cache.update(
+                    self.interpreter,
+                    mapping={
+                        "scanner": self.__scanner.dump(),
+                        "builtins": builtin_imps,
+                        "mapping": self.__cached_packages_imps,
+                    },
+                )
         return self.__cached_packages_imps
 
+    def __load_disk_mapping(self) -> bool:
+        """### 从磁盘缓存恢复扫描结果及映射表，随后的增量扫描负责校验它们是否仍然有效，返回是否恢复成功。"""
+        entry = self._disk_cache.load(self.interpreter).get("mapping")
+        try:
+            mapping, builtins = entry["mapping"], tuple(entry["builtins"])
+            if not self.__scanner.load(entry["scanner"]):
+                return False
+        except Exception:
+            return False
+        self.__set_mapping(mapping, builtins)
+        return True
+
+    def __set_mapping(self, mapping: Dict[str, Dict[str, str]], builtins):
+        """### 替换缓存的映射表并重新生成由它派生的索引及只读视图，映射表生成后不再被修改。"""
+        snapshot = MappingProxyType(
+            {k: MappingProxyType(v) for k, v in mapping.items()}
+        )
+        self.__cached_packages_imps = mapping
+        self.__mapping_snapshot = snapshot
+        self.__mapping_builtins = builtins
+        self.__import_index = build_import_index(mapping)
+        self.__import_index_folded = build_import_index(mapping, folded=True)
+        self.__name_index = build_name_index(mapping)
+        self.__lazy_imps.clear()
+
+    def __lookup_package(self, name: str, case: bool) -> Optional[Dict[str, str]]:
+        """### 在映射表中查找包名，case 为 False 时按 PEP 503 规范化后的名称查找。"""
+        if not case:
+            name = self.__name_index.get(canonical_name(name), EMPTY_STR)
+        return self.__cached_packages_imps.get(name)
+
+    def __query_package(self, name: str, case: bool, fresh) -> Optional[Dict[str, str]]:
+        """
+        ### 查询单个包的导入名与路径字典。
+
+        已有映射表(包括从磁盘缓存恢复的)时按 __check_refresh_requirements 方法的规则刷新后在映射表中查找；
+
+        尚未生成映射表时先尝试只读取该包的元数据(见 resolve_distribution 函数)，结果缓存至映射表生成或缓存寿命超时，
+
+        无法单独确定该包的条目时才生成完整的映射表。
+        """
+        if (
+            not PyEnv._lazy_resolution
+            or self.__cached_packages_imps
+            or (self._disk_cache is not None and self.__load_disk_mapping())
+        ):
+            self.__check_refresh_requirements(fresh)
+            return self.__lookup_package(name, case)
+        time_now = time.time()
+        interval = time_now - self.__time_last_activity
+        self.__time_last_activity = time_now
+        if fresh or interval > PyEnv._cache_refresh_maximum_interval:
+            self.__lazy_imps.clear()
+        key = (name if case else canonical_name(name), case)
+        if key in self.__lazy_imps:
+            return self.__lazy_imps[key]
+        sys_paths, builtin_imps = self.__read_sysinfo()
+        importables = resolve_distribution(sys_paths, name, case, builtin_imps)
+        if importables is None:
+            self.__refresh_package_importable_mapping()
+            return self.__lookup_package(name, case)
+        self.__lazy_imps[key] = importables
+        return importables
+
     def __check_refresh_requirements(self, fresh):
-        if fresh:
-            self.__cached_packages_imps.clear()
-        else:
-            if (
-                time.time() - self.__time_last_activity
-                > PyEnv._cache_refresh_maximum_interval
-            ):
-                self.__cached_packages_imps.clear()
-        self.__time_last_activity = time.time()
-        if not self.__cached_packages_imps:
+        if self.__watcher is not None:
+            if self.__watcher.consume() or fresh or not self.__cached_packages_imps:
+                self.__refresh_package_importable_mapping()
+            return
+        time_now = time.time()
+        expired = (
+            time_now - self.__time_last_activity > PyEnv._cache_refresh_maximum_interval
+        )
+        self.__time_last_activity = time_now
+        if fresh or expired or not self.__cached_packages_imps:
             self.__refresh_package_importable_mapping()
 
     def ensurepip(self, output=False):
@@ -1228,7 +2107,9 @@ class PyEnv:
             return False
         scripts_dir_path = self.scripts_path()
         pipexe_path = os.path.join(scripts_dir_path, PIP_EXE)
-        pip3exe_path = os.path.join(scripts_dir_path, "pip3.exe")
+        pip3exe_path = os.path.join(
+            scripts_dir_path, "pip3" + os.path.splitext(PIP_EXE)[1]
+        )
         cmds = Command(self.interpreter, *_PIPCMDS["ENSUREPIP"])
         bool_result = not self.__execute(cmds, output, None)[1]
         if (
@@ -1287,12 +2168,14 @@ class PyEnv:
 
         此方法可以使用 'pywin32' 作为 module_or_pkg_name 参数，查询得到 ['win32api', 'win32con'...] 这样的结果。
 
+        尚未生成映射表时只读取该包的元数据，不扫描整个环境，结果与完整映射表中的相同。
+
         此方法不保证返回的名称列表中所有的名称用于 import 语句时都可以成功导入。
 
         ```
         :param module_or_pkg_name: str, 想要查询的包名、模块名。
 
-        :param case: bool, 是否对 module_or_pkg_name 大小写敏感。
+        :param case: bool, 是否对 module_or_pkg_name 大小写敏感，为 False 时按 PEP 503 规范化后比较，即同时忽略大小写及 '-'、'_'、'.' 的区别。
 
         :param fresh: bool, 控制是否刷新缓存再查询，如果为 False 则不主动刷新，如果缓存寿命(3s)超时或者没有缓存则会强制刷新。
         当你需要循环调用 query_for_import 方法查询大量 module_or_pkg_name 时，将此参数设为 False 可以使用缓存以加快查询速度。
@@ -1306,18 +2189,40 @@ class PyEnv:
             return list()
         if not isinstance(module_or_pkg_name, str):
             raise TypeError("参数 1 数据类型错误，数据类型应为 str")
-        self.__check_refresh_requirements(fresh)
-        for publish_name, value in self.__cached_packages_imps.items():
-            if case:
-                cased_value = publish_name
-            else:
-                cased_value = publish_name.lower()
-                module_or_pkg_name = module_or_pkg_name.lower()
-            if module_or_pkg_name == cased_value:
-                return list(value.keys())
-        return list()
+        importables = self.__query_package(module_or_pkg_name, case, fresh)
+        return list(importables) if importables is not None else list()
+
+    def query_for_imports(self, names: Iterable[str], *, case=True, fresh=False):
+        """
+        ### query_for_import 方法的批量版本，只检查一次缓存是否需要刷新。
+
+        ```
+        :param names: Iterable[str], 想要查询的包名、模块名。
+
+        :param case: bool, 是否对包名大小写敏感，详见 query_for_import 方法。
 
-    def query_for_import_path(self, module_or_pkg_name: str, *, case=True, fresh=False):
+        :param fresh: bool, 控制是否刷新缓存再查询，详见 query_for_import 方法。
+
+        :return: Dict[str, List[str]], {查询的名称: 用于 import 语句的名称列表} 字典，没有找到的名称对应空列表。
+        ```
+
+        包名非 str 则抛出 TypeError 异常。
+        """
+        names = list(names)
+        if not all(isinstance(n, str) for n in names):
+            raise TypeError("包名参数的数据类型应为字符串。")
+        if not self.env_path:
+            return {n: list() for n in names}
+        self.__check_refresh_requirements(fresh)
+        results = dict()
+        for name in names:
+            importables = self.__lookup_package(name, case)
+            results[name] = list(importables) if importables is not None else list()
+        return results
+
+    def query_for_import_path(
+        self, module_or_pkg_name: str, *, case=True, fresh=False, copy=True
+    ):
         """
         ### 通过包名称查询该包用于 import 语句的名称和路径（文件或目录路径）字典。
 
@@ -1325,16 +2230,20 @@ class PyEnv:
 
         此方法可以使用 'pywin32' 作为 module_or_pkg_name 参数，查询得到 {'win32api': 路径, 'win32con': 路径...} 这样的结果。
 
+        与 query_for_import 方法相同，尚未生成映射表时只读取该包的元数据。
+
         此方法不保证返回的(名称, 路径)列字典中所有的名称用于 import 语句时都可以成功导入，不保证路径都存在。
 
         ```
         :param module_or_pkg_name: str, 想要查询的包名、模块名。
 
-        :param case: bool, 是否对 module_or_pkg_name 大小写敏感。
+        :param case: bool, 是否对 module_or_pkg_name 大小写敏感，为 False 时按 PEP 503 规范化后比较，详见 query_for_import 方法。
 
         :param fresh: bool, 控制是否刷新缓存再查询，如果为 False 则不主动刷新，如果缓存寿命(3s)超时或者没有缓存则会强制刷新。
         当你需要循环调用 query_for_import 方法查询大量 module_or_pkg_name 时，将此参数设为 False 可以使用缓存以加快查询速度。
 
+        :param copy: bool, 是否返回可以修改的字典，为 False 时返回只读视图(types.MappingProxyType)而不复制。
+
         :return: Dict[str, str], 该包、模块的用于 import 语句的(名称, 路径)字典。
         ```
 
@@ -1344,16 +2253,46 @@ class PyEnv:
             return dict()
         if not isinstance(module_or_pkg_name, str):
             raise TypeError("参数 1 数据类型错误，数据类型应为 str")
+        importables = self.__query_package(module_or_pkg_name, case, fresh)
+        if importables is None:
+            importables = dict()
+        return importables.copy() if copy else MappingProxyType(importables)
+
+    def query_for_import_paths(
+        self, names: Iterable[str], *, case=True, fresh=False, copy=True
+    ):
+        """
+        ### query_for_import_path 方法的批量版本，只检查一次缓存是否需要刷新。
+
+        ```
+        :param names: Iterable[str], 想要查询的包名、模块名。
+
+        :param case: bool, 是否对包名大小写敏感，详见 query_for_import 方法。
+
+        :param fresh: bool, 控制是否刷新缓存再查询，详见 query_for_import 方法。
+
+        :param copy: bool, 是否返回可以修改的字典，详见 query_for_import_path 方法。
+
+        :return: Dict[str, Dict[str, str]], {查询的名称: {用于 import 语句的名称: 路径}} 字典，没有找到的名称对应空字典。
+        ```
+
+        包名非 str 则抛出 TypeError 异常。
+        """
+        names = list(names)
+        if not all(isinstance(n, str) for n in names):
+            raise TypeError("包名参数的数据类型应为字符串。")
+        if not self.env_path:
+            return {n: dict() for n in names}
         self.__check_refresh_requirements(fresh)
-        for publish_name, value in self.__cached_packages_imps.items():
-            if case:
-                cased_value = publish_name
-            else:
-                cased_value = publish_name.lower()
-                module_or_pkg_name = module_or_pkg_name.lower()
-            if module_or_pkg_name == cased_value:
-                return value.copy()
-        return dict()
+        results = dict()
+        for name in names:
+            importables = self.__lookup_package(name, case)
+            if importables is None:
+                importables = dict()
+            results[name] = (
+                importables.copy() if copy else MappingProxyType(importables)
+            )
+        return results
 
     def query_for_install(self, name_used_for_import, *, case=True, fresh=False):
         """
@@ -1378,20 +2317,141 @@ class PyEnv:
         """
         if not self.env_path:
             return EMPTY_STR
+        pkgnames = self.query_for_install_all(
+            name_used_for_import, case=case, fresh=fresh
+        )
+        return pkgnames[0] if pkgnames else EMPTY_STR
+
+    def query_for_install_all(self, name_used_for_import, *, case=True, fresh=False):
+        """
+        ### 通过 import 语句所使用的名称反向查询提供该名称的所有包名。
+
+        与 query_for_install 方法不同，当多个包提供同一个导入名时(例如命名空间包)返回所有这些包名。
+
+        查询使用与映射表同时生成的反向索引，每次查询的耗时与映射表大小无关。
+
+        ```
+        :param name_used_for_import: str, import 语句所使用的模块名称。
+
+        :param case: bool, 是否对 name_used_for_import 大小写敏感。
+
+        :param fresh: bool, 控制是否刷新缓存后查询，详见 query_for_install 方法。
+
+        :return: list[str], 包名列表，按映射表中的顺序排列，没有找到则返回空列表。
+        ```
+
+        `name_used_for_import 不是 str 类型则抛出 TypeError 异常。`
+        """
+        if not self.env_path:
+            return list()
         if not isinstance(name_used_for_import, str):
             raise TypeError("参数 1 类型错误，类型应为 str")
         self.__check_refresh_requirements(fresh)
-        for publish_name, value in self.__cached_packages_imps.items():
-            if case:
-                cased_value = value
+        if case:
+            return list(self.__import_index.get(name_used_for_import, ()))
+        return list(self.__import_index_folded.get(name_used_for_import.lower(), ()))
+
+    @classmethod
+    def __import_cache(cls, root: str) -> ImportCache:
+        """### 获取源码目录对应的导入名缓存，启用磁盘缓存时缓存文件保存在磁盘缓存目录中。"""
+        key = os.path.normcase(root)
+        cache_file = None
+        if cls._disk_cache is not None:
+            digest = hashlib.sha1(key.encode("utf-8", "surrogatepass")).hexdigest()
+            cache_file = os.path.join(
+                cls._disk_cache.cache_dir, "imports-{}.json".format(digest[:16])
+            )
+            key = cache_file
+        with PyEnv.__IMPORT_CACHES_LOCK:
+            cache = PyEnv.__IMPORT_CACHES.get(key)
+            if cache is None:
+                cache = PyEnv.__IMPORT_CACHES[key] = ImportCache(cache_file)
+        return cache
+
+    def __stdlib_checker(self, info: Dict[str, Any]) -> Callable[[str], bool]:
+        """### 返回判断映射表中的路径是否属于标准库的函数：路径直接位于标准库目录或标准库目录中的非 site 目录下。"""
+        stdlib_dirs = tuple(
+            os.path.normcase(os.path.join(d, EMPTY_STR))
+            for d in info.get("stdlib_dirs", ())
+        )
+        stdlib_hosts = set(os.path.normcase(d) for d in info.get("stdlib_dirs", ()))
+        for host in info.get("sys_path", ()):
+            host = os.path.normcase(host)
+            if host.startswith(stdlib_dirs) and os.path.basename(host) not in (
+                "site-packages",
+                "dist-packages",
+            ):
+                stdlib_hosts.add(host)
+        return lambda path: os.path.dirname(os.path.normcase(path)) in stdlib_hosts
+
+    def resolve_imports(self, path: str, *, fresh=False, workers=None):
+        """
+        ### 解析源码目录(或单个 .py 文件)中所有的绝对导入语句，批量反查提供这些导入名的包。
+
+        各文件的导入名以文件内容的散列值为键缓存(启用磁盘缓存时同时保存到磁盘缓存目录)，
+
+        再次解析同一目录时只读取大小或修改时间发生变化的文件，只解析内容发生变化的文件，详见 collect_imports 函数。
+
+        导入名按最长前缀在反向索引中查找，例如 'google.protobuf' 先查找 'google.protobuf' 再查找 'google'。
+
+        内置模块、标准库模块及源码目录自身的顶层模块(目录及其中 src 目录下的模块和包，path 为文件时为其所在目录)被排除在外。
+
+        需要解析的文件较多时使用进程池，Windows 上调用者的主模块须以 if __name__ == "__main__" 保护入口代码。
+
+        ```
+        :param path: str, 源码目录或 .py 文件路径。
+
+        :param fresh: bool, 控制是否刷新映射表后查询，详见 query_for_install 方法。
+
+        :param workers: int or None, 解析文件所用的进程数，None 表示使用 CPU 核心数，小于 2 时在当前进程中解析。
+
+        :return: tuple[list[str], list[str]], (包名列表, 未能反查到包的顶层导入名列表)，包名去重后按规范化名称排序，当前环境无效时均为空列表。
+        ```
+
+        `path 不是 str 类型则抛出 TypeError 异常，路径不存在则抛出 FileNotFoundError 异常。`
+        """
+        if not isinstance(path, str):
+            raise TypeError("参数 path 类型错误，类型应为 str")
+        if not os.path.exists(path):
+            raise FileNotFoundError("路径不存在：{}".format(path))
+        if not self.env_path:
+            return list(), list()
+        root = os.path.abspath(path)
+        file_imports = collect_imports(root, self.__import_cache(root), workers)
+        self.__check_refresh_requirements(fresh)
+        info = self.__probe()
+        excluded = set(info.get("builtins", ()))
+        excluded.update(info.get("stdlib_names", ()))
+        excluded.update(
+            local_module_names(root if os.path.isdir(root) else os.path.dirname(root))
+        )
+        is_stdlib = self.__stdlib_checker(info)
+        requirements: Dict[str, str] = dict()
+        unresolved: Set[str] = set()
+        resolved: Set[str] = set()
+        for name in set().union(*file_imports.values()):
+            top_name = name.partition(".")[0]
+            if top_name in excluded:
+                continue
+            parts = name.split(".")
+            for end in range(len(parts), 0, -1):
+                prefix = ".".join(parts[:end])
+                pkgnames = self.__import_index.get(prefix)
+                if pkgnames:
+                    break
             else:
-                name_used_for_import = name_used_for_import.lower()
-                cased_value = {i.lower() for i in value.keys()}
-            if name_used_for_import in cased_value:
-                return publish_name
-        return EMPTY_STR
+                unresolved.add(top_name)
+                continue
+            resolved.add(top_name)
+            imppath = self.__cached_packages_imps[pkgnames[0]].get(prefix)
+            if not imppath or is_stdlib(imppath):
+                continue
+            requirements.setdefault(canonical_name(pkgnames[0]), pkgnames[0])
+        # 顶层名称本身未能反查而其子模块由包提供时(如命名空间包)不视为未能反查
+        unresolved.difference_update(resolved)
+        return [requirements[k] for k in sorted(requirements)], sorted(unresolved)
 
-    def pkgimp_mapping(self, fresh=False):
+    def pkgimp_mapping(self, fresh=False, copy=True):
         """
         ### 获取本环境下包名与导入名的映射表
 
@@ -1399,11 +2459,32 @@ class PyEnv:
         :param fresh: bool, 控制是否刷新缓存后查询，如果为 False 则不主动刷新，如果缓存寿命(3s)超时或者没有缓存则会强制刷新。
         如果需要在极短时间内循环调用这个方法且没有刷新需求，则把 fresh 参数设为 False 可以加快查询速度。
 
-        :return: dict[pkg_name: str, imp_names: set[str]], 包名与导入名映射表
+        :param copy: bool, 是否返回可以修改的副本，为 False 时返回与 pkgimp_snapshot 方法相同的只读视图而不复制。
+
+        :return: dict[pkg_name: str, dict[imp_name: str, path: str]], 包名与导入名(及其路径)映射表
+        ```
+        """
+        self.__check_refresh_requirements(fresh)
+        if not copy:
+            return self.__mapping_snapshot
+        return {k: dict(v) for k, v in self.__cached_packages_imps.items()}
+
+    def pkgimp_snapshot(self, fresh=False) -> Mapping[str, Mapping[str, str]]:
+        """
+        ### 获取本环境下包名与导入名映射表的只读视图(types.MappingProxyType)，不复制映射表。
+
+        视图在映射表刷新时整体替换而不是原地修改，已取得的视图始终保持取得时的内容，可以安全地在多个调用者及线程间共享；
+
+        映射表没有变化时(包括增量刷新后没有变化)返回同一个对象，调用者可以据此(is 比较)判断是否需要更新界面。
+
+        ```
+        :param fresh: bool, 控制是否刷新缓存后查询，详见 pkgimp_mapping 方法。
+
+        :return: Mapping[str, Mapping[str, str]], {包名: {导入名: 路径}} 只读视图。
         ```
         """
         self.__check_refresh_requirements(fresh)
-        return deepcopy(self.__cached_packages_imps)
+        return self.__mapping_snapshot
 
     @staticmethod
     def __clear_freezed_info(string: str):
@@ -1442,8 +2523,25 @@ class PyEnv:
         :return: bool, 本方法的执行结果，成功返回 True，失败返回 False
         ```
         """
-        if not self.pip_ready:
+        cmds_path = self._freeze_command(dir_path, file_name, user, all_pkg)
+        if cmds_path is None:
             return False
+        command, file_fullpath = cmds_path
+        string, result = self.__execute(command, False, None)
+        if result:
+            return False
+        return self._save_freezed(string, file_fullpath, no_path)
+
+    def _freeze_command(
+        self, dir_path: str, file_name: str, user: bool, all_pkg: bool
+    ) -> Optional[Tuple[Command, str]]:
+        """
+        ### 校验 freeze 方法的参数、准备保存目录并生成导出命令。
+
+        返回(命令, 保存文件路径)元组，pip 不可用时返回 None。
+        """
+        if not self.pip_ready:
+            return None
         if not isinstance(dir_path, str):
             raise TypeError("参数 1 必须是 str 类型")
         if file_name is None:
@@ -1462,9 +2560,10 @@ class PyEnv:
             command.append("--all")
         if user:
             command.append("--user")
-        string, result = self.__execute(command, False, None)
-        if result:
-            return False
+        return command, file_fullpath
+
+    def _save_freezed(self, string: str, file_fullpath: str, no_path: bool) -> bool:
+        """### 将 pip freeze 命令的输出保存到文件。"""
         if no_path:
             string = self.__clear_freezed_info(string)
         try:
@@ -1474,31 +2573,22 @@ class PyEnv:
         except Exception:
             return False
 
+    @staticmethod
+    def __site_home(info: Dict[str, Any]) -> str:
+        """### 从探测结果的 site 目录列表中选出全局第三方包安装目录。"""
+        for site_string in info.get("sites", list()):
+            if site_string.lower().endswith(SITEPKG_NAME.lower()):
+                return site_string
+        return EMPTY_STR
+
     def site_packages_home(self) -> str:
         """### 返回全局第三方包安装目录的完整路径"""
         if not self.env_is_valid:
             return EMPTY_STR
-        command = Command(self.interpreter, *CmdRead.SITES.value)
-        string, result = self.__execute(command, False, None)
-        if not string or result:
-            return EMPTY_STR
-        str_matched = self.__sitepkg_pattern.search(string)
-        if str_matched is None:
-            return EMPTY_STR
-        site_list: List[str] = eval(str_matched.group())
-        if not isinstance(site_list, list):
-            return EMPTY_STR
-        for site_string in site_list:
-            if site_string.lower().endswith(SITEPKG_NAME.lower()):
-                return site_string
-        return EMPTY_STR
+        return self.__site_home(self.__probe())
 
     def user_site_packages_home(self) -> str:
         """### 返回用户侧第三方包安装目录的完整路径"""
         if not self.env_is_valid:
             return EMPTY_STR
-        command = Command(self.interpreter, *CmdRead.USERSITE.value)
-        string, result = self.__execute(command, False, None)
-        if result:
-            return EMPTY_STR
-        return string.strip()
+        return self.__probe().get("user_site", EMPTY_STR)
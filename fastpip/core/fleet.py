@@ -0,0 +1,266 @@
+# coding: utf-8
+
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import *
+
+from ..utils.findpath import all_py_paths
+from .fastpip import PyEnv
+
+__all__ = ["EnvFleet", "FleetResult"]
+
+# 接受 timeout 参数的 PyEnv 方法，EnvFleet 会将每个环境的超时时长传递给它们以便结束超时的 pip 进程
+_TIMEOUT_METHODS = {
+    "download",
+    "install",
+    "outdated",
+    "pkg_names",
+    "pkgs_info",
+    "uninstall",
+    "upgrade_pip",
+}
+# 设置了超时时长时检查各任务是否超时的轮询间隔，单位为秒
+_POLL_INTERVAL = 0.1
+
+
+class FleetResult:
+    """### EnvFleet 中单个 Python 环境的执行结果。"""
+
+    def __init__(self, path: str, value=None, error=None, elapsed=0.0):
+        self.__path = path
+        self.__value = value
+        self.__error = error
+        self.__elapsed = elapsed
+
+    def __str__(self):
+        if self.__error is not None:
+            return "FleetResult(path={}, error={!r}, elapsed={:.3f})".format(
+                self.__path, self.__error, self.__elapsed
+            )
+        return "FleetResult(path={}, value={!r}, elapsed={:.3f})".format(
+            self.__path, self.__value, self.__elapsed
+        )
+
+    __repr__ = __str__
+
+    @property
+    def path(self) -> str:
+        """### Python 环境目录路径。"""
+        return self.__path
+
+    @property
+    def value(self):
+        """### PyEnv 方法的返回值，执行出错时为 None。"""
+        return self.__value
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        """### 执行过程中抛出的异常，超时则为 TimeoutError 实例，成功时为 None。"""
+        return self.__error
+
+    @property
+    def ok(self) -> bool:
+        """### 是否执行成功(未抛出异常且未超时)。"""
+        return self.__error is None
+
+    @property
+    def elapsed(self) -> float:
+        """### 从开始执行到得到结果所用的时间，单位为秒。"""
+        return self.__elapsed
+
+
+def _call_method(env: PyEnv, method: str, args, kwargs):
+    """### 执行 PyEnv 的方法，返回(开始时间, 返回值, 异常)元组，异常不会抛出。"""
+    started = time.monotonic()
+    try:
+        attribute = getattr(env, method)
+        if callable(attribute):
+            return started, attribute(*args, **kwargs), None
+        return started, attribute, None
+    except Exception as exc:
+        return started, None, exc
+
+
+def _call_in_process(path: str, method: str, args, kwargs):
+    """### 进程池中执行的函数，必须是模块级函数才能被 pickle。"""
+    return _call_method(PyEnv(path), method, args, kwargs)
+
+
+class EnvFleet:
+    """
+    ### 多个 Python 环境组成的环境组，用于并行地在所有环境中执行同一个 PyEnv 操作。
+
+    各环境的操作在线程池(默认)或进程池中并发执行，结果按完成先后顺序逐个产出，
+
+    单个环境的异常或超时被记录在对应的 FleetResult 中而不会抛出，所以整组操作的耗时约等于最慢的那个环境的耗时。
+    """
+
+    def __init__(
+        self,
+        paths: Optional[Iterable[str]] = None,
+        *,
+        max_workers: Optional[int] = None,
+        use_processes: bool = False,
+    ):
+        """
+        ### EnvFleet 类初始化方法。
+
+        ```
+        :param paths: Iterable[str] or None, Python 环境目录路径列表，None 表示使用 all_py_paths 函数查找到的所有环境。
+
+        :param max_workers: int or None, 最大并发数，None 表示由 concurrent.futures 决定。
+
+        :param use_processes: bool, 是否使用进程池代替线程池，默认 False。
+        使用进程池时，调用 EnvFleet 方法的代码在 Windows 上需位于 if __name__ == "__main__" 语句块内，且每次执行都会重新创建 PyEnv 实例，无法复用实例内的缓存。
+        ```
+
+        `路径中有非 str 类型数据则抛出 TypeError 异常；`
+
+        `max_workers 不是 None 或正整数则抛出 ValueError 异常。`
+        """
+        if paths is None:
+            paths = all_py_paths()
+        paths = list(paths)
+        if not all(isinstance(p, str) for p in paths):
+            raise TypeError("路径参数的数据类型应为字符串。")
+        if max_workers is not None and (
+            not isinstance(max_workers, int) or max_workers < 1
+        ):
+            raise ValueError("参数 max_workers 的值应为 None 或正整数。")
+        self.__envs: Dict[str, PyEnv] = {p: PyEnv(p) for p in paths}
+        self.__max_workers = max_workers
+        self.__use_processes = use_processes
+
+    def __len__(self):
+        return len(self.__envs)
+
+    def __iter__(self):
+        return iter(self.__envs.values())
+
+    def __str__(self):
+        return "EnvFleet({})".format(", ".join(self.__envs))
+
+    __repr__ = __str__
+
+    @property
+    def paths(self) -> List[str]:
+        """### 环境组中所有 Python 环境的目录路径。"""
+        return list(self.__envs)
+
+    def __executor(self) -> Executor:
+        if self.__use_processes:
+            return ProcessPoolExecutor(self.__max_workers)
+        return ThreadPoolExecutor(self.__max_workers)
+
+    def run(
+        self,
+        method: str,
+        *args,
+        timeout: Union[int, float, None] = None,
+        **kwargs,
+    ) -> Iterator[FleetResult]:
+        """
+        ### 在所有环境中并发执行 PyEnv 的 method 方法(或读取 method 属性)，按完成先后顺序产出结果。
+
+        ```
+        :param method: str, PyEnv 的方法名或属性名，例如 'outdated'、'install'、'py_info'。
+
+        :param args: 传递给该方法的位置参数。
+
+        :param timeout: int or float or None, 每个环境的超时时长，单位为秒，从该环境开始执行时计时。
+        对于接受 timeout 参数的方法(install、outdated 等)，该值同时作为其 timeout 参数传入以结束超时的 pip 进程。
+
+        :param kwargs: 传递给该方法的关键字参数。
+
+        :return: Iterator[FleetResult], 各环境的执行结果，执行出错或超时的环境其 error 属性为对应的异常。
+        ```
+
+        `method 不是 PyEnv 的公开方法或属性则抛出 ValueError 异常。`
+        """
+        if method.startswith("_") or not hasattr(PyEnv, method):
+            raise ValueError("PyEnv 没有名为 {} 的方法或属性。".format(method))
+        if timeout is not None:
+            PyEnv._check_timeout_num(timeout)
+            if method in _TIMEOUT_METHODS:
+                kwargs["timeout"] = timeout
+        # 参数在调用时即校验，所以实际执行放在另一个生成器中
+        return self.__run(method, args, timeout, kwargs)
+
+    def __run(self, method, args, timeout, kwargs) -> Iterator[FleetResult]:
+        executor = self.__executor()
+        futures: Dict[Future, str] = dict()
+        started: Dict[Future, float] = dict()
+        try:
+            for path, env in self.__envs.items():
+                if self.__use_processes:
+                    future = executor.submit(
+                        _call_in_process, path, method, args, kwargs
+                    )
+                else:
+                    future = executor.submit(_call_method, env, method, args, kwargs)
+                futures[future] = path
+            pending = set(futures)
+            while pending:
+                now = time.monotonic()
+                for future in pending:
+                    if future not in started and (future.running() or future.done()):
+                        started[future] = now
+                wait_time = None
+                if timeout is not None:
+                    wait_time = _POLL_INTERVAL
+                done, pending = wait(pending, wait_time, FIRST_COMPLETED)
+                now = time.monotonic()
+                for future in done:
+                    try:
+                        start, value, error = future.result()
+                    except Exception as exc:  # 例如进程池中的子进程意外退出
+                        start, value, error = started.get(future, now), None, exc
+                    yield FleetResult(futures[future], value, error, now - start)
+                if timeout is None:
+                    continue
+                for future in list(pending):
+                    if future in started and now - started[future] > timeout:
+                        pending.discard(future)
+                        future.cancel()
+                        yield FleetResult(
+                            futures[future],
+                            error=TimeoutError("执行超时：{}".format(futures[future])),
+                            elapsed=now - started[future],
+                        )
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def run_all(
+        self,
+        method: str,
+        *args,
+        timeout: Union[int, float, None] = None,
+        **kwargs,
+    ) -> Dict[str, FleetResult]:
+        """### 与 run 方法相同，但等待全部环境执行完毕后返回 {环境路径: FleetResult} 字典。"""
+        return {r.path: r for r in self.run(method, *args, timeout=timeout, **kwargs)}
+
+    def pkgs_info(self, *, timeout=None, fast=False) -> Iterator[FleetResult]:
+        """### 在所有环境中执行 pkgs_info 方法，详见 run 方法及 PyEnv.pkgs_info 方法。"""
+        return self.run("pkgs_info", timeout=timeout, fast=fast)
+
+    def outdated(self, *, timeout=60) -> Iterator[FleetResult]:
+        """### 在所有环境中执行 outdated 方法，详见 run 方法及 PyEnv.outdated 方法。"""
+        return self.run("outdated", timeout=timeout)
+
+    def install(self, *names, **kwargs) -> Iterator[FleetResult]:
+        """### 在所有环境中执行 install 方法，详见 run 方法及 PyEnv.install 方法。"""
+        return self.run("install", *names, **kwargs)
+
+    def uninstall(self, *names, **kwargs) -> Iterator[FleetResult]:
+        """### 在所有环境中执行 uninstall 方法，详见 run 方法及 PyEnv.uninstall 方法。"""
+        return self.run("uninstall", *names, **kwargs)
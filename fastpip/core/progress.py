@@ -0,0 +1,284 @@
+# coding: utf-8
+
+import re
+import time
+from typing import *
+
+from ..com.common import *
+
+__all__ = ["ProgressEvent", "ProgressParser"]
+
+# pip 输出的文件大小单位，pip 使用十进制单位
+_SIZE_UNITS = {"bytes": 1, "kB": 10**3, "MB": 10**6, "GB": 10**9}
+_collecting_pattern = re.compile(r"^\s*Collecting ([A-Za-z0-9][A-Za-z0-9._\-]*)")
+_downloading_pattern = re.compile(
+    r"^\s*Downloading (\S+)(?:\s+\((\d+(?:\.\d+)?)\s*(bytes|kB|MB|GB)\))?"
+)
+# --progress-bar raw 模式(pip 24.1 及以上版本)输出的下载进度
+_raw_progress_pattern = re.compile(r"^\s*Progress (\d+) of (\d+)\s*$")
+_building_pattern = re.compile(
+    r"^\s*Building wheel for (\S+) \(.*?\)(?::| \.\.\.)\s*(.*)$"
+)
+_installing_pattern = re.compile(r"^\s*Installing collected packages: (.+)$")
+_saved_pattern = re.compile(r"^\s*Saved (.+)$")
+_successfully_pattern = re.compile(r"^\s*Successfully (?:installed|downloaded) .+$")
+_error_pattern = re.compile(r"^\s*ERROR: (.+)$")
+
+
+class ProgressEvent:
+    """
+    ### pip 安装或下载过程中的进度事件。
+
+    kind 属性为事件类型，可选值为类属性 COLLECTING、DOWNLOADING、BUILDING、INSTALLING、DONE、FAILED 之一。
+
+    每个阶段(收集、下载、构建、安装)开始时产生一个 finished 为 False 的事件，结束时产生一个 finished 为 True 的事件，
+
+    结束事件的 duration 属性为该阶段的耗时；下载阶段的事件还包含已下载字节数、总字节数及下载速率。
+    """
+
+    COLLECTING = "collecting"
+    DOWNLOADING = "downloading"
+    BUILDING = "building"
+    INSTALLING = "installing"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(
+        self,
+        kind: str,
+        package: str = EMPTY_STR,
+        detail: str = EMPTY_STR,
+        *,
+        finished: bool = False,
+        bytes_done: Optional[int] = None,
+        bytes_total: Optional[int] = None,
+        elapsed: float = 0.0,
+        duration: float = 0.0,
+    ):
+        self.__kind = kind
+        self.__package = package
+        self.__detail = detail
+        self.__finished = finished
+        self.__bytes_done = bytes_done
+        self.__bytes_total = bytes_total
+        self.__elapsed = elapsed
+        self.__duration = duration
+
+    def __str__(self):
+        return (
+            "ProgressEvent(kind={}, package={}, finished={}, bytes={}/{}, "
+            "duration={:.3f}, rate={})".format(
+                self.__kind,
+                self.__package,
+                self.__finished,
+                self.__bytes_done,
+                self.__bytes_total,
+                self.__duration,
+                self.rate,
+            )
+        )
+
+    __repr__ = __str__
+
+    @property
+    def kind(self) -> str:
+        """### 事件类型。"""
+        return self.__kind
+
+    @property
+    def package(self) -> str:
+        """### 事件相关的包名，安装阶段为以逗号分隔的多个包名，DONE 和 FAILED 事件为空字符串。"""
+        return self.__package
+
+    @property
+    def detail(self) -> str:
+        """### 附加信息，例如下载的文件名、构建状态、保存路径、失败时的错误信息。"""
+        return self.__detail
+
+    @property
+    def finished(self) -> bool:
+        """### 该阶段是否已结束，DONE 和 FAILED 事件总为 True。"""
+        return self.__finished
+
+    @property
+    def bytes_done(self) -> Optional[int]:
+        """### 已下载的字节数，非下载事件或未知时为 None。"""
+        return self.__bytes_done
+
+    @property
+    def bytes_total(self) -> Optional[int]:
+        """### 下载文件的总字节数，非下载事件或未知时为 None。"""
+        return self.__bytes_total
+
+    @property
+    def elapsed(self) -> float:
+        """### 从命令开始执行到产生该事件所经过的时间，单位为秒。"""
+        return self.__elapsed
+
+    @property
+    def duration(self) -> float:
+        """### 从该阶段开始到产生该事件所经过的时间，单位为秒；DONE 和 FAILED 事件为命令总耗时。"""
+        return self.__duration
+
+    @property
+    def rate(self) -> Optional[float]:
+        """### 下载速率，单位为字节每秒，无法计算时为 None。"""
+        if not self.__bytes_done or self.__duration <= 0:
+            return None
+        return self.__bytes_done / self.__duration
+
+
+class _Stage:
+    """### 正在进行的阶段。"""
+
+    def __init__(self, kind, package, detail, started, bytes_total=None):
+        self.kind = kind
+        self.package = package
+        self.detail = detail
+        self.started = started
+        self.bytes_done: Optional[int] = None
+        self.bytes_total = bytes_total
+
+
+class ProgressParser:
+    """
+    ### 将 pip install 或 pip download 的输出逐行解析为 ProgressEvent。
+
+    未使用 --progress-bar raw 时 pip 不输出下载进度，此时以 Downloading 行到下一个阶段开始之间的时间作为下载耗时，
+
+    并以 pip 显示的文件大小计算下载速率；使用 --progress-bar raw 时则根据 Progress 行实时计算。
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        """
+        ```
+        :param clock: Callable, 返回当前时间(秒)的函数，默认 time.monotonic。
+        ```
+        """
+        self.__clock = clock
+        self.__started = clock()
+        self.__stage: Optional[_Stage] = None
+        self.__package = EMPTY_STR
+        self.__last_error = EMPTY_STR
+        self.__last_success = EMPTY_STR
+        self.__finished = False
+
+    def __event(self, stage: _Stage, now: float, finished: bool) -> ProgressEvent:
+        return ProgressEvent(
+            stage.kind,
+            stage.package,
+            stage.detail,
+            finished=finished,
+            bytes_done=stage.bytes_done,
+            bytes_total=stage.bytes_total,
+            elapsed=now - self.__started,
+            duration=now - stage.started,
+        )
+
+    def __close_stage(self, now: float, complete=True) -> List[ProgressEvent]:
+        stage, self.__stage = self.__stage, None
+        if stage is None:
+            return []
+        if (
+            complete
+            and stage.kind == ProgressEvent.DOWNLOADING
+            and stage.bytes_total is not None
+        ):
+            stage.bytes_done = stage.bytes_total
+        return [self.__event(stage, now, True)]
+
+    def __open_stage(self, now: float, *args, **kwargs) -> List[ProgressEvent]:
+        events = self.__close_stage(now)
+        self.__stage = _Stage(*args, started=now, **kwargs)
+        events.append(self.__event(self.__stage, now, False))
+        return events
+
+    def feed(self, line: str) -> List[ProgressEvent]:
+        """
+        ### 解析一行 pip 输出，返回由该行产生的事件列表(可能为空)。
+
+        ```
+        :param line: str, pip 输出的一行文本。
+
+        :return: list[ProgressEvent], 事件列表。
+        ```
+        """
+        now = self.__clock()
+        stage = self.__stage
+        matched = _raw_progress_pattern.match(line)
+        if matched:
+            if stage is None or stage.kind != ProgressEvent.DOWNLOADING:
+                return []
+            stage.bytes_done = int(matched.group(1))
+            stage.bytes_total = int(matched.group(2)) or stage.bytes_total
+            return [self.__event(stage, now, False)]
+        matched = _collecting_pattern.match(line)
+        if matched:
+            self.__package = matched.group(1)
+            return self.__open_stage(
+                now, ProgressEvent.COLLECTING, self.__package, EMPTY_STR
+            )
+        matched = _downloading_pattern.match(line)
+        if matched:
+            filename, size, unit = matched.groups()
+            total = None
+            if size is not None:
+                total = int(float(size) * _SIZE_UNITS[unit])
+            return self.__open_stage(
+                now,
+                ProgressEvent.DOWNLOADING,
+                self.__package,
+                filename,
+                bytes_total=total,
+            )
+        matched = _building_pattern.match(line)
+        if matched:
+            package, status = matched.groups()
+            if stage is not None and stage.kind == ProgressEvent.BUILDING:
+                if stage.package == package and status != "started":
+                    stage.detail = status
+                    return self.__close_stage(now)
+            return self.__open_stage(now, ProgressEvent.BUILDING, package, status)
+        matched = _installing_pattern.match(line)
+        if matched:
+            return self.__open_stage(
+                now, ProgressEvent.INSTALLING, matched.group(1), EMPTY_STR
+            )
+        matched = _saved_pattern.match(line)
+        if matched and stage is not None:
+            stage.detail = matched.group(1)
+            return self.__close_stage(now)
+        if _successfully_pattern.match(line):
+            self.__last_success = line.strip()
+            return self.__close_stage(now)
+        matched = _error_pattern.match(line)
+        if matched:
+            self.__last_error = matched.group(1).strip()
+        return []
+
+    def finish(self, success: bool) -> List[ProgressEvent]:
+        """
+        ### 命令结束后调用，结束正在进行的阶段并产生 DONE 或 FAILED 事件，重复调用返回空列表。
+
+        ```
+        :param success: bool, 命令是否执行成功。
+
+        :return: list[ProgressEvent], 事件列表，最后一个事件为 DONE 或 FAILED 事件。
+        ```
+        """
+        if self.__finished:
+            return []
+        self.__finished = True
+        now = self.__clock()
+        events = self.__close_stage(now, success)
+        elapsed = now - self.__started
+        if success:
+            kind, detail = ProgressEvent.DONE, self.__last_success
+        else:
+            kind, detail = ProgressEvent.FAILED, self.__last_error
+        events.append(
+            ProgressEvent(
+                kind, detail=detail, finished=True, elapsed=elapsed, duration=elapsed
+            )
+        )
+        return events
@@ -0,0 +1,278 @@
+# coding: utf-8
+
+import json
+import os
+import threading
+import time
+from queue import Empty, Queue
+from subprocess import PIPE, DEVNULL, Popen
+from typing import *
+
+from ..com.common import *
+from ..utils.cmdutil import Command
+
+__all__ = ["PyWorker"]
+
+# 常驻子解释器脚本：复用环境探测脚本，逐行读取 JSON 请求并逐行输出 JSON 响应
+# 脚本需兼容较旧的 Python 3 版本，所以不使用 f-string 等新语法
+WORKER_CODE = PROBE_CODE + """
+def _metadata(name):
+    try:
+        from importlib import metadata
+    except ImportError:
+        return None
+    try:
+        dist = metadata.distribution(name)
+    except metadata.PackageNotFoundError:
+        return None
+    meta = dist.metadata
+    return {
+        "name": meta["Name"],
+        "version": dist.version,
+        "summary": meta.get("Summary") or "",
+        "requires": dist.requires or [],
+        "location": str(dist.locate_file("")),
+    }
+
+def _site():
+    info = _probe()
+    return {
+        "sites": info["sites"],
+        "user_site": info["user_site"],
+        "enable_user_site": bool(site.ENABLE_USER_SITE),
+    }
+
+_HANDLERS = {
+    "ping": lambda: "pong",
+    "probe": _probe,
+    "version": lambda: sys.version,
+    "sys_path": lambda: sys.path[1:],
+    "metadata": _metadata,
+    "site": _site,
+}
+
+def _serve():
+    # 响应写入原标准输出的副本，处理请求期间的其他输出(包括直接写入文件描述符 1 的)都转到标准错误
+    out = os.fdopen(os.dup(1), "w")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break
+        request = {}
+        try:
+            request = json.loads(line)
+            result = _HANDLERS[request["op"]](*request.get("args", []))
+            response = {"id": request.get("id"), "ok": True, "result": result}
+        except Exception as e:
+            error = "%s: %s" % (type(e).__name__, e)
+            response = {"id": request.get("id"), "ok": False, "error": error}
+        out.write(json.dumps(response) + "\\n")
+        out.flush()
+
+_serve()
+"""
+
+
+class PyWorker:
+    """
+    ### 常驻的目标环境子解释器。
+
+    用于只读查询(版本信息、sys.path、importlib.metadata、site 信息等)，子解释器只启动一次，
+
+    之后通过标准输入输出逐行收发 JSON 请求与响应，避免每次查询都重新启动解释器。
+
+    空闲超过 idle_timeout 秒后子解释器自动退出，下次请求时自动重新启动；
+
+    每次请求前检查解释器及 site 目录的状态指纹，发生变化(例如解释器被替换、安装了新的包)时重新启动子解释器，
+
+    因为子解释器的 sys.path 等信息在启动时就已确定，之后不会自动更新。
+
+    可以作为上下文管理器使用，退出上下文时关闭子解释器。
+    """
+
+    # 子解释器可处理的请求类型
+    OPERATIONS = ("ping", "probe", "version", "sys_path", "metadata", "site")
+
+    def __init__(
+        self,
+        interpreter: str,
+        *,
+        idle_timeout: Union[int, float, None] = 60,
+        startupinfo=None,
+    ):
+        """
+        ### PyWorker 类初始化方法，初始化时并不启动子解释器。
+
+        ```
+        :param interpreter: str, 目标 Python 解释器的绝对路径。
+
+        :param idle_timeout: int or float or None, 空闲多少秒后关闭子解释器，None 表示不自动关闭，默认 60。
+
+        :param startupinfo: subprocess.STARTUPINFO or None, 启动子解释器时使用的 STARTUPINFO。
+        ```
+        """
+        if not isinstance(idle_timeout, (int, float, type(None))):
+            raise TypeError("参数 idle_timeout 值应为 None、整数或浮点数。")
+        self.__interpreter = interpreter
+        self.__idle_timeout = idle_timeout
+        self.__startupinfo = startupinfo
+        self.__lock = threading.RLock()
+        self.__process: Optional[Popen] = None
+        self.__responses: Queue = Queue()
+        self.__watched: List[str] = list()
+        self.__fingerprint = tuple()
+        self.__idle_timer: Optional[threading.Timer] = None
+        self.__request_id = 0
+        # 每次启动子解释器时生成，与请求序号一起组成请求标识，避免把其他输出误认为响应
+        self.__session = EMPTY_STR
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    @property
+    def interpreter(self):
+        return self.__interpreter
+
+    @property
+    def alive(self) -> bool:
+        """### 子解释器当前是否正在运行。"""
+        return self.__process is not None and self.__process.poll() is None
+
+    @staticmethod
+    def __pump(stdout, responses: Queue):
+        """### 读取子解释器输出的线程函数，子解释器退出后放入 None 作为结束标记。"""
+        for line in iter(stdout.readline, b""):
+            responses.put(line)
+        responses.put(None)
+
+    def __start(self):
+        cmds = Command(self.__interpreter, "-c", WORKER_CODE)
+        self.__responses = Queue()
+        self.__session = os.urandom(8).hex()
+        self.__process = Popen(
+            cmds,
+            stdin=PIPE,
+            stdout=PIPE,
+            stderr=DEVNULL,
+            startupinfo=self.__startupinfo,
+            cwd=os.path.dirname(cmds.executable),
+            env=cmds.environment(),
+        )
+        threading.Thread(
+            target=self.__pump,
+            args=(self.__process.stdout, self.__responses),
+            daemon=True,
+        ).start()
+        try:
+            site_info = self.__send("site", (), 30)
+            self.__watched = [self.__interpreter, *site_info["sites"]]
+            if site_info["user_site"]:
+                self.__watched.append(site_info["user_site"])
+        except Exception:
+            self.__stop()
+            raise
+        self.__fingerprint = stat_fingerprint(*self.__watched)
+
+    def __stop(self):
+        if self.__idle_timer is not None:
+            self.__idle_timer.cancel()
+            self.__idle_timer = None
+        process, self.__process = self.__process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(2)
+        except Exception:
+            process.kill()
+            process.wait()
+
+    def __reset_idle_timer(self):
+        if self.__idle_timer is not None:
+            self.__idle_timer.cancel()
+        if self.__idle_timeout is None:
+            return
+        self.__idle_timer = threading.Timer(self.__idle_timeout, self.close)
+        self.__idle_timer.daemon = True
+        self.__idle_timer.start()
+
+    def request(self, op: str, *args, timeout: Union[int, float, None] = 30):
+        """
+        ### 向子解释器发送一个请求并等待响应，子解释器未运行时自动启动。
+
+        ```
+        :param op: str, 请求类型，可选值见 OPERATIONS 属性。
+
+        :param args: 请求参数，例如 metadata 请求的包名。
+
+        :param timeout: int or float or None, 等待响应的超时时长，单位为秒，超时后子解释器将被关闭，默认 30。
+
+        :return: 子解释器的处理结果。
+        ```
+
+        `请求类型不在 OPERATIONS 中则抛出 ValueError 异常；`
+
+        `子解释器处理失败、意外退出或响应超时则抛出 RuntimeError 异常。`
+        """
+        if op not in self.OPERATIONS:
+            raise ValueError("不支持的请求类型：{}".format(op))
+        with self.__lock:
+            if self.alive and stat_fingerprint(*self.__watched) != self.__fingerprint:
+                self.__stop()
+            if not self.alive:
+                self.__stop()
+                self.__start()
+            result = self.__send(op, args, timeout)
+            self.__reset_idle_timer()
+        return result
+
+    def __send(self, op: str, args, timeout):
+        """### 发送请求并读取响应，调用者须持有锁。"""
+        self.__request_id += 1
+        request_id = "{}:{}".format(self.__session, self.__request_id)
+        request = {"id": request_id, "op": op, "args": list(args)}
+        try:
+            self.__process.stdin.write((json.dumps(request) + "\n").encode())
+            self.__process.stdin.flush()
+        except OSError:
+            self.__stop()
+            raise RuntimeError("子解释器无响应：{}".format(self.__interpreter))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                remaining = None
+                if deadline is not None:
+                    remaining = max(deadline - time.monotonic(), 0)
+                line = self.__responses.get(timeout=remaining)
+            except Empty:
+                self.__stop()
+                raise RuntimeError("子解释器无响应：{}".format(self.__interpreter))
+            if line is None:
+                self.__stop()
+                raise RuntimeError("子解释器意外退出：{}".format(self.__interpreter))
+            # 跳过不是响应的输出(例如 .pth 文件或 sitecustomize 在启动时打印的内容)及过期的响应
+            try:
+                response = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(response, dict) and response.get("id") == request_id:
+                break
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error", EMPTY_STR))
+        return response.get("result")
+
+    def close(self):
+        """### 关闭子解释器，之后再次发送请求时会重新启动。"""
+        with self.__lock:
+            self.__stop()
@@ -1,9 +1,56 @@
 # coding: utf-8
 
 import os
+import threading
+from typing import *
 
 from ..com.common import *
 
+# conda 环境及其子环境中都有的元数据目录，Linux 等系统上的 conda 没有 _conda.exe
+_CONDA_META = "conda-meta"
+# {规范化的可执行文件所在目录: (环境目录, conda 根目录, 是否 conda 子环境)}
+_layouts: Dict[str, Tuple[str, str, bool]] = dict()
+# {规范化的可执行文件所在目录: (os.environ 底层字典的快照, 合并后的环境变量字典)}
+_environments: Dict[str, Tuple[Dict, Dict[str, str]]] = dict()
+_cache_lock = threading.Lock()
+
+
+def _detect_layout(dir_path: str) -> Tuple[str, str, bool]:
+    """
+    ### 从可执行文件所在目录逐级向上查找 conda 根目录。
+
+    含有 _conda.exe 文件，或含有 conda-meta 目录且不在 envs 目录中的目录被视为 conda 根目录；
+
+    POSIX 上可执行文件位于环境目录的 bin 目录中，环境目录是 bin 的上级目录。
+    """
+    prefix, interpreter = dir_path, PYTHON_EXE
+    if os.name != "nt":
+        interpreter = "python"
+        if os.path.basename(dir_path) == "bin":
+            prefix = os.path.dirname(dir_path)
+    conda_root = EMPTY_STR
+    current = dir_path
+    while True:
+        if os.path.isfile(os.path.join(current, P_CONDA_EXE)) or (
+            os.path.isdir(os.path.join(current, _CONDA_META))
+            and os.path.basename(os.path.dirname(current)) != CONDA_ENVS
+        ):
+            conda_root = current
+            break
+        uplevel = os.path.dirname(current)
+        if uplevel == current:
+            break
+        current = uplevel
+    if not conda_root:
+        return prefix, conda_root, False
+    temp = os.path.join(dir_path, interpreter)
+    is_sub = (
+        os.path.isfile(temp)
+        and os.access(temp, os.X_OK)
+        and os.path.basename(os.path.dirname(prefix)) == CONDA_ENVS
+    )
+    return prefix, conda_root, is_sub
+
 
 class Command(list):
     """
@@ -45,56 +92,87 @@ class Command(list):
     def commands(self):
         return self.copy()
 
-    def isconda(self):
+    @classmethod
+    def clear_cache(cls):
+        """### 清空已缓存的 conda 目录结构及环境变量字典，在 conda 被安装、移动或删除后调用。"""
+        with _cache_lock:
+            _layouts.clear()
+            _environments.clear()
+
+    def __layout(self) -> Tuple[str, str, bool]:
+        """### 获取(并缓存)可执行文件所在环境的(环境目录, conda 根目录, 是否 conda 子环境)，不是 conda 环境时根目录为空字符串。"""
         dir_path = os.path.dirname(self.executable)
-        while True:
-            conda = os.path.join(dir_path, P_CONDA_EXE)
-            if os.path.isfile(conda):
-                return True
-            uplevel = os.path.dirname(dir_path)
-            if os.path.samefile(uplevel, dir_path):
-                break
-            dir_path = uplevel
-        return False
+        key = os.path.normcase(dir_path)
+        with _cache_lock:
+            layout = _layouts.get(key)
+        if layout is None:
+            layout = _detect_layout(dir_path)
+            with _cache_lock:
+                _layouts[key] = layout
+        return layout
+
+    def isconda(self):
+        return bool(self.__layout()[1])
 
     def issubconda(self):
-        if not self.isconda():
-            return False
-        _path = os.path.dirname(self.executable)
-        temp = os.path.join(_path, PYTHON_EXE)
-        if not (os.path.isfile(temp) and os.access(temp, os.X_OK)):
-            return False
-        if os.path.basename(os.path.dirname(_path)) == CONDA_ENVS:
-            return True
-        return False
+        return self.__layout()[2]
 
     def condamain(self):
-        _path = os.path.dirname(self.executable)
-        if os.path.isfile(os.path.join(_path, P_CONDA_EXE)):
-            return _path
-        if self.issubconda():
-            return os.path.dirname(os.path.dirname(_path))
+        prefix, conda_root, is_sub = self.__layout()
+        if conda_root and conda_root == prefix:
+            return prefix
+        if is_sub:
+            return os.path.dirname(os.path.dirname(prefix))
         return EMPTY_STR
 
     def environment(self):
-        if self.isconda():
-            _path = os.path.dirname(self.executable)
-            if self.issubconda():
+        """
+        ### 获取执行命令时使用的环境变量字典(副本)。
+
+        Anaconda3 环境会加入 conda 相关的环境变量；另外总是设置 PYTHONIOENCODING，
+
+        使子进程中的 Python 以固定的编码输出，以便 StreamDecoder 直接解码而无需逐行检测编码。
+
+        结果按可执行文件所在目录缓存，只有 os.environ 发生变化时才重新合并。
+        """
+        key = os.path.normcase(os.path.dirname(self.executable))
+        # os.environ 的底层字典，比较它是否变化远比复制并解码整个 os.environ 快
+        environ = getattr(os.environ, "_data", None)
+        if environ is None:
+            return self.__environment()
+        with _cache_lock:
+            cached = _environments.get(key)
+        if cached is not None and cached[0] == environ:
+            return cached[1].copy()
+        # 先取快照再合并，合并期间 os.environ 发生的变化会使下次调用时重新合并
+        snapshot = environ.copy()
+        preset_env_var = self.__environment()
+        with _cache_lock:
+            _environments[key] = (snapshot, preset_env_var)
+        return preset_env_var.copy()
+
+    def __environment(self) -> Dict[str, str]:
+        prefix, conda_root, is_sub = self.__layout()
+        if conda_root:
+            _path = prefix
+            if is_sub:
                 name, shlvl = os.path.basename(_path), 2
             else:
                 name, shlvl = "base", 1
             conda_main_path = self.condamain()
+            if os.name == "nt":
+                conda_exe = os.path.join(conda_main_path, "Scripts", M_CONDA_EXE)
+                conda_python = os.path.join(conda_main_path, PYTHON_EXE)
+            else:
+                conda_exe = os.path.join(conda_main_path, "bin", "conda")
+                conda_python = os.path.join(conda_main_path, "bin", "python")
             preset_env_var = {
                 "CONDA_DEFAULT_ENV": r"{}".format(name),
-                "CONDA_EXE": os.path.join(
-                    conda_main_path,
-                    "Scripts",
-                    M_CONDA_EXE,
-                ),
-                "CONDA_PREFIX": _path if self.issubconda() else conda_main_path,
+                "CONDA_EXE": conda_exe,
+                "CONDA_PREFIX": _path if is_sub else conda_main_path,
                 "CONDA_PREFIX_1": conda_main_path,
                 "CONDA_PROMPT_MODIFIER": r"({}) ".format(name),
-                "CONDA_PYTHON_EXE": os.path.join(conda_main_path, PYTHON_EXE),
+                "CONDA_PYTHON_EXE": conda_python,
                 "CONDA_SHLVL": r"{}".format(shlvl),
             }
             if shlvl == 1:
@@ -114,8 +192,10 @@ class Command(list):
             preset_env_var["PATH"] = os.pathsep.join(
                 (conda_PATH, preset_env_var.get("PATH", ""))
             )
-            return preset_env_var
-        return os.environ
+        else:
+            preset_env_var = dict(os.environ)
+        preset_env_var["PYTHONIOENCODING"] = CHILD_ENCODING
+        return preset_env_var
 
     def __repr__(self):
         return "Command(exec: {}, opts: {})".format(self[0], " ".join(self[1:]))
@@ -0,0 +1,146 @@
+# coding: utf-8
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import *
+
+from ..__version__ import VERSION
+from ..com.common import *
+
+__all__ = ["DiskCache", "default_cache_dir"]
+
+# 缓存文件格式版本，格式不兼容地变化时递增，旧格式的缓存文件将被忽略
+_FORMAT = 2
+
+
+def default_cache_dir() -> str:
+    """
+    ### 获取 fastpip 的默认缓存目录。
+
+    Windows 上为 %LOCALAPPDATA%\\fastpip\\Cache，其他系统为 $XDG_CACHE_HOME/fastpip 或 ~/.cache/fastpip。
+    """
+    if os.name == "nt":
+        base = os.getenv("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "fastpip", "Cache")
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "fastpip")
+
+
+class DiskCache:
+    """
+    ### 各 Python 环境的磁盘缓存，多个进程可以共享。
+
+    每个环境(以解释器路径区分)对应缓存目录中的一个 JSON 文件，内容由调用者决定，
+
+    读取时只校验格式版本及解释器路径，内容是否仍然有效(例如文件状态指纹是否变化)由调用者判断。
+
+    写入时先写入同目录下的临时文件再用 os.replace 替换，其他进程不会读到写了一半的文件；
+
+    多个进程同时写入同一个环境的缓存时以最后写入的为准。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        ```
+        :param cache_dir: str or None, 缓存目录路径，None 表示使用 default_cache_dir 函数返回的目录。
+        ```
+
+        `cache_dir 既不是 str 也不是 None 则抛出 TypeError 异常。`
+        """
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+        if not isinstance(cache_dir, str):
+            raise TypeError("参数 cache_dir 值应为 None 或字符串。")
+        self.__cache_dir = os.path.abspath(cache_dir)
+
+    def __str__(self):
+        return "DiskCache({})".format(self.__cache_dir)
+
+    __repr__ = __str__
+
+    @property
+    def cache_dir(self) -> str:
+        """### 缓存目录路径。"""
+        return self.__cache_dir
+
+    def path_for(self, interpreter: str) -> str:
+        """### 获取解释器对应的缓存文件路径。"""
+        key = os.path.normcase(os.path.abspath(interpreter)).encode("utf-8")
+        return os.path.join(
+            self.__cache_dir, hashlib.sha1(key).hexdigest()[:20] + ".json"
+        )
+
+    def load(self, interpreter: str) -> Dict[str, Any]:
+        """
+        ### 读取解释器对应的缓存内容。
+
+        ```
+        :param interpreter: str, 解释器路径。
+
+        :return: dict, 缓存内容，缓存不存在、无法读取、格式版本或解释器路径不符时返回空字典。
+        ```
+        """
+        try:
+            with open(self.path_for(interpreter), "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return dict()
+        if not isinstance(data, dict) or data.get("format") != _FORMAT:
+            return dict()
+        if data.get("interpreter") != os.path.normcase(interpreter):
+            return dict()
+        content = data.get("content")
+        return content if isinstance(content, dict) else dict()
+
+    def update(self, interpreter: str, **fields) -> bool:
+        """
+        ### 更新解释器对应的缓存中的若干字段并以原子替换的方式写入磁盘。
+
+        ```
+        :param interpreter: str, 解释器路径。
+
+        :param fields: 要更新的字段，值必须可以序列化为 JSON。
+
+        :return: bool, 是否写入成功。
+        ```
+        """
+        content = self.load(interpreter)
+        content.update(fields)
+        data = {
+            "format": _FORMAT,
+            "fastpip": VERSION,
+            "interpreter": os.path.normcase(interpreter),
+            "content": content,
+        }
+        try:
+            os.makedirs(self.__cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(
+                ".tmp", "fastpip-", dir=self.__cache_dir, text=True
+            )
+        except Exception:
+            return False
+        try:
+            with open(fd, "wt", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temp_path, self.path_for(interpreter))
+        except Exception:
+            try:
+                os.remove(temp_path)
+            except Exception:
+                pass
+            return False
+        return True
+
+    def remove(self, interpreter: str) -> bool:
+        """### 删除解释器对应的缓存文件，成功或文件本不存在返回 True。"""
+        try:
+            os.remove(self.path_for(interpreter))
+        except FileNotFoundError:
+            return True
+        except Exception:
+            return False
+        return True
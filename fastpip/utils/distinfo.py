@@ -0,0 +1,174 @@
+# coding: utf-8
+
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..com.common import *
+
+__all__ = [
+    "canonical_name",
+    "find_metadata_files",
+    "installed_distributions",
+    "installed_metadata",
+    "read_metadata_headers",
+]
+
+_canonical_pattern = re.compile(r"[-_.]+")
+# pip list 命令默认跳过的包
+_SKIPPED_DISTS = {"python", "wsgiref", "argparse"}
+
+
+def canonical_name(name: str) -> str:
+    """### 按 PEP 503 规范化分发包名称，例如 'Ruamel_Yaml' -> 'ruamel-yaml'。"""
+    return _canonical_pattern.sub("-", name).lower()
+
+
+def read_metadata_headers(info_path: str) -> Dict[str, List[str]]:
+    """
+    ### 读取 METADATA 或 PKG-INFO 文件的头部字段。
+
+    只读取到头部结束的空行为止，不读取其后的长描述。同名字段(如 Requires-Dist)的值按出现顺序保存在列表中。
+
+    ```
+    :param info_path: str, METADATA 或 PKG-INFO 文件路径。
+
+    :return: dict[str, list[str]], 字段名与字段值列表的字典，读取失败返回空字典。
+    ```
+    """
+    headers: Dict[str, List[str]] = dict()
+    try:
+        with open(info_path, "rt", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.rstrip("\r\n")
+                if not line:
+                    break
+                if line[0] in " \t":  # 多行字段的续行，PyEnv 不使用这类字段
+                    continue
+                key, sep, value = line.partition(":")
+                if not sep:
+                    continue
+                headers.setdefault(key.strip(), list()).append(value.strip())
+    except Exception:
+        return dict()
+    return headers
+
+
+def find_metadata_files(host: str, names: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    ### 列出目录中各分发包的元数据文件路径(METADATA 或 PKG-INFO)。
+
+    支持 *.dist-info 目录、*.egg-info 目录或文件、*.egg 目录。
+
+    ```
+    :param host: str, sys.path 中的某个目录。
+
+    :param names: Iterable[str] or None, 该目录的文件名列表，已有列表时传入以免重复读取目录。
+
+    :return: list[str], 元数据文件路径列表，按文件名排序。
+    ```
+    """
+    if names is None:
+        try:
+            names = os.listdir(host)
+        except Exception:
+            return list()
+    info_files = list()
+    for name in sorted(names):
+        lower_name = name.lower()
+        if lower_name.endswith(".dist-info"):
+            info_files.append(os.path.join(host, name, "METADATA"))
+        elif lower_name.endswith(".egg-info"):
+            fullpath = os.path.join(host, name)
+            if os.path.isdir(fullpath):
+                info_files.append(os.path.join(fullpath, "PKG-INFO"))
+            else:
+                info_files.append(fullpath)
+        elif lower_name.endswith(".egg"):
+            info_files.append(os.path.join(host, name, "EGG-INFO", "PKG-INFO"))
+    return info_files
+
+
+def _egg_requires(info_path: str) -> List[str]:
+    """
+    ### 读取 egg-info 的 requires.txt 并转换为 Requires-Dist 格式的依赖列表，文件不存在时返回空列表。
+
+    requires.txt 中 [extra]、[extra:marker] 或 [:marker] 小节中的依赖被加上相应的环境标记。
+    """
+    try:
+        with open(
+            os.path.join(os.path.dirname(info_path), "requires.txt"),
+            "rt",
+            encoding="utf-8",
+            errors="replace",
+        ) as f:
+            lines = f.read().splitlines()
+    except Exception:
+        return list()
+    requires, marker = list(), EMPTY_STR
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            extra, _, condition = line[1:-1].partition(":")
+            markers = list()
+            if condition:
+                markers.append("({})".format(condition))
+            if extra:
+                markers.append('extra == "{}"'.format(extra))
+            marker = " and ".join(markers)
+            continue
+        requires.append("{} ; {}".format(line, marker) if marker else line)
+    return requires
+
+
+def installed_metadata(
+    sys_paths: Iterable[str],
+) -> Dict[str, Tuple[str, Dict[str, List[str]]]]:
+    """
+    ### 直接读取 sys.path 各目录中的元数据，获取已安装的各分发包的元数据头部字段。
+
+    同名包以 sys.path 中靠前的为准；egg-info 的依赖(requires.txt)被转换为 Requires-Dist 字段。
+
+    ```
+    :param sys_paths: Iterable[str], 目标环境的 sys.path。
+
+    :return: dict[str, tuple[str, dict[str, list[str]]]], {规范化包名: (所在的 sys.path 目录, 元数据头部字段)}，按规范化包名排序。
+    ```
+    """
+    found: Dict[str, Tuple[str, Dict[str, List[str]]]] = dict()
+    for host in sys_paths:
+        if not os.path.isdir(host):
+            continue
+        for info_file in find_metadata_files(host):
+            headers = read_metadata_headers(info_file)
+            if not headers.get("Name") or not headers.get("Version"):
+                continue
+            key = canonical_name(headers["Name"][0])
+            if key in found or key in _SKIPPED_DISTS:
+                continue
+            if "Requires-Dist" not in headers and info_file.endswith("PKG-INFO"):
+                requires = _egg_requires(info_file)
+                if requires:
+                    headers["Requires-Dist"] = requires
+            found[key] = (host, headers)
+    return {k: found[k] for k in sorted(found)}
+
+
+def installed_distributions(sys_paths: Iterable[str]) -> List[Tuple[str, str]]:
+    """
+    ### 直接读取 sys.path 各目录中的元数据，获取已安装的(包名, 版本)列表。
+
+    结果与 pip list 命令一致：同名包以 sys.path 中靠前的为准，按规范化包名排序。
+
+    ```
+    :param sys_paths: Iterable[str], 目标环境的 sys.path。
+
+    :return: list[tuple[str, str]], (包名, 版本)元组列表。
+    ```
+    """
+    return [
+        (headers["Name"][0], headers["Version"][0])
+        for _, headers in installed_metadata(sys_paths).values()
+    ]
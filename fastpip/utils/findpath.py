@@ -1,12 +1,27 @@
 # coding: utf-8
 
 import os
-from sys import winver
+import sys
+import threading
+import time
+from queue import Empty, Queue
+from typing import *
 
 from psutil import disk_partitions
 
 from ..com.common import *
 
+# sys.winver 只存在于 Windows 上
+_WINVER = getattr(sys, "winver", "{}.{}".format(*sys.version_info[:2]))
+# 解释器可执行文件名，POSIX 上为 bin/python 或 bin/python3
+_PY_NAMES = (PYTHON_EXE,) if os.name == "nt" else ("python", "python3")
+# POSIX 布局中解释器所在目录名
+_BIN_DIR = "bin"
+# conda 根目录及环境目录中的元数据目录名，Linux 上的 conda 没有 _conda.exe
+_CONDA_META = "conda-meta"
+# 每个探测任务的默认超时秒数
+_DEFAULT_TIMEOUT = 5.0
+
 
 class GetFd:
     """__list_fd 函数的 opt 参数所使用的枚举"""
@@ -20,25 +35,39 @@ class Level:
     """
     __common_location 函数之：
 
-    局部参数 common_location_classification 的键
-
-    函数返回值 common_location_classification 的键
+    探测任务中目录的搜索深度
     """
 
+    # 只检查目录本身
+    level_0 = "level_0"
+    # 检查其直接子目录
     level_1 = "level_1"
+    # 检查其两层深度子目录
     level_2 = "level_2"
 
 
-def __common_location():
-    """生成各磁盘上的常见的 Python 安装目录路径列表。"""
-    com_location_classification = {
-        # 只需获取其直接子目录的目录
-        Level.level_1: list(),
-        # 需要获取其两层深度子目录的目录
-        Level.level_2: list(),
-    }
+def __common_location() -> List[List[Tuple[str, str]]]:
+    """
+    ### 生成常见的 Python 安装目录的探测任务列表。
+
+    每个任务是 [(目录路径, 搜索深度), ...] 列表，同一任务中的目录位于同一磁盘分区，由同一个线程依次探测。
+    """
+    tasks: List[List[Tuple[str, str]]] = list()
+    home = os.path.expanduser("~")
+    if os.name != "nt":
+        # 系统解释器、pyenv 安装的各版本、conda 及用户目录中的环境
+        tasks.append([("/usr", Level.level_0), ("/usr/local", Level.level_0)])
+        tasks.append([(home, Level.level_1)])
+        for rel_path in (
+            os.path.join(".pyenv", "versions"),
+            os.path.join(".conda", CONDA_ENVS),
+            ".virtualenvs",
+        ):
+            tasks.append([(os.path.join(home, rel_path), Level.level_1)])
+        tasks.append([("/opt", Level.level_1)])
+        return tasks
     # 查询当前 Python 版本（对于打包后的程序，获取此值似乎意义不大？）
-    cur_pyver = "Python" + winver.replace(".", "")
+    cur_pyver = "Python" + _WINVER.replace(".", "")
     # 常用目录添加 envs 目录名称
     lst_common_dir = [
         "Program Files",  # Python "All Users"
@@ -48,20 +77,17 @@ def __common_location():
         os.path.join(cur_pyver, "envs"),
     ]
     # Anaconda3 "Just Me"
-    com_location_classification[Level.level_1].append(os.path.expanduser("~"))
-    disk_parts = [dp.device for dp in disk_partitions()]
-    com_location_classification[Level.level_1].extend(disk_parts)
-    for dp in disk_parts:
-        for cd in lst_common_dir:
-            full_path = os.path.join(dp, cd)
-            if not os.path.isdir(full_path):
-                continue
-            com_location_classification[Level.level_1].append(full_path)
+    tasks.append([(home, Level.level_1)])
+    # 每个分区一个任务，无响应的分区(如断开的网络驱动器)不会阻塞其他分区
+    for dp in (dp.device for dp in disk_partitions()):
+        task = [(dp, Level.level_1)]
+        task.extend((os.path.join(dp, cd), Level.level_1) for cd in lst_common_dir)
+        tasks.append(task)
     # Python "Just Me"
-    user_programs_dir = os.path.join(os.getenv("LOCALAPPDATA"), "Programs")
-    if os.path.exists(user_programs_dir):
-        com_location_classification[Level.level_2].append(user_programs_dir)
-    return com_location_classification
+    local_appdata = os.getenv("LOCALAPPDATA")
+    if local_appdata:
+        tasks.append([(os.path.join(local_appdata, "Programs"), Level.level_2)])
+    return tasks
 
 
 def __fsize(*_fpath):
@@ -72,22 +98,25 @@ def __fsize(*_fpath):
         return False
 
 
+def __has_interpreter(dir_path, files):
+    """### 判断目录中是否有解释器可执行文件，files 为目录中的文件名集合。"""
+    return any(name in files and __fsize(dir_path, name) for name in _PY_NAMES)
+
+
 def __paths_in_PATH():
     """
     ### 查找系统环境变量 PATH 中的 Python 目录路径列表。
-        仅根据"目录中是否存在 python.exe 文件"进行简单查找。
+        仅根据"目录中是否存在 python.exe 文件"(POSIX 上为 python 或 python3 文件)进行简单查找。
     """
     python_paths_in_PATH = list()
-    PATH_paths = os.getenv("PATH", "").split(";")
+    PATH_paths = os.getenv("PATH", "").split(os.pathsep)
     for PATH_path in PATH_paths:
-        try:
-            PATH_path_files = os.listdir(PATH_path)
-        except Exception:
+        if not PATH_path:
             continue
+        PATH_path_files = __list_fd(PATH_path, GetFd.Files)
         PATH_path = os.path.normpath(PATH_path)
         if (
-            PYTHON_EXE in PATH_path_files
-            and __fsize(PATH_path, PYTHON_EXE)
+            __has_interpreter(PATH_path, PATH_path_files)
             and PATH_path not in python_paths_in_PATH
         ):
             python_paths_in_PATH.append(PATH_path)
@@ -105,73 +134,260 @@ def cur_py_path():
     return PATH_paths[0]
 
 
-def __list_fd(_path, opt=GetFd.Both):
+def __visit(_path, visited):
+    """### 在 visited 字典中记录目录列出前的修改时间，目录不存在或无法访问时记录 None。"""
+    if visited is None:
+        return
+    try:
+        visited[_path] = os.stat(_path).st_mtime_ns
+    except OSError:
+        visited[_path] = None
+
+
+def __list_fd(_path, opt=GetFd.Both, visited=None):
     """列出给定目录下的文件或文件夹，返回文件或文件夹列表。"""
     results = list()
-    if os.path.isfile(_path):
-        return results
-    if opt == GetFd.Files:
-        condi = os.path.isfile
-    elif opt == GetFd.Dirs:
-        condi = os.path.isdir
-    elif opt == GetFd.Both:
-        condi = lambda p: os.path.isfile(p) or os.path.isdir(p)
-    else:
+    if opt not in (GetFd.Dirs, GetFd.Files, GetFd.Both):
         return results
+    __visit(_path, visited)
     try:
-        files_dirs = os.listdir(_path)
-    except Exception:
-        return results
-    for item in files_dirs:
-        if condi(os.path.join(_path, item)):
-            results.append(item)
+        with os.scandir(_path) as entries:
+            for entry in entries:
+                try:
+                    if opt != GetFd.Files and entry.is_dir():
+                        results.append(entry.name)
+                    elif opt != GetFd.Dirs and entry.is_file():
+                        results.append(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        pass
     return results
 
 
-def __valid_path_list(dir_path):
+def __split_fd(_path, visited=None) -> Tuple[Set[str], Set[str]]:
+    """### 只列一次目录，返回(文件名集合, 目录名集合)。"""
+    files, dirs = set(), set()
+    __visit(_path, visited)
+    try:
+        with os.scandir(_path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        dirs.add(entry.name)
+                    elif entry.is_file():
+                        files.add(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files, dirs
+
+
+def __env_paths(dir_path, files, dirs, visited=None):
+    """### 返回目录本身、其 bin 子目录(POSIX 布局)及 Scripts 子目录(Windows 上 venv 布局)中有解释器的目录路径列表。"""
+    python_env_paths = list()
+    if __has_interpreter(dir_path, files):
+        python_env_paths.append(dir_path)
+    elif VENV_CFG in files and PYTHON_SCR in dirs:
+        scripts = os.path.join(dir_path, PYTHON_SCR)
+        if __has_interpreter(scripts, __list_fd(scripts, GetFd.Files, visited)):
+            python_env_paths.append(dir_path)
+    if _BIN_DIR in dirs:
+        bin_dir = os.path.join(dir_path, _BIN_DIR)
+        if __has_interpreter(bin_dir, __list_fd(bin_dir, GetFd.Files, visited)):
+            python_env_paths.append(bin_dir)
+    return python_env_paths
+
+
+def __valid_path_list(dir_path, visited=None):
     """
     ### 判断指定路径是否为 Python 或 Anaconda3 目录。
     将确认为 Python 目录的路径或 Anaconda3 内 Python 目录路径添加到列表并返回。
     """
     dir_path = os.path.normpath(dir_path)
-    python_env_paths = list()
-    files = __list_fd(dir_path, GetFd.Files)
-    if PYTHON_EXE in files and __fsize(dir_path, PYTHON_EXE):
-        python_env_paths.append(dir_path)
-    if P_CONDA_EXE in files and __fsize(dir_path, P_CONDA_EXE):
-        env_d = os.path.join(dir_path, CONDA_ENVS)
-        if not os.path.isdir(env_d):
-            return python_env_paths
-        for env_p in __list_fd(env_d, GetFd.Dirs):
-            env_p = os.path.join(env_d, env_p)
-            if PYTHON_EXE in __list_fd(env_p, GetFd.Files):
-                python_env_paths.append(env_p)
+    files, dirs = __split_fd(dir_path, visited)
+    python_env_paths = __env_paths(dir_path, files, dirs, visited)
+    is_conda = (P_CONDA_EXE in files and __fsize(dir_path, P_CONDA_EXE)) or (
+        _CONDA_META in dirs
+    )
+    if not is_conda or CONDA_ENVS not in dirs:
+        return python_env_paths
+    env_d = os.path.join(dir_path, CONDA_ENVS)
+    for env_p in __list_fd(env_d, GetFd.Dirs, visited):
+        env_p = os.path.join(env_d, env_p)
+        files, dirs = __split_fd(env_p, visited)
+        python_env_paths.extend(__env_paths(env_p, files, dirs, visited))
     return python_env_paths
 
 
-def all_py_paths():
+def _probe_root(root, level, visited=None) -> Iterator[str]:
+    """
+    ### 按搜索深度逐个产出目录中确认存在解释器的目录路径。
+
+    visited 为字典时记录探测过程中列出的每个目录及其修改时间，这些目录的修改时间都未变化时探测结果也不会变化。
+    """
+    if level == Level.level_0:
+        yield from __valid_path_list(root, visited)
+        return
+    for dir_name in __list_fd(root, GetFd.Dirs, visited):
+        level_1_full = os.path.join(root, dir_name)
+        if level == Level.level_1:
+            yield from __valid_path_list(level_1_full, visited)
+            continue
+        for sub_dir in __list_fd(level_1_full, GetFd.Dirs, visited):
+            yield from __valid_path_list(os.path.join(level_1_full, sub_dir), visited)
+
+
+def __probe_task(index, task, results: Queue):
+    """### 在线程中依次探测任务中的目录，结果以(任务序号, 路径)放入队列，任务结束时放入(任务序号, None)。"""
+    try:
+        for root, level in task:
+            for path in _probe_root(root, level):
+                results.put((index, path))
+    except Exception:
+        pass
+    finally:
+        results.put((index, None))
+
+
+def discovery_tasks() -> List[List[Tuple[str, str]]]:
+    """
+    ### 生成全部探测任务：系统环境变量 PATH 中的每个目录各为一个任务，其后是各常用安装位置的任务。
+
+    每个任务是 (目录, 搜索深度) 列表，可以传给 crawl_roots 函数探测。
+    """
+    PATH_paths = [p for p in os.getenv("PATH", "").split(os.pathsep) if p]
+    return [[(p, Level.level_0)] for p in PATH_paths] + __common_location()
+
+
+def __discover(timeout) -> Iterator[Tuple[int, str]]:
+    """
+    ### 并发执行各探测任务，按确认先后顺序产出(任务序号, 路径)。
+
+    discovery_tasks 函数生成的每个任务各由一个守护线程同时探测，
+
+    超过 timeout 秒仍未完成的任务被放弃(其线程在后台自行结束)，不影响其他任务的结果。
+    """
+    tasks = discovery_tasks()
+    results: Queue = Queue()
+    for index, task in enumerate(tasks):
+        threading.Thread(
+            target=__probe_task, args=(index, task, results), daemon=True
+        ).start()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    pending = len(tasks)
+    while pending:
+        try:
+            if deadline is None:
+                index, path = results.get()
+            else:
+                index, path = results.get(timeout=max(deadline - time.monotonic(), 0))
+        except Empty:
+            return
+        if path is None:
+            pending -= 1
+        else:
+            yield index, path
+
+
+def path_key(path):
+    """### 用于判断两个解释器目录路径是否相同的键。"""
+    try:
+        return os.path.normcase(os.path.realpath(path))
+    except Exception:
+        return os.path.normcase(path)
+
+
+def crawl_roots(
+    roots: Sequence[Tuple[str, str]], timeout: Optional[float]
+) -> List[Optional[Tuple[List[str], Dict[str, Optional[int]]]]]:
+    """
+    ### 每个目录一个守护线程同时探测，返回与 roots 一一对应的结果列表。
+
+    每个结果为 (解释器目录路径列表, {列出的目录: 列出前的修改时间})，超过 timeout 秒未完成的目录结果为 None。
+
+    InterpreterCatalog 据此只重新探测修改时间发生变化的位置。
+
+    ```
+    :param roots: Sequence[tuple[str, str]], (目录, 搜索深度)列表，通常来自 discovery_tasks 函数生成的任务。
+
+    :param timeout: int or float or None, 每个目录的超时秒数，None 表示不限时。
+    ```
+    """
+    crawled: List[Optional[Tuple[List[str], Dict[str, Optional[int]]]]]
+    crawled = [None] * len(roots)
+    done: Queue = Queue()
+
+    def crawl(index, root, level):
+        visited: Dict[str, Optional[int]] = dict()
+        try:
+            done.put((index, (list(_probe_root(root, level, visited)), visited)))
+        except Exception:
+            done.put((index, None))
+
+    for index, (root, level) in enumerate(roots):
+        threading.Thread(target=crawl, args=(index, root, level), daemon=True).start()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for _ in range(len(roots)):
+        try:
+            if deadline is None:
+                index, result = done.get()
+            else:
+                index, result = done.get(timeout=max(deadline - time.monotonic(), 0))
+        except Empty:
+            break
+        crawled[index] = result
+    return crawled
+
+
+def iter_py_paths(timeout: Optional[float] = _DEFAULT_TIMEOUT) -> Iterator[str]:
+    """
+    ### 查找存在 Python 解释器的目录，每确认一个目录即产出其路径(不重复)。
+
+    系统环境变量 PATH 中的每个目录、每个磁盘分区及每个常用安装位置被并发探测，产出顺序取决于各探测任务完成的先后。
+
+    POSIX 上还会查找 /usr、/usr/local、~/.pyenv/versions、~/.conda/envs、~/.virtualenvs 及 /opt 中的 bin/python 布局的环境，
+
+    conda 根目录(含有 _conda.exe 文件或 conda-meta 目录)中 envs 目录下的环境也会被找到。
+
+    ```
+    :param timeout: int or float or None, 每个探测任务的超时秒数，超时的任务(例如无响应的网络驱动器)的剩余结果被放弃，None 表示不限时。
+    ```
+    """
+    found = set()
+    for _, path in __discover(timeout):
+        key = path_key(path)
+        if key in found:
+            continue
+        found.add(key)
+        yield path
+
+
+def all_py_paths(timeout: Optional[float] = None):
     """
     ### 返回存在 Python 解释器的目录路径列表
 
     只在常用安装位置的直接子目录内搜索 Python 可执行文件
 
-    例外：对于 AppData\Local\Programs 目录，此函数在其直接子目录的子目录内搜索
+    例外：对于 AppData\\Local\\Programs 目录，此函数在其直接子目录的子目录内搜索
+
+    各位置被并发探测(见 iter_py_paths 函数)，但结果顺序是确定的：先是 PATH 中的目录，然后按常用安装位置的顺序排列。
+
+    ```
+    :param timeout: int or float or None, 每个探测任务的超时秒数，超时的任务的剩余结果被放弃，默认 None，即不限时，总是返回全部结果。
+    ```
     """
-    common_locations = __common_location()
-    dirs_interpreter_in = __paths_in_PATH()
-    for level_1_common in common_locations[Level.level_1]:
-        for dir_name in __list_fd(level_1_common, GetFd.Dirs):
-            level_1_full = os.path.join(level_1_common, dir_name)
-            for path in __valid_path_list(level_1_full):
-                if path in dirs_interpreter_in:
-                    continue
-                dirs_interpreter_in.append(path)
-    for level_2_common in common_locations[Level.level_2]:
-        for sub_dir in __list_fd(level_2_common, GetFd.Dirs):
-            sub_dir_full = os.path.join(level_2_common, sub_dir)
-            for sub_dir_sub in __list_fd(sub_dir_full, GetFd.Dirs):
-                for _path in __valid_path_list(os.path.join(sub_dir_full, sub_dir_sub)):
-                    if _path in dirs_interpreter_in:
-                        continue
-                    dirs_interpreter_in.append(_path)
+    task_results: Dict[int, List[str]] = dict()
+    for index, path in __discover(timeout):
+        task_results.setdefault(index, list()).append(path)
+    dirs_interpreter_in = list()
+    found = set()
+    for index in sorted(task_results):
+        for path in task_results[index]:
+            key = path_key(path)
+            if key in found:
+                continue
+            found.add(key)
+            dirs_interpreter_in.append(path)
     return dirs_interpreter_in
@@ -0,0 +1,255 @@
+# coding: utf-8
+
+import ast
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import *
+
+__all__ = ["ImportCache", "collect_imports", "local_module_names"]
+
+# 缓存文件格式版本
+_FORMAT = 1
+# 每个进程池任务读取并解析的文件数，至少有两个任务时才使用进程池，避免启动进程的开销超过解析本身
+_CHUNK_SIZE = 256
+# 遍历源码目录时跳过的目录名
+_SKIPPED_DIRS = frozenset(
+    ("__pycache__", "node_modules", "site-packages", "dist-packages", "build")
+)
+
+
+def parse_imports(source: bytes) -> FrozenSet[str]:
+    """
+    ### 解析源码中的绝对导入语句，返回导入的完整模块名集合，源码有语法错误时返回空集合。
+
+    'import a.b' 得到 'a.b'；'from a import b' 得到 'a' 及 'a.b'(b 可能是子模块)；相对导入被忽略。
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return frozenset()
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                names.add(alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level or not node.module:
+                continue
+            names.add(node.module)
+            for alias in node.names:
+                if alias.name != "*":
+                    names.add("{}.{}".format(node.module, alias.name))
+    return frozenset(names)
+
+
+def _parse_files(paths: List[str]) -> List[Tuple[str, Optional[str], List[str]]]:
+    """### 读取并解析一批文件，返回(路径, 内容散列值, 导入名列表)列表，无法读取的文件散列值为 None。"""
+    results = list()
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                source = f.read()
+        except Exception:
+            results.append((path, None, []))
+            continue
+        digest = hashlib.sha1(source).hexdigest()
+        results.append((path, digest, sorted(parse_imports(source))))
+    return results
+
+
+def _iter_source_files(root: str) -> Iterator[Tuple[str, os.stat_result]]:
+    """### 遍历目录中的 .py 文件，跳过隐藏目录、虚拟环境目录及 _SKIPPED_DIRS 中的目录。"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name.startswith(".") or entry.name in _SKIPPED_DIRS:
+                        continue
+                    if os.path.isfile(os.path.join(entry.path, "pyvenv.cfg")):
+                        continue
+                    stack.append(entry.path)
+                elif entry.name.endswith(".py") and entry.is_file():
+                    yield entry.path, entry.stat()
+            except OSError:
+                continue
+
+
+def local_module_names(root: str) -> Set[str]:
+    """
+    ### 获取源码目录自身提供的顶层模块名，即目录(及其中 src 目录)下的 .py 文件及包含 __init__.py 的目录名。
+
+    项目导入自身的模块时不应被视为需要安装的包。
+    """
+    names: Set[str] = set()
+    for base in (root, os.path.join(root, "src")):
+        try:
+            entries = list(os.scandir(base))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.name.endswith(".py"):
+                    names.add(entry.name[:-3])
+                elif entry.is_dir() and os.path.isfile(
+                    os.path.join(entry.path, "__init__.py")
+                ):
+                    names.add(entry.name)
+            except OSError:
+                continue
+    return names
+
+
+class ImportCache:
+    """
+    ### 源码文件导入名的缓存，以文件内容的散列值为键，可以保存到磁盘供之后的进程使用。
+
+    文件的大小及修改时间未变化时直接使用缓存，不读取文件；变化时读取文件计算散列值，内容未变化的仍不重新解析。
+    """
+
+    def __init__(self, cache_file: Optional[str] = None):
+        """
+        ```
+        :param cache_file: str or None, 缓存文件路径，None 表示只在内存中缓存。
+        ```
+        """
+        self.__lock = threading.Lock()
+        self.__cache_file = cache_file
+        # {文件路径: (大小, 修改时间, 散列值)}
+        self.__files: Dict[str, Tuple[int, int, str]] = dict()
+        # {散列值: 导入名集合}
+        self.__imports: Dict[str, FrozenSet[str]] = dict()
+        self.__modified = False
+        if cache_file is not None:
+            self.__load(cache_file)
+
+    @property
+    def cache_file(self) -> Optional[str]:
+        """### 缓存文件路径，只在内存中缓存时为 None。"""
+        return self.__cache_file
+
+    def __load(self, cache_file: str):
+        try:
+            with open(cache_file, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("format") != _FORMAT:
+                return
+            files = {k: tuple(v) for k, v in data["files"].items()}
+            imports = {k: frozenset(v) for k, v in data["imports"].items()}
+        except Exception:
+            return
+        self.__files, self.__imports = files, imports
+
+    def save(self) -> bool:
+        """### 以原子替换的方式写入缓存文件，只保存仍被引用的散列值，没有缓存文件或没有变化时不写入。"""
+        with self.__lock:
+            if self.__cache_file is None or not self.__modified:
+                return True
+            used = set(v[2] for v in self.__files.values())
+            data = {
+                "format": _FORMAT,
+                "files": self.__files,
+                "imports": {k: sorted(self.__imports[k]) for k in used},
+            }
+            self.__modified = False
+        directory = os.path.dirname(self.__cache_file)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(".tmp", "fastpip-", dir=directory)
+        except Exception:
+            return False
+        try:
+            with open(fd, "wt", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(temp_path, self.__cache_file)
+        except Exception:
+            try:
+                os.remove(temp_path)
+            except Exception:
+                pass
+            return False
+        return True
+
+    def lookup(self, path: str, file_stat: os.stat_result) -> Optional[FrozenSet[str]]:
+        """### 文件大小及修改时间与缓存的一致时返回缓存的导入名集合，否则返回 None。"""
+        cached = self.__files.get(path)
+        if cached is None or cached[:2] != (file_stat.st_size, file_stat.st_mtime_ns):
+            return None
+        return self.__imports.get(cached[2])
+
+    def known(self, digest: str) -> Optional[FrozenSet[str]]:
+        """### 返回内容散列值对应的导入名集合，未缓存时返回 None。"""
+        return self.__imports.get(digest)
+
+    def store(
+        self, path: str, file_stat: os.stat_result, digest: str, imports: Iterable[str]
+    ):
+        """### 缓存文件的导入名集合。"""
+        with self.__lock:
+            self.__files[path] = (file_stat.st_size, file_stat.st_mtime_ns, digest)
+            self.__imports.setdefault(digest, frozenset(imports))
+            self.__modified = True
+
+
+def collect_imports(
+    root: str, cache: Optional[ImportCache] = None, workers: Optional[int] = None
+) -> Dict[str, FrozenSet[str]]:
+    """
+    ### 收集目录(或单个文件)中所有 .py 文件的绝对导入名。
+
+    未缓存或已变化的文件较多时使用进程池并行读取、散列及解析；Windows 上进程池以 spawn 方式启动子进程，
+
+    调用者的主模块须以 if __name__ == "__main__" 保护入口代码。
+
+    ```
+    :param root: str, 源码目录或 .py 文件路径。
+
+    :param cache: ImportCache or None, 导入名缓存，None 表示不使用缓存。
+
+    :param workers: int or None, 进程数，None 表示使用 CPU 核心数，小于 2 时在当前进程中解析。
+
+    :return: dict[str, frozenset[str]], {文件路径: 导入的完整模块名集合} 字典。
+    ```
+    """
+    if cache is None:
+        cache = ImportCache()
+    if os.path.isfile(root):
+        files = [(root, os.stat(root))]
+    else:
+        files = list(_iter_source_files(root))
+    results: Dict[str, FrozenSet[str]] = dict()
+    stats: Dict[str, os.stat_result] = dict()
+    pending: List[str] = list()
+    for path, file_stat in files:
+        imports = cache.lookup(path, file_stat)
+        if imports is not None:
+            results[path] = imports
+            continue
+        stats[path] = file_stat
+        pending.append(path)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    chunks = [pending[i : i + _CHUNK_SIZE] for i in range(0, len(pending), _CHUNK_SIZE)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(min(workers, len(chunks))) as executor:
+            parsed = list(executor.map(_parse_files, chunks))
+    else:
+        parsed = [_parse_files(chunk) for chunk in chunks]
+    for path, digest, imports in (r for chunk in parsed for r in chunk):
+        if digest is None:
+            continue
+        # 大小或修改时间变化但内容未变化(例如切换分支后又切换回来)的文件沿用已缓存的导入名集合
+        known = cache.known(digest)
+        cache.store(path, stats[path], digest, imports if known is None else known)
+        results[path] = cache.known(digest)
+    cache.save()
+    return results
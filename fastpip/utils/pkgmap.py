@@ -0,0 +1,747 @@
+# coding: utf-8
+
+import os
+import re
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from typing import *
+
+from ..com.common import *
+from .distinfo import canonical_name
+
+__all__ = [
+    "DistRecord",
+    "HostScan",
+    "PackageMapScanner",
+    "build_import_index",
+    "build_mapping",
+    "build_name_index",
+    "metadata_dir_name",
+    "resolve_distribution",
+]
+
+_info_pkgname_pattern = re.compile(r"^Name: ([A-Za-z0-9_\-\.]+)$")
+_canonical_imp_pattern = re.compile(r"^[A-Za-z_]?[A-Za-z0-9_]+")
+_full_canonical_imp_pattern = re.compile(r"^[A-Za-z_]?[A-Za-z0-9_]+$")
+_module_pattern = re.compile(r"^([A-Z0-9_]+).*(?<!_d)\.py[cdw]?$", re.I)
+
+# 目录项类型
+KIND_OTHER, KIND_FILE, KIND_DIR = 0, 1, 2
+
+
+class DistRecord:
+    """
+    ### 单个 *.dist-info 或 *.egg-info 目录的扫描结果。
+
+    name 为元数据中的包名，元数据文件不存在、无法读取或没有包名时为 None；
+
+    top_level 为 top_level.txt 中的各行(已去除行尾空白)，文件不存在时为 None，无法读取时为空元组。
+    """
+
+    __slots__ = ("mtime", "name", "top_level")
+
+    def __init__(self, mtime, name, top_level):
+        self.mtime: Optional[int] = mtime
+        self.name: Optional[str] = name
+        self.top_level: Optional[Tuple[str, ...]] = top_level
+
+    def dump(self) -> list:
+        return [self.mtime, self.name, self.top_level]
+
+    @classmethod
+    def load(cls, data) -> "DistRecord":
+        mtime, name, top_level = data
+        if top_level is not None:
+            top_level = tuple(top_level)
+        return cls(mtime, name, top_level)
+
+
+class HostScan:
+    """
+    ### 单个 sys.path 目录的扫描结果。
+
+    kinds 为目录中各项的名称与类型(KIND_FILE、KIND_DIR 或 KIND_OTHER)，
+
+    pth 为 .pth 文件名与(修改时间, 路径前缀集合)的字典，dists 为元数据目录名与 DistRecord 的字典。
+    """
+
+    __slots__ = ("path", "mtime", "kinds", "pth", "dists")
+
+    def __init__(self, path, mtime, kinds):
+        self.path: str = path
+        self.mtime: int = mtime
+        self.kinds: Dict[str, int] = kinds
+        self.pth: Dict[str, Tuple[Optional[int], FrozenSet[str]]] = dict()
+        self.dists: Dict[str, DistRecord] = dict()
+
+    def dump(self) -> Dict[str, Any]:
+        """### 转换为可序列化为 JSON 的字典。"""
+        return {
+            "path": self.path,
+            "mtime": self.mtime,
+            "kinds": self.kinds,
+            "pth": {k: [m, sorted(p)] for k, (m, p) in self.pth.items()},
+            "dists": {k: v.dump() for k, v in self.dists.items()},
+        }
+
+    @classmethod
+    def load(cls, data: Dict[str, Any]) -> "HostScan":
+        """### 从 dump 方法生成的字典恢复，数据无效时抛出异常。"""
+        scan = cls(data["path"], data["mtime"], dict(data["kinds"]))
+        for k, (m, p) in data["pth"].items():
+            scan.pth[k] = (m, frozenset(p))
+        for k, v in data["dists"].items():
+            scan.dists[k] = DistRecord.load(v)
+        return scan
+
+
+def _mtime(fullpath: str) -> Optional[int]:
+    try:
+        return os.stat(fullpath).st_mtime_ns
+    except Exception:
+        return None
+
+
+def _entry_kind(entry: os.DirEntry) -> int:
+    """### 根据 os.scandir 返回的目录项判断其类型，大多数平台上无需额外的 stat 调用。"""
+    try:
+        if entry.is_dir():
+            return KIND_DIR
+        if entry.is_file():
+            return KIND_FILE
+    except OSError:
+        pass
+    return KIND_OTHER
+
+
+def _entry_mtime(entry: os.DirEntry) -> Optional[int]:
+    """### 目录项的修改时间，Windows 上 os.scandir 已取得该信息，无需额外的 stat 调用。"""
+    try:
+        return entry.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _host_identity(host_stat: os.stat_result) -> Optional[Tuple[int, int]]:
+    """### 目录的 (设备号, inode 号)，用于识别经由不同写法或符号链接到达的同一目录，文件系统不支持时为 None。"""
+    if not host_stat.st_ino:
+        return None
+    return host_stat.st_dev, host_stat.st_ino
+
+
+def _prefixes_from_pth(fullpath: str) -> FrozenSet[str]:
+    """### 读取 .pth 文件中的路径前缀，跳过注释行及 import 语句行。"""
+    prefixes = set()
+    try:
+        with open(fullpath, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(("#", "import ", "import\t")):
+                    continue
+                line = os.path.normcase(line.rstrip())
+                if line:
+                    prefixes.add(line)
+    except Exception:
+        pass
+    return frozenset(prefixes)
+
+
+def _read_dist(dir_fullpath: str, info_file: str, mtime) -> DistRecord:
+    """### 读取元数据目录中的包名及 top_level.txt，直接打开文件而不预先检查是否存在以减少 stat 调用。"""
+    name = None
+    try:
+        with open(os.path.join(dir_fullpath, info_file), "rt", encoding="utf-8") as f:
+            f.readline()
+            for line in f:
+                matched = _info_pkgname_pattern.match(line)
+                if matched:
+                    name = matched.group(1)
+                    break
+    except Exception:
+        return DistRecord(mtime, None, None)
+    if name is None:
+        return DistRecord(mtime, None, None)
+    try:
+        with open(
+            os.path.join(dir_fullpath, "top_level.txt"), "rt", encoding="utf-8"
+        ) as f:
+            top_level = tuple(line.rstrip() for line in f)
+    except FileNotFoundError:
+        return DistRecord(mtime, name, None)
+    except Exception:
+        top_level = tuple()
+    return DistRecord(mtime, name, top_level)
+
+
+def _info_file_of(fdname: str) -> Optional[str]:
+    if fdname.endswith(".dist-info"):
+        return "METADATA"
+    if fdname.endswith(".egg-info"):
+        return "PKG-INFO"
+    return None
+
+
+def metadata_dir_name(fdname: str) -> Optional[str]:
+    """
+    ### 从元数据目录名中解析出按 PEP 503 规范化的包名，例如 'Ruamel_Yaml-0.17.dist-info' -> 'ruamel-yaml'。
+
+    目录名中的包名由安装工具生成，通常与元数据中的包名规范化后相同；不是元数据目录时返回 None。
+    """
+    if _info_file_of(fdname) is None:
+        return None
+    stem = fdname.rsplit(".", 1)[0]
+    return canonical_name(stem.split("-", 1)[0])
+
+
+def _list_host(normed_host: str):
+    """
+    ### 使用 os.scandir 列出目录，返回(目录项类型字典, .pth 文件及元数据目录的修改时间字典)。
+
+    `目录无法读取则抛出 OSError 异常。`
+    """
+    kinds: Dict[str, int] = dict()
+    mtimes: Dict[str, Optional[int]] = dict()
+    with os.scandir(normed_host) as entries:
+        for entry in entries:
+            kind = _entry_kind(entry)
+            kinds[entry.name] = kind
+            if kind == KIND_DIR:
+                if _info_file_of(entry.name) is not None:
+                    mtimes[entry.name] = _entry_mtime(entry)
+            elif kind == KIND_FILE and entry.name.lower().endswith(".pth"):
+                mtimes[entry.name] = _entry_mtime(entry)
+    return kinds, mtimes
+
+
+def _iter_hosts(sys_paths: Iterable[str]):
+    """
+    ### 按顺序产生 sys.path 中有效且不重复的目录(规范化大小写后的路径, os.stat 结果)。
+
+    经由不同写法(如大小写、相对路径)或符号链接到达的同一目录(设备号及 inode 号相同)只产生一次，以先出现的为准。
+    """
+    normed_hosts: Set[str] = set()
+    identities: Set[Tuple[int, int]] = set()
+    for host in sys_paths:
+        normed_host = os.path.normcase(host)
+        if normed_host in normed_hosts:
+            continue
+        normed_hosts.add(normed_host)
+        try:
+            host_stat = os.stat(host)
+        except Exception:
+            continue
+        if not stat.S_ISDIR(host_stat.st_mode):
+            continue
+        identity = _host_identity(host_stat)
+        if identity is not None:
+            if identity in identities:
+                continue
+            identities.add(identity)
+        yield normed_host, host_stat
+
+
+def _attributed_hosts(ordered_scans: List[HostScan]) -> Dict[str, Tuple[str, str]]:
+    """### 由 .pth 文件添加的目录，返回 {目录: (.pth 文件所在目录, .pth 文件名对应的包名)} 字典。"""
+    attributed_hosts: Dict[str, Tuple[str, str]] = dict()
+    for scan in ordered_scans:
+        for pthname in sorted(scan.pth):
+            prefixes = scan.pth[pthname][1]
+            if not prefixes:
+                continue
+            pthname_matched = _canonical_imp_pattern.match(pthname)
+            if not pthname_matched:
+                continue
+            owner_pkg = pthname_matched.group()
+            for suffix in prefixes:
+                pth_host = os.path.join(scan.path, os.path.normcase(suffix))
+                attributed_hosts[pth_host] = (scan.path, owner_pkg)
+    return attributed_hosts
+
+
+def _collect_modules(scan: HostScan, pkgsmods: Dict[str, Tuple[str, str]]):
+    """### 将目录中可导入的包及模块以 {导入名: (路径, 目录项名称)} 的形式添加到 pkgsmods 中。"""
+    for fdname in sorted(scan.kinds):
+        kind = scan.kinds[fdname]
+        fdpath = os.path.join(scan.path, fdname)
+        if kind == KIND_DIR:
+            if _full_canonical_imp_pattern.match(fdname):
+                pkgsmods[fdname] = (fdpath, fdname)
+        elif kind == KIND_FILE and fdname.lower().endswith(
+            (".py", ".pyc", ".pyd", "pyw")
+        ):
+            module_matched = _module_pattern.match(fdname)
+            if not module_matched:
+                continue
+            pkgsmods[module_matched.group(1)] = (fdpath, fdname)
+
+
+def _dist_importables(
+    host: str, record: DistRecord, pkgsmods: Dict[str, Tuple[str, str]]
+) -> Tuple[Optional[Dict[str, str]], List[str]]:
+    """
+    ### 根据单个元数据目录的扫描结果确定其包含的导入名及路径。
+
+    返回({导入名: 路径} 字典, 被其占用的目录项名称列表)，该元数据目录不产生映射表条目时字典为 None。
+    """
+    realname = record.name
+    pkg_importables: Dict[str, str] = dict()
+    claimed: List[str] = list()
+    if PKG_SEPDOT in realname:
+        imppath = os.path.join(host, realname.replace(".", os.path.sep))
+        pkg_importables[realname] = imppath
+    if record.top_level is None:
+        impname_matched = _canonical_imp_pattern.match(realname.replace("-", "_"))
+        if not impname_matched:
+            return None, claimed
+        impname = impname_matched.group()
+        if impname not in pkgsmods:
+            return None, claimed
+        pkgimppath = pkgsmods[impname]
+        claimed.append(pkgimppath[1])
+        return {impname: pkgimppath[0]}, claimed
+    for line in record.top_level:
+        suffix = os.path.split(line)[1]
+        toplevel_imp_matched = _canonical_imp_pattern.match(suffix)
+        if not toplevel_imp_matched:
+            continue
+        impname_in_toplevel = toplevel_imp_matched.group()
+        if impname_in_toplevel not in pkgsmods:
+            continue
+        pkgimppath = pkgsmods[impname_in_toplevel]
+        pkg_importables[impname_in_toplevel] = pkgimppath[0]
+        claimed.append(pkgimppath[1])
+    return pkg_importables, claimed
+
+
+def build_mapping(
+    hosts: Iterable[str], scans: Dict[str, HostScan], builtins: Iterable[str]
+) -> Dict[str, Dict[str, str]]:
+    """
+    ### 根据各目录的扫描结果在内存中生成包名与导入名(及其路径)的映射表，不访问文件系统。
+
+    ```
+    :param hosts: Iterable[str], 已规范化大小写(os.path.normcase)的 sys.path 目录，按 sys.path 顺序排列。
+
+    :param scans: dict[str, HostScan], 目录与其扫描结果的字典，没有扫描结果的目录被忽略。
+
+    :param builtins: Iterable[str], 内置模块名。
+
+    :return: dict[str, dict[str, str]], {包名: {导入名: 路径}} 字典，内置模块的路径为空字符串。
+    ```
+    """
+    mapping: Dict[str, Dict[str, str]] = dict()
+    for name in builtins:
+        mapping[name] = {name: EMPTY_STR}
+    ordered_scans: List[HostScan] = list()
+    for host in hosts:
+        scan = scans.get(host)
+        if scan is not None and scan not in ordered_scans:
+            ordered_scans.append(scan)
+    attributed_hosts = _attributed_hosts(ordered_scans)
+    # {pkgs_host: {impname: (fullpath, filename)}}
+    pkgsmods_perhost: Dict[str, Dict[str, Tuple[str, str]]] = dict()
+    for scan in ordered_scans:
+        if scan.path in attributed_hosts:
+            main_host = attributed_hosts[scan.path][0]
+        else:
+            main_host = scan.path
+        _collect_modules(scan, pkgsmods_perhost.setdefault(main_host, dict()))
+    # {pkgs_host: {filename: (impname, (fullpath, filename))}}，同一文件名以靠前的导入名为准
+    filenames_perhost: Dict[str, Dict[str, Tuple[str, Tuple[str, str]]]] = dict()
+    for main_host, pkgsmods in pkgsmods_perhost.items():
+        filenames = filenames_perhost.setdefault(main_host, dict())
+        for canon_name, pathfile in pkgsmods.items():
+            filenames.setdefault(pathfile[1], (canon_name, pathfile))
+    proced_fdnames: Dict[str, Set[str]] = dict()
+    for scan in ordered_scans:
+        if scan.path in attributed_hosts:
+            main_host = attributed_hosts[scan.path][0]
+        else:
+            main_host = scan.path
+        pkgsmods_thishost = pkgsmods_perhost.get(main_host, dict())
+        each_host_proced = proced_fdnames.setdefault(main_host, set())
+        for fdname in sorted(scan.dists):
+            each_host_proced.add(fdname)
+            record = scan.dists[fdname]
+            if record.name is None:
+                continue
+            importables, claimed = _dist_importables(
+                scan.path, record, pkgsmods_thishost
+            )
+            each_host_proced.update(claimed)
+            if importables is not None:
+                mapping.setdefault(record.name, dict()).update(importables)
+    for scan in ordered_scans:
+        if scan.path in attributed_hosts:
+            main_host, pkgname = attributed_hosts[scan.path]
+        else:
+            main_host, pkgname = scan.path, None
+        filenames_thishost = filenames_perhost.get(main_host, dict())
+        each_host_proced = proced_fdnames.setdefault(main_host, set())
+        for fdname in sorted(scan.kinds):
+            if fdname in each_host_proced:
+                continue
+            fdpath = os.path.normcase(os.path.join(scan.path, fdname))
+            if fdpath in attributed_hosts:
+                temp_host, temp_pkgname = attributed_hosts[fdpath]
+                temp_filenames = filenames_perhost.get(temp_host, dict())
+            else:
+                temp_pkgname = pkgname
+                temp_filenames = filenames_thishost
+            if fdname not in temp_filenames:
+                continue
+            canon_name, pathfile = temp_filenames[fdname]
+            final_pkgname = temp_pkgname if temp_pkgname else canon_name
+            mapping.setdefault(final_pkgname, dict())[canon_name] = pathfile[0]
+    return mapping
+
+
+def build_import_index(
+    mapping: Dict[str, Dict[str, str]], folded=False
+) -> Dict[str, List[str]]:
+    """
+    ### 根据映射表生成导入名到包名的反向索引。
+
+    同一个导入名可能由多个包提供(例如命名空间包)，对应的包名列表按映射表中的顺序排列。
+
+    ```
+    :param mapping: dict[str, dict[str, str]], build_mapping 函数生成的映射表。
+
+    :param folded: bool, 是否以小写形式的导入名为键，用于大小写不敏感的查询。
+
+    :return: dict[str, list[str]], {导入名: [包名...]} 字典。
+    ```
+    """
+    index: Dict[str, List[str]] = dict()
+    for pkgname, importables in mapping.items():
+        for impname in importables:
+            if folded:
+                impname = impname.lower()
+            pkgnames = index.setdefault(impname, list())
+            if pkgname not in pkgnames:
+                pkgnames.append(pkgname)
+    return index
+
+
+def build_name_index(mapping: Dict[str, Dict[str, str]]) -> Dict[str, str]:
+    """
+    ### 根据映射表生成按 PEP 503 规范化的包名到映射表中包名的索引。
+
+    例如 'ruamel-yaml'、'Ruamel_Yaml' 都规范化为 'ruamel-yaml'，规范化后相同的多个包名以映射表中靠前的为准。
+    """
+    index: Dict[str, str] = dict()
+    for pkgname in mapping:
+        index.setdefault(canonical_name(pkgname), pkgname)
+    return index
+
+
+def resolve_distribution(
+    sys_paths: Iterable[str], name: str, case: bool, builtins: Iterable[str]
+) -> Optional[Dict[str, str]]:
+    """
+    ### 只读取名称相符的元数据目录，得到单个包在映射表中的条目，用于无需生成完整映射表的单个包查询。
+
+    各目录只列出目录项，通过元数据目录名(见 metadata_dir_name 函数)定位候选的元数据目录，只读取这些目录中的元数据及 top_level.txt，
+
+    无法保证结果与 build_mapping 函数生成的映射表中的条目相同时返回 None，调用者应改为生成完整的映射表，包括：
+
+    没有找到该包、包名与内置模块名相同、大小写不敏感时有多个包名匹配、包名与 .pth 文件名对应的包名相同、
+
+    或者目录中有与包名同名但未被任何元数据目录占用的包或模块(生成映射表时会被归入该包)。
+
+    ```
+    :param sys_paths: Iterable[str], 目标环境的 sys.path。
+
+    :param name: str, 包名。
+
+    :param case: bool, 是否对包名大小写敏感，为 False 时按 PEP 503 规范化后比较。
+
+    :param builtins: Iterable[str], 内置模块名。
+
+    :return: dict[str, str] or None, {导入名: 路径} 字典，无法单独确定时为 None。
+    ```
+    """
+    wanted = canonical_name(name)
+    if any(canonical_name(b) == wanted for b in builtins):
+        return None
+    scans: List[HostScan] = list()
+    for normed_host, host_stat in _iter_hosts(sys_paths):
+        try:
+            kinds, _ = _list_host(normed_host)
+        except Exception:
+            continue
+        scan = HostScan(normed_host, host_stat.st_mtime_ns, kinds)
+        for fdname, kind in kinds.items():
+            if kind == KIND_FILE and fdname.lower().endswith(".pth"):
+                fullpath = os.path.join(normed_host, fdname)
+                scan.pth[fdname] = (None, _prefixes_from_pth(fullpath))
+        scans.append(scan)
+    attributed_hosts = _attributed_hosts(scans)
+    if any(canonical_name(p) == wanted for _, p in attributed_hosts.values()):
+        return None
+    main_hosts: Dict[str, str] = dict()
+    # {main_host: {impname: (fullpath, filename)}}
+    pkgsmods_perhost: Dict[str, Dict[str, Tuple[str, str]]] = dict()
+    for scan in scans:
+        if scan.path in attributed_hosts:
+            main_hosts[scan.path] = attributed_hosts[scan.path][0]
+        else:
+            main_hosts[scan.path] = scan.path
+        _collect_modules(
+            scan, pkgsmods_perhost.setdefault(main_hosts[scan.path], dict())
+        )
+    importables: Optional[Dict[str, str]] = None
+    realnames: Set[str] = set()
+    # {main_host: {被占用的目录项名称}}
+    claimed_perhost: Dict[str, Set[str]] = dict()
+    for scan in scans:
+        main_host = main_hosts[scan.path]
+        for fdname in sorted(scan.kinds):
+            if scan.kinds[fdname] != KIND_DIR or metadata_dir_name(fdname) != wanted:
+                continue
+            dir_fullpath = os.path.join(scan.path, fdname)
+            record = _read_dist(dir_fullpath, _info_file_of(fdname), None)
+            if record.name is None:
+                continue
+            if case and record.name != name:
+                continue
+            if not case and canonical_name(record.name) != wanted:
+                continue
+            realnames.add(record.name)
+            result, claimed = _dist_importables(
+                scan.path, record, pkgsmods_perhost[main_host]
+            )
+            claimed_perhost.setdefault(main_host, set()).update(claimed)
+            if result is not None:
+                if importables is None:
+                    importables = dict()
+                importables.update(result)
+    if importables is None or len(realnames) != 1:
+        return None
+    realname = realnames.pop()
+    for main_host, pkgsmods in pkgsmods_perhost.items():
+        pathfile = pkgsmods.get(realname)
+        if pathfile is None:
+            continue
+        if pathfile[1] not in claimed_perhost.get(main_host, ()):
+            return None
+    return importables
+
+
+# 并行扫描时每个任务检查的 .pth 文件及元数据目录数，避免为每一项单独提交任务
+_CHUNK_SIZE = 64
+# 列出目录时未取得修改时间的标记
+_UNKNOWN = object()
+
+
+def _map(executor: Optional[ThreadPoolExecutor], func, items) -> list:
+    """### 有线程池时在线程池中执行，否则串行执行，结果都按 items 的顺序排列。"""
+    if executor is None:
+        return [func(item) for item in items]
+    return list(executor.map(func, items))
+
+
+def _list_if_changed(item):
+    """
+    ### 目录的修改时间与上次扫描时相同则沿用上次的目录项类型，否则重新列出目录。
+
+    返回(目录项类型字典, 修改时间字典)，沿用上次结果时修改时间字典为 None，目录无法读取时返回 None。
+    """
+    normed_host, host_stat, previous = item
+    if previous is not None and previous.mtime == host_stat.st_mtime_ns:
+        return previous.kinds, None
+    try:
+        return _list_host(normed_host)
+    except Exception:
+        return None
+
+
+def _check_entries(jobs) -> List[Tuple[Any, bool]]:
+    """
+    ### 检查一批 .pth 文件或元数据目录，修改时间未变化的沿用上次的结果，否则重新读取。
+
+    返回与 jobs 顺序相同的(结果, 是否重新读取)列表。
+    """
+    results: List[Tuple[Any, bool]] = list()
+    for scan, fdname, info_file, mtime, (old_mtime, old) in jobs:
+        fullpath = os.path.join(scan.path, fdname)
+        if mtime is _UNKNOWN:
+            mtime = _mtime(fullpath)
+        if old is not None and old_mtime == mtime and mtime is not None:
+            results.append((old, False))
+        elif info_file is None:
+            results.append(((mtime, _prefixes_from_pth(fullpath)), True))
+        else:
+            results.append((_read_dist(fullpath, info_file, mtime), True))
+    return results
+
+
+class PackageMapScanner:
+    """
+    ### sys.path 各目录的扫描器，保存各目录的扫描结果以支持增量扫描。
+
+    增量扫描时，目录的修改时间未变化则沿用上次的目录项列表，只检查其中 .pth 文件及元数据目录的修改时间，
+
+    仅重新读取新增或发生变化的部分；目录的修改时间变化(有文件或目录被添加、删除、重命名)时才重新列出该目录。
+    """
+
+    def __init__(self):
+        self.__scans: Dict[str, HostScan] = dict()
+        self.__hosts: Tuple[str, ...] = tuple()
+        self.__stats: Dict[str, int] = dict()
+
+    @property
+    def hosts(self) -> Tuple[str, ...]:
+        """### 上次扫描的目录(已规范化大小写且去重)，按 sys.path 顺序排列。"""
+        return self.__hosts
+
+    @property
+    def scans(self) -> Dict[str, HostScan]:
+        """### 各目录的扫描结果。"""
+        return self.__scans
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        ### 上次扫描的统计信息。
+
+        hosts：扫描的目录数；listed：重新列出的目录数；pth_read：读取的 .pth 文件数；dists_read：读取的元数据目录数。
+        """
+        return self.__stats.copy()
+
+    def clear(self):
+        """### 清除所有扫描结果，下次扫描时将完整扫描。"""
+        self.__scans = dict()
+        self.__hosts = tuple()
+
+    def dump(self) -> Dict[str, Any]:
+        """### 将扫描结果转换为可序列化为 JSON 的字典，用于磁盘缓存。"""
+        return {
+            "hosts": list(self.__hosts),
+            "scans": {k: v.dump() for k, v in self.__scans.items()},
+        }
+
+    def load(self, data: Dict[str, Any]) -> bool:
+        """
+        ### 从 dump 方法生成的字典恢复扫描结果，之后的增量扫描只需检查各目录的修改时间。
+
+        ```
+        :param data: dict, dump 方法的返回值。
+
+        :return: bool, 是否恢复成功，数据无效时保持原有扫描结果不变。
+        ```
+        """
+        try:
+            scans = {k: HostScan.load(v) for k, v in data["scans"].items()}
+            hosts = tuple(data["hosts"])
+        except Exception:
+            return False
+        if not all(h in scans for h in hosts):
+            return False
+        self.__scans, self.__hosts = scans, hosts
+        return True
+
+    def scan(
+        self, sys_paths: Iterable[str], incremental=True, workers: Optional[int] = None
+    ) -> bool:
+        """
+        ### 扫描 sys.path 中的各目录。
+
+        经由不同写法(如大小写、相对路径)或符号链接到达的同一目录(设备号及 inode 号相同)只扫描一次，以先出现的为准。
+
+        workers 大于 1 时使用线程池同时列出各目录、读取各 .pth 文件及元数据目录，适用于网络驱动器等 I/O 延迟较高的情况，
+
+        各项结果按与串行扫描相同的顺序合并，扫描结果与串行扫描完全相同。
+
+        ```
+        :param sys_paths: Iterable[str], 目标环境的 sys.path。
+
+        :param incremental: bool, 是否增量扫描，False 则忽略已有的扫描结果重新扫描所有目录。
+
+        :param workers: int or None, 线程数，None 或小于 2 的值表示在当前线程中串行扫描。
+
+        :return: bool, 扫描结果与上次相比是否有变化。
+        ```
+
+        `workers 既不是 None 也不是整数则抛出 TypeError 异常。`
+        """
+        if workers is not None and (
+            isinstance(workers, bool) or not isinstance(workers, int)
+        ):
+            raise TypeError("参数 workers 值应为 None 或整数。")
+        stats = {"hosts": 0, "listed": 0, "pth_read": 0, "dists_read": 0}
+        previous_scans = self.__scans if incremental else dict()
+        host_items = [
+            (normed_host, host_stat, previous_scans.get(normed_host))
+            for normed_host, host_stat in _iter_hosts(sys_paths)
+        ]
+        executor = None
+        if workers is not None and workers > 1:
+            executor = ThreadPoolExecutor(workers, "fastpip-scan")
+        try:
+            listings = _map(executor, _list_if_changed, host_items)
+            scans: Dict[str, HostScan] = dict()
+            # 各目录中需要检查的 .pth 文件及元数据目录，按串行扫描的顺序排列
+            jobs: List[Tuple[HostScan, str, Optional[str], Any, Any]] = list()
+            changed = not incremental
+            for (normed_host, host_stat, previous), listing in zip(
+                host_items, listings
+            ):
+                if listing is None:
+                    continue
+                kinds, mtimes = listing
+                if mtimes is None:
+                    mtimes = dict()
+                else:
+                    changed = True
+                    stats["listed"] += 1
+                scan = HostScan(normed_host, host_stat.st_mtime_ns, kinds)
+                scans[normed_host] = scan
+                for fdname, kind in kinds.items():
+                    if kind == KIND_FILE and fdname.lower().endswith(".pth"):
+                        info_file = None
+                        old = previous.pth.get(fdname) if previous else None
+                        old_mtime = old[0] if old is not None else None
+                    elif kind == KIND_DIR:
+                        info_file = _info_file_of(fdname)
+                        if info_file is None:
+                            continue
+                        old = previous.dists.get(fdname) if previous else None
+                        old_mtime = old.mtime if old is not None else None
+                    else:
+                        continue
+                    mtime = mtimes.get(fdname, _UNKNOWN)
+                    jobs.append((scan, fdname, info_file, mtime, (old_mtime, old)))
+            chunks = [
+                jobs[i : i + _CHUNK_SIZE] for i in range(0, len(jobs), _CHUNK_SIZE)
+            ]
+            results = _map(executor, _check_entries, chunks)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        for (scan, fdname, info_file, _, _), (value, was_read) in zip(
+            jobs, (r for chunk in results for r in chunk)
+        ):
+            if info_file is None:
+                scan.pth[fdname] = value
+                stats["pth_read"] += was_read
+            else:
+                scan.dists[fdname] = value
+                stats["dists_read"] += was_read
+            changed = changed or was_read
+        for normed_host, scan in scans.items():
+            previous = previous_scans.get(normed_host)
+            if changed or previous is None:
+                continue
+            changed = len(scan.pth) != len(previous.pth) or len(scan.dists) != len(
+                previous.dists
+            )
+        hosts = tuple(scans)
+        stats["hosts"] = len(hosts)
+        # 目录被移除或变得无效时目录列表与上次不同
+        changed = changed or hosts != self.__hosts
+        self.__scans, self.__hosts, self.__stats = scans, hosts, stats
+        return changed
+
+    def build(self, builtins: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        """### 根据上次扫描的结果生成包名与导入名的映射表，详见 build_mapping 函数。"""
+        return build_mapping(self.__hosts, self.__scans, builtins)
@@ -0,0 +1,308 @@
+# coding: utf-8
+
+import os
+import re
+from typing import *
+
+from ..com.common import *
+from .distinfo import canonical_name
+
+# PEP 508 需求解析优先使用已安装的 packaging，其次使用 pip 自带的副本，都不可用时无法在进程内判断需求是否满足
+try:
+    from packaging.requirements import InvalidRequirement, Requirement
+    from packaging.version import InvalidVersion, Version
+except ImportError:
+    try:
+        from pip._vendor.packaging.requirements import InvalidRequirement, Requirement
+        from pip._vendor.packaging.version import InvalidVersion, Version
+    except ImportError:
+        InvalidRequirement = InvalidVersion = ValueError
+        Requirement = Version = None
+
+__all__ = [
+    "dependency_closure",
+    "needs_requirements_file",
+    "normalize_requirement_line",
+    "packaging_available",
+    "parse_requirement",
+    "read_requirements",
+    "requirement_name",
+    "requirement_satisfied",
+]
+
+# 只能写在 requirements 文件中、作用于单个需求的 pip 选项
+_PER_REQUIREMENT_OPTIONS = re.compile(
+    r"\s(?:--hash|--config-settings|--global-option|--install-option)\b"
+)
+# 可编辑安装选项
+_EDITABLE_OPTIONS = ("-e", "--editable")
+# 分发包文件的扩展名
+_ARCHIVE_SUFFIXES = (".whl", ".zip", ".tar.gz", ".tar.bz2", ".tgz")
+# URL 中的 #egg=包名 片段
+_EGG_FRAGMENT = re.compile(r"[#&]egg=([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+
+def packaging_available() -> bool:
+    """### packaging(或 pip 自带的 packaging)是否可用。"""
+    return Requirement is not None
+
+
+def parse_requirement(text: str) -> Optional["Requirement"]:
+    """
+    ### 按 PEP 508 解析需求字符串，例如 'requests[socks]>=2.0; python_version >= "3.8"'。
+
+    ```
+    :param text: str, 需求字符串，行尾的注释(' #' 之后的内容)及 --hash 等单个需求的选项被忽略。
+
+    :return: packaging.requirements.Requirement or None, 无法解析(如本地路径、可编辑安装、pip 选项)或 packaging 不可用时返回 None。
+    ```
+    """
+    if Requirement is None:
+        return None
+    text, _, editable = _split_line(text.split(" #", 1)[0])
+    if editable or not text or text.startswith(("-", "#")):
+        return None
+    try:
+        return Requirement(text)
+    except InvalidRequirement:
+        return None
+
+
+def requirement_name(line: str) -> Optional[str]:
+    """
+    ### 获取需求行(read_requirements 函数返回的格式)对应的包名，无法确定时返回 None。
+
+    PEP 508 需求取其包名，本地路径、URL 及可编辑安装只有带有 '#egg=包名' 片段时才能确定包名。
+    """
+    requirement = parse_requirement(line)
+    if requirement is not None:
+        return requirement.name
+    matched = _EGG_FRAGMENT.search(_split_line(line)[0])
+    return matched.group(1) if matched else None
+
+
+def _split_line(line: str) -> Tuple[str, str, bool]:
+    """
+    ### 将需求行拆分为(需求文本, 单个需求的选项, 是否可编辑安装)元组。
+
+    选项保持原样(如 '--hash=sha256:...')，可编辑安装的需求文本为 -e 选项的值。
+    """
+    line = line.strip()
+    editable = False
+    for option in _EDITABLE_OPTIONS:
+        if line.startswith(option + "=") or line.startswith(option + " "):
+            line, editable = line[len(option) + 1 :].strip(), True
+            break
+    matched = _PER_REQUIREMENT_OPTIONS.search(line)
+    if matched is None:
+        return line, EMPTY_STR, editable
+    return line[: matched.start()].strip(), line[matched.start() :].strip(), editable
+
+
+def needs_requirements_file(line: str) -> bool:
+    """### 需求行是否只能通过 requirements 文件交给 pip(带有单个需求的选项或为可编辑安装)。"""
+    _, options, editable = _split_line(line)
+    return bool(options) or editable
+
+
+def _is_local_path(text: str) -> bool:
+    """### 需求文本是否为本地路径(目录或分发包文件)，而不是 PEP 508 需求或 URL。"""
+    if "://" in text or "@" in text:
+        return False
+    return (
+        text.startswith(".")
+        or "/" in text
+        or "\\" in text
+        or os.path.isabs(text)
+        or text.endswith(_ARCHIVE_SUFFIXES)
+    )
+
+
+def normalize_requirement_line(line: str, base: str) -> str:
+    """
+    ### 规范化一行需求：可编辑安装统一为 '-e 目标' 形式，本地路径转换为相对于 base 目录的绝对路径。
+
+    pip 在 Python 环境目录中执行，所以相对路径必须先转换为绝对路径。
+
+    `line 是 -e 以外的 pip 选项行(例如 -i、-c、--no-index)则抛出 ValueError 异常。`
+    """
+    text, options, editable = _split_line(line)
+    if text.startswith("-"):
+        raise ValueError(
+            "不支持 requirements 中的 pip 选项：{}，请改用对应的方法参数(例如 index_url)。".format(
+                line.strip()
+            )
+        )
+    if _is_local_path(text):
+        path, extras = re.match(r"^(.*?)(\[[^\[\]]*\])?$", text).groups()
+        text = os.path.abspath(os.path.join(base, path)) + (extras or EMPTY_STR)
+    line = "-e " + text if editable else text
+    return "{} {}".format(line, options) if options else line
+
+
+def read_requirements(path: str) -> List[str]:
+    """
+    ### 读取 requirements 文件中的需求行。
+
+    忽略空行及注释，合并以 '\\' 结尾的续行，'-r' 或 '--requirement' 引用的文件(相对于引用者所在目录)被递归读取；
+
+    可编辑安装('-e' 或 '--editable')的行以 '-e 目标' 的形式返回，--hash 等单个需求的选项保留在行尾，
+
+    本地路径被转换为相对于所在文件目录的绝对路径。
+
+    ```
+    :param path: str, requirements 文件路径。
+
+    :return: list[str], 需求行列表，按文件中的顺序排列。
+    ```
+
+    `文件无法读取则抛出 OSError 异常；`
+
+    `文件中有 -r、-e 以外的 pip 选项行(例如 -i、-c、--no-index)则抛出 ValueError 异常。`
+    """
+    requirements: List[str] = list()
+    __read_file(os.path.abspath(path), requirements, set())
+    return requirements
+
+
+def __read_file(path: str, requirements: List[str], visited: Set[str]):
+    key = os.path.normcase(path)
+    if key in visited:
+        return
+    visited.add(key)
+    with open(path, "rt", encoding="utf-8") as f:
+        content = f.read().replace("\\\n", "")
+    for line in content.splitlines():
+        line = line.split(" #", 1)[0].strip()
+        if not line or line.startswith("#"):
+            continue
+        option, _, value = line.partition(" ")
+        if option in ("-r", "--requirement") or option.startswith("--requirement="):
+            value = value.strip() or option.partition("=")[2]
+            included = os.path.normpath(os.path.join(os.path.dirname(path), value))
+            __read_file(included, requirements, visited)
+        else:
+            requirements.append(normalize_requirement_line(line, os.path.dirname(path)))
+
+
+def _marker_applies(requirement: "Requirement", environment, extra=EMPTY_STR) -> bool:
+    """### 需求的环境标记在给定环境(及 extra)下是否成立，没有环境标记时总是成立。"""
+    if requirement.marker is None:
+        return True
+    marker_env = dict(environment)
+    marker_env["extra"] = extra
+    try:
+        return requirement.marker.evaluate(marker_env)
+    except Exception:
+        return False
+
+
+def requirement_satisfied(
+    requirement: "Requirement",
+    installed: Mapping[str, str],
+    environment: Mapping[str, str],
+    metadata: Optional[Mapping[str, Tuple[str, Dict[str, List[str]]]]] = None,
+) -> bool:
+    """
+    ### 判断需求是否已被满足。
+
+    环境标记不成立(需求不适用于该环境)时视为已满足；带有 URL 的需求总是视为不满足；
+
+    带有 extras 的需求在提供了 metadata 时还要求这些 extras 引入的依赖都已被满足，否则总是视为不满足；
+
+    与 pip 一致，已安装的预发行版本只要符合版本限定就视为满足。
+
+    ```
+    :param requirement: packaging.requirements.Requirement, parse_requirement 函数的返回值。
+
+    :param installed: Mapping[str, str], {规范化包名: 已安装版本} 字典。
+
+    :param environment: Mapping[str, str], 目标环境的 PEP 508 环境标记，即 PyEnv.probe 方法返回的 markers 字段。
+
+    :param metadata: Mapping or None, installed_metadata 函数的返回值，用于检查 extras 引入的依赖。
+
+    :return: bool, 是否已满足。
+    ```
+    """
+    return __satisfied(requirement, installed, environment, metadata, set())
+
+
+def __satisfied(requirement, installed, environment, metadata, visited) -> bool:
+    if not _marker_applies(requirement, environment):
+        return True
+    if requirement.url:
+        return False
+    key = canonical_name(requirement.name)
+    if requirement.extras:
+        if metadata is None or key not in metadata:
+            return False
+        for extra in sorted(requirement.extras):
+            if (key, extra) in visited:
+                continue
+            visited.add((key, extra))
+            for line in metadata[key][1].get("Requires-Dist", ()):
+                dependency = parse_requirement(line)
+                if dependency is None:
+                    continue
+                # 只检查该 extra 引入的依赖，不带 extras 时也成立的依赖由包自身的安装保证
+                if _marker_applies(dependency, environment) or not _marker_applies(
+                    dependency, environment, extra
+                ):
+                    continue
+                dependency.marker = None
+                if not __satisfied(
+                    dependency, installed, environment, metadata, visited
+                ):
+                    return False
+    version = installed.get(key)
+    if version is None:
+        return False
+    if not requirement.specifier:
+        return True
+    try:
+        return requirement.specifier.contains(Version(version), prereleases=True)
+    except InvalidVersion:
+        return False
+
+
+def dependency_closure(
+    requirements: Iterable["Requirement"],
+    metadata: Mapping[str, Tuple[str, Dict[str, List[str]]]],
+    environment: Mapping[str, str],
+) -> Set[str]:
+    """
+    ### 按已安装包的 Requires-Dist 递归展开需求，返回需求及其全部依赖的规范化包名集合。
+
+    环境标记不成立的需求及依赖被忽略；需求带有 extras 时，这些 extras 引入的依赖同样被展开；未安装的包不再展开。
+
+    ```
+    :param requirements: Iterable[Requirement], 需求列表。
+
+    :param metadata: Mapping, installed_metadata 函数的返回值。
+
+    :param environment: Mapping[str, str], 目标环境的 PEP 508 环境标记。
+
+    :return: set[str], 规范化包名集合。
+    ```
+    """
+    closure: Set[str] = set()
+    expanded: Set[Tuple[str, str]] = set()
+    stack = [
+        (canonical_name(r.name), r.extras)
+        for r in requirements
+        if _marker_applies(r, environment)
+    ]
+    while stack:
+        key, extras = stack.pop()
+        closure.add(key)
+        pending = [e for e in (EMPTY_STR, *extras) if (key, e) not in expanded]
+        if not pending or key not in metadata:
+            continue
+        expanded.update((key, e) for e in pending)
+        for line in metadata[key][1].get("Requires-Dist", ()):
+            dependency = parse_requirement(line)
+            if dependency is not None and any(
+                _marker_applies(dependency, environment, e) for e in pending
+            ):
+                stack.append((canonical_name(dependency.name), dependency.extras))
+    return closure
@@ -0,0 +1,246 @@
+# coding: utf-8
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+from typing import *
+
+__all__ = ["HostWatcher"]
+
+# inotify 常量，见 <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_ONLYDIR = 0x01000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_IN_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+    | _IN_ONLYDIR
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_inotify():
+    """### 通过 ctypes 加载 libc 中的 inotify 函数，非 Linux 系统或加载失败时返回 None。"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        init1, add_watch = libc.inotify_init1, libc.inotify_add_watch
+        rm_watch = libc.inotify_rm_watch
+    except Exception:
+        return None
+    init1.argtypes, init1.restype = [ctypes.c_int], ctypes.c_int
+    add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    add_watch.restype = ctypes.c_int
+    rm_watch.argtypes, rm_watch.restype = [ctypes.c_int, ctypes.c_int], ctypes.c_int
+    return init1, add_watch, rm_watch
+
+
+class HostWatcher:
+    """
+    ### 监视 sys.path 各目录，目录中有文件或目录被添加、删除、重命名或修改时将状态标记为"已变化"。
+
+    Linux 上使用 inotify(通过 ctypes 调用，无需第三方依赖)，变化发生后立即被标记；
+
+    其他系统或 inotify 不可用时(如达到监视数量上限)改为每隔 interval 秒检查各目录的修改时间，
+
+    此时只能发现目录项的添加、删除和重命名，不能发现已有文件(如 .pth 文件)的原地修改。
+
+    监视只是决定何时重新扫描，发生变化的具体内容仍由增量扫描(见 PackageMapScanner 类)确定。
+    """
+
+    def __init__(self, interval: Union[int, float] = 1.0, use_inotify=True):
+        """
+        ```
+        :param interval: int or float, 轮询方式下检查目录修改时间的间隔秒数。
+
+        :param use_inotify: bool, 可用时是否使用 inotify，为 False 时总是使用轮询方式。
+        ```
+
+        `interval 不是整数或浮点数则抛出 TypeError 异常，不是正数则抛出 ValueError 异常。`
+        """
+        if isinstance(interval, bool) or not isinstance(interval, (int, float)):
+            raise TypeError("参数 interval 值应为整数或浮点数。")
+        if interval <= 0:
+            raise ValueError("参数 interval 的值应为正数。")
+        self.__interval = interval
+        self.__lock = threading.Lock()
+        self.__paths: Tuple[str, ...] = tuple()
+        self.__dirty = True
+        self.__closed = False
+        self.__wakeup = threading.Event()
+        self.__inotify = _load_inotify() if use_inotify else None
+        # inotify 实例及用于唤醒监视线程的管道，在整个生命周期内不变，close 方法中关闭
+        self.__fd = -1
+        self.__pipe: Tuple[int, int] = (-1, -1)
+        self.__watches: Dict[int, str] = dict()
+        if self.__inotify is not None:
+            self.__fd = self.__inotify[0](_IN_NONBLOCK | _IN_CLOEXEC)
+            if self.__fd < 0:
+                self.__inotify = None
+            else:
+                self.__pipe = os.pipe()
+        self.__mtimes: Dict[str, Optional[int]] = dict()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def __str__(self):
+        return "HostWatcher(method={}, paths={})".format(self.method, len(self.__paths))
+
+    __repr__ = __str__
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def method(self) -> str:
+        """### 监视方式，'inotify' 或 'polling'。"""
+        return "polling" if self.__inotify is None else "inotify"
+
+    @property
+    def paths(self) -> Tuple[str, ...]:
+        """### 正在监视的目录。"""
+        return self.__paths
+
+    @property
+    def dirty(self) -> bool:
+        """### 自上次调用 consume 方法以来各目录是否可能发生了变化。"""
+        return self.__dirty
+
+    @property
+    def closed(self) -> bool:
+        """### 是否已停止监视。"""
+        return self.__closed
+
+    def consume(self) -> bool:
+        """
+        ### 返回各目录是否可能发生了变化并清除该状态。
+
+        应在重新扫描之前调用，扫描过程中发生的变化会再次标记状态，不会被遗漏。
+        """
+        with self.__lock:
+            dirty, self.__dirty = self.__dirty, False
+        return dirty
+
+    def mark_dirty(self):
+        """### 手动将状态标记为"已变化"。"""
+        with self.__lock:
+            self.__dirty = True
+
+    def set_paths(self, paths: Iterable[str]):
+        """
+        ### 设置要监视的目录，与正在监视的目录不同时将状态标记为"已变化"。
+
+        ```
+        :param paths: Iterable[str], 要监视的目录。
+        ```
+        """
+        paths = tuple(paths)
+        with self.__lock:
+            if paths == self.__paths or self.__closed:
+                return
+            self.__paths = paths
+            self.__dirty = True
+            if self.__inotify is not None:
+                self.__rewatch(paths)
+            else:
+                self.__mtimes = {p: self.__mtime(p) for p in paths}
+
+    def close(self):
+        """### 停止监视并释放资源，之后 dirty 属性总为 True。"""
+        with self.__lock:
+            if self.__closed:
+                return
+            self.__closed = True
+            self.__dirty = True
+        self.__wakeup.set()
+        if self.__fd >= 0:
+            os.write(self.__pipe[1], b"\0")
+        self.__thread.join()
+        if self.__fd >= 0:
+            for fd in (self.__fd,) + self.__pipe:
+                os.close(fd)
+
+    @staticmethod
+    def __mtime(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except Exception:
+            return None
+
+    def __rewatch(self, paths: Tuple[str, ...]):
+        """### 移除原有的 inotify 监视并监视新的目录，失败时(如达到监视数量上限)改为轮询方式。"""
+        _, add_watch, rm_watch = self.__inotify
+        for wd in self.__watches:
+            rm_watch(self.__fd, wd)
+        self.__watches = dict()
+        for path in paths:
+            wd = add_watch(self.__fd, os.fsencode(path), _IN_MASK)
+            if wd >= 0:
+                self.__watches[wd] = path
+            elif ctypes.get_errno() in (errno.ENOSPC, errno.EMFILE):
+                self.__fall_back(paths)
+                return
+
+    def __fall_back(self, paths: Tuple[str, ...]):
+        self.__mtimes = {p: self.__mtime(p) for p in paths}
+        self.__inotify = None
+        # 唤醒正在等待 inotify 事件的监视线程，使其改为轮询
+        os.write(self.__pipe[1], b"\0")
+
+    def __run(self):
+        while not self.__closed:
+            if self.__inotify is not None:
+                self.__wait_inotify()
+            else:
+                self.__wakeup.wait(self.__interval)
+                self.__wakeup.clear()
+                self.__poll()
+
+    def __wait_inotify(self):
+        fd, pipe_r = self.__fd, self.__pipe[0]
+        readable = select.select([fd, pipe_r], [], [])[0]
+        if pipe_r in readable:
+            os.read(pipe_r, 512)
+        if fd not in readable:
+            return
+        try:
+            data = os.read(fd, 65536)
+        except OSError:
+            return
+        # 任何事件(包括队列溢出 IN_Q_OVERFLOW 及监视被移除 IN_IGNORED)都意味着需要重新扫描
+        if len(data) >= _EVENT_HEADER.size:
+            self.mark_dirty()
+
+    def __poll(self):
+        with self.__lock:
+            paths, mtimes = self.__paths, self.__mtimes
+        for path in paths:
+            mtime = self.__mtime(path)
+            if mtime != mtimes.get(path):
+                mtimes[path] = mtime
+                self.mark_dirty()
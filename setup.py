@@ -26,7 +26,6 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     packages=find_packages(),
-    platforms=["win32", "win_amd64"],
     install_requires=install_requires,
     python_requires=">=3.7",
     license="MIT License",
@@ -0,0 +1,27 @@
+# coding: utf-8
+
+import os
+
+import pytest
+
+
+def _write_dist(site, name, version, requires=(), extras=()):
+    """### 在 site 目录中写入一个只有 METADATA 及 RECORD 的 dist-info 目录。"""
+    folder = os.path.join(
+        site, "{}-{}.dist-info".format(name.replace("-", "_"), version)
+    )
+    os.makedirs(folder, exist_ok=True)
+    lines = ["Metadata-Version: 2.1", "Name: " + name, "Version: " + version]
+    lines.extend("Provides-Extra: " + e for e in extras)
+    lines.extend("Requires-Dist: " + r for r in requires)
+    with open(os.path.join(folder, "METADATA"), "wt", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n\n长描述不应被读取\nName: ignored\n")
+    with open(os.path.join(folder, "RECORD"), "wt", encoding="utf-8") as f:
+        f.write("")
+    return folder
+
+
+@pytest.fixture
+def make_dist():
+    """### 返回在指定目录中生成 dist-info 的函数：make_dist(目录, 包名, 版本, requires=(), extras=())。"""
+    return _write_dist
@@ -0,0 +1,74 @@
+# coding: utf-8
+
+import os
+
+from fastpip.utils.distinfo import (
+    canonical_name,
+    find_metadata_files,
+    installed_distributions,
+    installed_metadata,
+    read_metadata_headers,
+)
+
+
+def test_canonical_name():
+    assert canonical_name("Ruamel_Yaml") == "ruamel-yaml"
+    assert canonical_name("zope.interface") == "zope-interface"
+    assert canonical_name("a__-.b") == "a-b"
+
+
+def test_read_metadata_headers_stops_at_body(tmp_path, make_dist):
+    folder = make_dist(str(tmp_path), "appa", "1.0", requires=["depb", "depc>=2"])
+    headers = read_metadata_headers(os.path.join(folder, "METADATA"))
+    assert headers["Name"] == ["appa"]
+    assert headers["Requires-Dist"] == ["depb", "depc>=2"]
+
+
+def test_read_metadata_headers_missing_file(tmp_path):
+    assert read_metadata_headers(str(tmp_path / "METADATA")) == dict()
+
+
+def test_find_metadata_files(tmp_path):
+    for name in ("a-1.dist-info", "b-1.egg-info", "c-1.egg", "d", "e.py"):
+        (tmp_path / name).mkdir()
+    (tmp_path / "f-1.egg-info").write_text("")
+    found = find_metadata_files(str(tmp_path))
+    assert found == [
+        os.path.join(str(tmp_path), "a-1.dist-info", "METADATA"),
+        os.path.join(str(tmp_path), "b-1.egg-info", "PKG-INFO"),
+        os.path.join(str(tmp_path), "c-1.egg", "EGG-INFO", "PKG-INFO"),
+        os.path.join(str(tmp_path), "f-1.egg-info"),
+    ]
+
+
+def test_installed_metadata_prefers_earlier_paths(tmp_path, make_dist):
+    first, second = tmp_path / "first", tmp_path / "second"
+    make_dist(str(first), "Shared_Pkg", "2.0")
+    make_dist(str(second), "shared-pkg", "1.0")
+    make_dist(str(second), "only", "0.1")
+    make_dist(str(second), "wsgiref", "0.1")
+    metadata = installed_metadata([str(first), str(tmp_path / "missing"), str(second)])
+    assert list(metadata) == ["only", "shared-pkg"]
+    assert metadata["shared-pkg"][0] == str(first)
+    assert metadata["shared-pkg"][1]["Version"] == ["2.0"]
+    assert installed_distributions([str(first), str(second)]) == [
+        ("only", "0.1"),
+        ("Shared_Pkg", "2.0"),
+    ]
+
+
+def test_installed_metadata_converts_egg_requires(tmp_path):
+    egg_info = tmp_path / "old-1.0.egg-info"
+    egg_info.mkdir()
+    (egg_info / "PKG-INFO").write_text(
+        "Metadata-Version: 1.0\nName: old\nVersion: 1.0\n"
+    )
+    (egg_info / "requires.txt").write_text(
+        "base\n\n[:sys_platform == 'win32']\nwinonly\n\n[fancy]\nextdep>=1\n"
+    )
+    headers = installed_metadata([str(tmp_path)])["old"][1]
+    assert headers["Requires-Dist"] == [
+        "base",
+        "winonly ; (sys_platform == 'win32')",
+        'extdep>=1 ; extra == "fancy"',
+    ]
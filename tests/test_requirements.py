@@ -0,0 +1,186 @@
+# coding: utf-8
+
+import os
+
+import pytest
+
+from fastpip.utils.distinfo import installed_metadata
+from fastpip.utils.requirements import (
+    dependency_closure,
+    needs_requirements_file,
+    normalize_requirement_line,
+    packaging_available,
+    parse_requirement,
+    read_requirements,
+    requirement_name,
+    requirement_satisfied,
+)
+
+pytestmark = pytest.mark.skipif(
+    not packaging_available(), reason="packaging 及 pip 自带的 packaging 都不可用"
+)
+
+ENVIRONMENT = {
+    "implementation_name": "cpython",
+    "implementation_version": "3.11.4",
+    "os_name": "posix",
+    "platform_machine": "x86_64",
+    "platform_python_implementation": "CPython",
+    "platform_release": "",
+    "platform_system": "Linux",
+    "platform_version": "",
+    "python_full_version": "3.11.4",
+    "python_version": "3.11",
+    "sys_platform": "linux",
+}
+
+
+@pytest.fixture
+def site(tmp_path, make_dist):
+    """### appa 依赖 depb，extra fancy 引入 extdep，winonly 只在 Windows 上需要。"""
+    make_dist(
+        str(tmp_path),
+        "appa",
+        "1.0",
+        requires=[
+            "depb>=2",
+            'extdep ; extra == "fancy"',
+            'winonly ; sys_platform == "win32"',
+        ],
+        extras=["fancy"],
+    )
+    make_dist(str(tmp_path), "depb", "2.0", requires=["depc"])
+    make_dist(str(tmp_path), "depc", "1.0rc1")
+    make_dist(str(tmp_path), "lone", "0.1")
+    return installed_metadata([str(tmp_path)])
+
+
+def _installed(metadata):
+    return {k: v[1]["Version"][0] for k, v in metadata.items()}
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("depb", True),
+        ("DepB>=2,<3", True),
+        ("depb>2", False),
+        ("missing", False),
+        ('missing ; sys_platform == "win32"', True),
+        ("depc>=1.0", False),
+        ("depc>=1.0rc1", True),
+        ("depc", True),
+        ("appa @ https://example.com/appa-1.0.tar.gz", False),
+    ],
+)
+def test_requirement_satisfied(site, text, expected):
+    requirement = parse_requirement(text)
+    assert (
+        requirement_satisfied(requirement, _installed(site), ENVIRONMENT, site)
+        is expected
+    )
+
+
+def test_requirement_satisfied_extras(site, make_dist, tmp_path):
+    requirement = parse_requirement("appa[fancy]")
+    installed = _installed(site)
+    assert not requirement_satisfied(requirement, installed, ENVIRONMENT, site)
+    assert not requirement_satisfied(requirement, installed, ENVIRONMENT, None)
+    make_dist(str(tmp_path), "extdep", "1.0")
+    site = installed_metadata([str(tmp_path)])
+    assert requirement_satisfied(requirement, _installed(site), ENVIRONMENT, site)
+
+
+def test_dependency_closure(site):
+    closure = dependency_closure([parse_requirement("appa")], site, ENVIRONMENT)
+    assert closure == {"appa", "depb", "depc"}
+    closure = dependency_closure([parse_requirement("appa[fancy]")], site, ENVIRONMENT)
+    assert closure == {"appa", "depb", "depc", "extdep"}
+    windows = dict(ENVIRONMENT, sys_platform="win32")
+    closure = dependency_closure([parse_requirement("appa")], site, windows)
+    assert closure == {"appa", "depb", "depc", "winonly"}
+    skipped = parse_requirement('lone ; python_version < "3"')
+    assert dependency_closure([skipped], site, ENVIRONMENT) == set()
+
+
+def test_parse_requirement_ignores_options_and_comments():
+    requirement = parse_requirement("six==1.16.0 --hash=sha256:abc  # 注释")
+    assert str(requirement) == "six==1.16.0"
+    assert parse_requirement("-e ./local") is None
+    assert parse_requirement("./local") is None
+
+
+def test_requirement_name():
+    assert requirement_name("Six>=1") == "Six"
+    assert requirement_name("pkg @ https://example.com/pkg.zip") == "pkg"
+    assert (
+        requirement_name("-e git+https://example.com/repo.git#egg=local_pkg")
+        == "local_pkg"
+    )
+    assert requirement_name("./local") is None
+
+
+def test_needs_requirements_file():
+    assert needs_requirements_file("six==1.16.0 --hash=sha256:abc")
+    assert needs_requirements_file("-e ./local")
+    assert not needs_requirements_file("six==1.16.0")
+
+
+def test_normalize_requirement_line(tmp_path):
+    base = str(tmp_path)
+    assert normalize_requirement_line("six>=1", base) == "six>=1"
+    assert normalize_requirement_line("--editable=./pkg", base) == "-e " + os.path.join(
+        base, "pkg"
+    )
+    assert normalize_requirement_line("./pkg[fancy]", base) == (
+        os.path.join(base, "pkg") + "[fancy]"
+    )
+    assert normalize_requirement_line("dist/a-1.0.whl --hash=sha256:abc", base) == (
+        os.path.join(base, "dist", "a-1.0.whl") + " --hash=sha256:abc"
+    )
+    url = "git+https://example.com/repo.git#egg=pkg"
+    assert normalize_requirement_line(url, base) == url
+
+
+@pytest.mark.parametrize(
+    "line", ["-i https://example.com/simple", "--index-url=https://x", "-c c.txt"]
+)
+def test_normalize_requirement_line_rejects_options(tmp_path, line):
+    with pytest.raises(ValueError):
+        normalize_requirement_line(line, str(tmp_path))
+
+
+def test_read_requirements(tmp_path):
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    (tmp_path / "requirements.txt").write_text(
+        "# 注释\n"
+        "six>=1  # 行尾注释\n"
+        "attrs\\\n"
+        ">=20\n"
+        "-r sub/more.txt\n"
+        "--requirement=requirements.txt\n"
+        "-e ./local\n",
+        encoding="utf-8",
+    )
+    (sub / "more.txt").write_text(
+        "\n../wheels/a-1.0.whl --hash=sha256:abc\n-r ../requirements.txt\n",
+        encoding="utf-8",
+    )
+    assert read_requirements(str(tmp_path / "requirements.txt")) == [
+        "six>=1",
+        "attrs>=20",
+        os.path.join(str(tmp_path), "wheels", "a-1.0.whl") + " --hash=sha256:abc",
+        "-e " + os.path.join(str(tmp_path), "local"),
+    ]
+
+
+def test_read_requirements_rejects_index_options(tmp_path):
+    (tmp_path / "requirements.txt").write_text("six\n-i https://example.com\n")
+    with pytest.raises(ValueError):
+        read_requirements(str(tmp_path / "requirements.txt"))
+
+
+def test_read_requirements_missing_file(tmp_path):
+    with pytest.raises(OSError):
+        read_requirements(str(tmp_path / "missing.txt"))
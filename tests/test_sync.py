@@ -0,0 +1,119 @@
+# coding: utf-8
+
+import os
+import venv
+
+import pytest
+
+from fastpip import PyEnv
+from fastpip.utils.requirements import packaging_available
+
+pytestmark = pytest.mark.skipif(
+    not packaging_available(), reason="packaging 及 pip 自带的 packaging 都不可用"
+)
+
+
+@pytest.fixture
+def env(tmp_path, make_dist):
+    """
+    ### 不含真实 pip 的虚拟环境，site 目录中只有伪造的 dist-info 及只定义了版本号的 pip 包。
+
+    appa 依赖 depb，extra fancy 引入 extdep；pip 依赖 pipdep；stray 与 orphan 不被任何包依赖。
+    """
+    root = tmp_path / "venv"
+    venv.create(str(root), with_pip=False)
+    pyenv = PyEnv(str(root))
+    site = [s for s in pyenv.probe()["sites"] if s.startswith(str(root))][0]
+    os.makedirs(os.path.join(site, "pip"))
+    with open(os.path.join(site, "pip", "__init__.py"), "wt") as f:
+        f.write('__version__ = "23.0"\n')
+    make_dist(site, "pip", "23.0", requires=["pipdep"])
+    make_dist(site, "pipdep", "1.0")
+    make_dist(site, "setuptools", "65.0")
+    make_dist(
+        site,
+        "appa",
+        "1.0",
+        requires=[
+            "depb",
+            'extdep ; extra == "fancy"',
+            'winonly ; python_version < "3"',
+        ],
+        extras=["fancy"],
+    )
+    make_dist(site, "depb", "2.0")
+    make_dist(site, "extdep", "1.0")
+    make_dist(site, "localpkg", "1.0")
+    make_dist(site, "stray", "0.1")
+    make_dist(site, "orphan", "0.1")
+    pyenv.site = site
+    return pyenv
+
+
+def test_sync_dry_run_plan(env):
+    assert env.pip_ready
+    plan = env.sync(
+        [
+            "appa>=1",
+            "depb<2",
+            'winonly ; python_version < "3"',
+            "missing==1.0",
+        ],
+        dry_run=True,
+    )
+    assert plan.dry_run and plan.changed
+    assert plan.to_install == ("depb<2", "missing==1.0")
+    assert plan.satisfied == ("appa>=1", 'winonly ; python_version < "3"')
+    assert plan.to_uninstall == tuple()
+    assert plan.install_ok is None and plan.uninstall_ok is None
+
+
+def test_sync_dry_run_remove_extraneous(env, tmp_path):
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text(
+        "appa[fancy]\n-e ./localpkg#egg=localpkg\n", encoding="utf-8"
+    )
+    plan = env.sync(str(requirements), remove_extraneous=True, dry_run=True)
+    assert plan.to_install == (
+        "-e " + os.path.join(str(tmp_path), "localpkg#egg=localpkg"),
+    )
+    assert plan.satisfied == ("appa[fancy]",)
+    # pip、setuptools 及 pip 的依赖总是被保留，extra 引入的 extdep 被保留
+    assert sorted(plan.to_uninstall) == ["orphan", "stray"]
+    plan = env.sync(["appa"], remove_extraneous=True, dry_run=True)
+    assert sorted(plan.to_uninstall) == ["extdep", "localpkg", "orphan", "stray"]
+
+
+def test_sync_rejects_unnamed_lines_when_removing(env, tmp_path):
+    with pytest.raises(ValueError):
+        env.sync([str(tmp_path / "pkg")], remove_extraneous=True, dry_run=True)
+    plan = env.sync([str(tmp_path / "pkg")], dry_run=True)
+    assert plan.to_install == (str(tmp_path / "pkg"),)
+
+
+def test_sync_rejects_index_options(env):
+    with pytest.raises(ValueError):
+        env.sync(["-i https://example.com/simple", "appa"], dry_run=True)
+
+
+def test_sync_recomputes_extraneous_after_install(env, make_dist):
+    calls = list()
+
+    def install(*names, **kwargs):
+        # 新安装的 newpkg 依赖原本多余的 stray
+        calls.append(("install", names))
+        make_dist(env.site, "newpkg", "1.0", requires=["stray"])
+        return names, True
+
+    def uninstall(*names, **kwargs):
+        calls.append(("uninstall", names))
+        return names, True
+
+    env.install, env.uninstall = install, uninstall
+    plan = env.sync(["appa[fancy]", "newpkg"], remove_extraneous=True)
+    assert plan.to_install == ("newpkg",)
+    assert sorted(plan.to_uninstall) == ["localpkg", "orphan", "stray"]
+    assert calls[0] == ("install", ("newpkg",))
+    assert calls[1][0] == "uninstall"
+    assert sorted(calls[1][1]) == ["localpkg", "orphan"]
+    assert plan.install_ok and plan.uninstall_ok